@@ -1,40 +1,52 @@
 """
 ECG Realistic Dataset Generator
-- 40% Normal | 60% Arrhythmia
+- 40% Normal | 60% Arrhythmia (exact in every chunk, rows shuffled)
 - Overlapping distributions with noise
 - Features: HeartRate, HRV_SDNN
+
+Chunked and parallel via utils/synthetic.py:
+    python generate.py --rows 1000000 --workers 4 --output ECG_1m.csv
 """
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 
-np.random.seed(42)
-n = 5000
-
-# --- NORMAL ECG (label=0) ---
-n_normal = int(n * 0.4)
-normal_hr  = np.random.normal(72, 10, n_normal)   # Healthy resting HR
-normal_hrv = np.random.normal(60, 15, n_normal)    # Good HRV
-
-# --- ARRHYTHMIA (label=1) ---
-n_arr = int(n * 0.6)
-arr_hr  = np.random.normal(110, 25, n_arr)         # Elevated / irregular HR
-arr_hrv = np.random.normal(30,  20, n_arr)         # Low HRV
-
-# Combine
-heart_rate = np.concatenate([normal_hr, arr_hr])
-hrv_sdnn   = np.concatenate([normal_hrv, arr_hrv])
-labels     = np.array([0] * n_normal + [1] * n_arr)
-
-# Add realistic overlap noise
-heart_rate += np.random.normal(0, 5, n)
-hrv_sdnn   += np.random.normal(0, 5, n)
-
-df = pd.DataFrame({
-    "HeartRate": heart_rate,
-    "HRV_SDNN":  hrv_sdnn,
-    "Label":     labels
-})
-
-df.to_csv("ECG_dataset_realistic.csv", index=False)
-print(f"✅ ECG dataset saved: {len(df)} rows | Normal: {n_normal} | Arrhythmia: {n_arr}")
-print(df.groupby("Label")[["HeartRate", "HRV_SDNN"]].mean().round(2))
\ No newline at end of file
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.synthetic import class_labels, main
+from utils.dataset_io import read_dataset
+
+FRACTIONS = [0.4, 0.6]
+
+#                  NORMAL (label=0)          ARRHYTHMIA (label=1)
+HR_MEAN  = np.array([72,  110])   # Healthy resting HR | Elevated / irregular HR
+HR_STD   = np.array([10,  25])
+HRV_MEAN = np.array([60,  30])    # Good HRV           | Low HRV
+HRV_STD  = np.array([15,  20])
+
+
+def make_chunk(rng, n):
+    labels = class_labels(rng, n, FRACTIONS)
+
+    heart_rate = rng.normal(HR_MEAN[labels], HR_STD[labels])
+    hrv_sdnn   = rng.normal(HRV_MEAN[labels], HRV_STD[labels])
+
+    # Add realistic overlap noise
+    heart_rate += rng.normal(0, 5, n)
+    hrv_sdnn   += rng.normal(0, 5, n)
+
+    return pd.DataFrame({
+        "HeartRate": heart_rate,
+        "HRV_SDNN":  hrv_sdnn,
+        "Label":     labels
+    })
+
+
+if __name__ == "__main__":
+    args = main(make_chunk, 5000, "ECG_dataset_realistic.csv", "ECG realistic dataset")
+    if args.rows <= 1_000_000:
+        df = read_dataset(args.output)
+        print(f"✅ ECG dataset saved: {len(df)} rows | Normal: {(df.Label == 0).sum()} | "
+              f"Arrhythmia: {(df.Label == 1).sum()}")
+        print(df.groupby("Label")[["HeartRate", "HRV_SDNN"]].mean().round(2))
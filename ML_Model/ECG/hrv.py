@@ -0,0 +1,188 @@
+"""
+Batch ECG analytics — R-peaks and HRV panel for many recordings at once
+========================================================================
+Pan-Tompkins-style detection, vectorised across recordings (rows of a
+2-D array sampled at ``fs``):
+
+  1. band-pass 5-15 Hz (Butterworth, zero-phase, along axis 1)
+  2. five-point derivative → squaring → 150 ms moving-window integration
+     (cumulative sum)
+  3. peaks of the integrated signal above ``threshold`` x its 99th
+     percentile, kept only if they are the maximum of a ±200 ms
+     neighbourhood (sliding-maximum refractory period)
+  4. each peak is moved to the largest |band-passed| sample in the
+     integration window before it (the R wave)
+
+R-R intervals outside 300-2000 ms are dropped; per-recording statistics
+are reduced with np.bincount, so the cost is linear in rows x samples.
+Rows are processed in blocks of ``block_rows`` to bound memory.
+
+Returns a dict of arrays (one value per recording, NaN when there are
+too few beats): heart_rate (bpm), sdnn, rmssd (ms), pnn50 (%), n_beats.
+With ``groups``, rows are pieces of longer recordings (e.g. the clean
+stretches between rejected windows): R-R intervals never span two rows,
+and statistics are pooled per group.
+
+Usage (from ML_Model/):
+    from ECG.hrv import hrv_panel, pad_recordings
+    X, lengths = pad_recordings(list_of_arrays)
+    panel = hrv_panel(X, fs=250, lengths=lengths)
+"""
+import numpy as np
+from scipy.ndimage import maximum_filter1d
+from scipy.signal import butter, sosfiltfilt
+
+BAND = (5.0, 15.0)              # Hz, QRS energy band
+INTEGRATION_S = 0.150
+REFRACTORY_S = 0.200
+RR_RANGE_MS = (300.0, 2000.0)
+BLOCK_ROWS = 2048
+
+PANEL_KEYS = ("heart_rate", "sdnn", "rmssd", "pnn50", "n_beats")
+
+
+def pad_recordings(recordings, fill=np.nan):
+    """Stack variable-length recordings into (n, max_len) plus their lengths."""
+    lengths = np.array([len(r) for r in recordings], dtype=np.int64)
+    X = np.full((len(recordings), lengths.max(initial=0)), fill, dtype=np.float64)
+    for i, r in enumerate(recordings):
+        X[i, :lengths[i]] = r
+    return X, lengths
+
+
+def bandpass(X, fs, band=BAND, order=2):
+    """Zero-phase Butterworth band-pass along the last axis."""
+    high = min(band[1], 0.45 * fs)
+    sos = butter(order, [band[0], high], btype="bandpass", fs=fs, output="sos")
+    return sosfiltfilt(sos, X, axis=-1)
+
+
+def _derivative(X, fs):
+    """Five-point derivative (Pan-Tompkins), same length as X."""
+    D = np.zeros_like(X)
+    D[:, 2:-2] = (-X[:, :-4] - 2 * X[:, 1:-3] + 2 * X[:, 3:-1] + X[:, 4:]) * (fs / 8.0)
+    return D
+
+
+def _moving_sum(X, width):
+    """Trailing moving average over ``width`` samples via a cumulative sum."""
+    cs = np.cumsum(X, axis=1)
+    out = cs.copy()
+    out[:, width:] = cs[:, width:] - cs[:, :-width]
+    return out / width
+
+
+def detect_r_peaks(X, fs, lengths=None, threshold=0.3):
+    """
+    (rows, cols) of R-peaks for a block of equal-width recordings, sorted
+    by row then sample. NaN padding (or samples beyond ``lengths``) is
+    ignored.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n, m = X.shape
+    if lengths is None:
+        lengths = np.full(n, m)
+    valid = np.arange(m)[None, :] < lengths[:, None]
+    valid &= ~np.isnan(X)
+
+    # Centre each row on its valid mean; padding becomes 0
+    counts = np.maximum(valid.sum(axis=1), 1)
+    means = np.where(valid, X, 0.0).sum(axis=1) / counts
+    X = np.where(valid, X - means[:, None], 0.0)
+
+    filtered = bandpass(X, fs)
+    integrated = _moving_sum(_derivative(filtered, fs) ** 2, max(int(INTEGRATION_S * fs), 1))
+    integrated[~valid] = 0.0
+
+    level = np.nanpercentile(np.where(valid, integrated, np.nan), 99, axis=1)
+    refractory = max(int(REFRACTORY_S * fs), 1)
+    local_max = maximum_filter1d(integrated, size=2 * refractory + 1, axis=1, mode="constant")
+
+    peak = (integrated == local_max) & (integrated > threshold * level[:, None]) & valid
+    peak[:, 1:] &= integrated[:, 1:] > integrated[:, :-1]      # first sample of a plateau only
+    rows, cols = np.nonzero(peak)
+
+    # Move each peak to the R wave: max |filtered| in the preceding window
+    width = max(int(INTEGRATION_S * fs), 1)
+    window = cols[:, None] + np.arange(-width, 1)[None, :]
+    np.clip(window, 0, m - 1, out=window)
+    cols = window[np.arange(len(cols)), np.argmax(np.abs(filtered[rows[:, None], window]), axis=1)]
+    return rows, cols
+
+
+def _panel(rows, cols, n, fs, groups=None):
+    """Per-row (or per-group) HRV statistics from sorted peak positions."""
+    same = rows[1:] == rows[:-1]
+    rr = np.diff(cols) / fs * 1000.0
+    rr_row = rows[1:]
+    if groups is not None:
+        rr_row = groups[rr_row]
+    keep = same & (rr >= RR_RANGE_MS[0]) & (rr <= RR_RANGE_MS[1])
+
+    # Successive differences only between adjacent kept intervals of a row
+    kept_idx = np.flatnonzero(keep)
+    adjacent = (np.diff(kept_idx) == 1) & (rr_row[kept_idx[1:]] == rr_row[kept_idx[:-1]])
+    succ = np.diff(rr[kept_idx])[adjacent]
+    succ_row = rr_row[kept_idx[1:]][adjacent]
+
+    rr, rr_row = rr[keep], rr_row[keep]
+    count = np.bincount(rr_row, minlength=n).astype(np.float64)
+    total = np.bincount(rr_row, weights=rr, minlength=n)
+    total_sq = np.bincount(rr_row, weights=rr * rr, minlength=n)
+    n_succ = np.bincount(succ_row, minlength=n).astype(np.float64)
+    succ_sq = np.bincount(succ_row, weights=succ * succ, minlength=n)
+    succ_50 = np.bincount(succ_row, weights=(np.abs(succ) > 50).astype(np.float64), minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count >= 2, total / count, np.nan)
+        var = (total_sq - total * total / count) / (count - 1)
+        sdnn = np.where(count >= 2, np.sqrt(np.maximum(var, 0.0)), np.nan)
+        rmssd = np.where(n_succ >= 1, np.sqrt(succ_sq / n_succ), np.nan)
+        pnn50 = np.where(n_succ >= 1, 100.0 * succ_50 / n_succ, np.nan)
+
+    return {
+        "heart_rate": 60000.0 / mean,
+        "sdnn":       sdnn,
+        "rmssd":      rmssd,
+        "pnn50":      pnn50,
+        "n_beats":    np.bincount(rows if groups is None else groups[rows], minlength=n),
+    }
+
+
+def hrv_panel(X, fs, lengths=None, threshold=0.3, block_rows=BLOCK_ROWS,
+              groups=None, n_groups=None):
+    """
+    HR / SDNN / RMSSD / pNN50 / n_beats for every row of ``X``, or for
+    every group when ``groups`` (group index per row) is given.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    if groups is not None:
+        groups = np.asarray(groups, dtype=np.int64)
+        n = int(n_groups if n_groups is not None else groups.max(initial=-1) + 1)
+    else:
+        n = len(X)
+    out = {k: np.full(n, np.nan) for k in PANEL_KEYS}
+    out["n_beats"] = np.zeros(n, dtype=np.int64)
+    if lengths is not None:
+        lengths = np.asarray(lengths, dtype=np.int64)
+
+    # sosfiltfilt needs a few filter lengths of signal
+    if len(X) == 0 or X.shape[1] < 4 * int(INTEGRATION_S * fs) + 16:
+        return out
+
+    # Peaks of every block first; with groups the statistics need all of them
+    all_rows, all_cols = [], []
+    for start in range(0, len(X), block_rows):
+        stop = min(start + block_rows, len(X))
+        block_lengths = None if lengths is None else lengths[start:stop]
+        rows, cols = detect_r_peaks(X[start:stop], fs, block_lengths, threshold)
+        if groups is None:
+            for key, values in _panel(rows, cols, stop - start, fs).items():
+                out[key][start:stop] = values
+        else:
+            all_rows.append(rows + start)
+            all_cols.append(cols)
+
+    if groups is not None and all_rows:
+        out.update(_panel(np.concatenate(all_rows), np.concatenate(all_cols), n, fs, groups))
+    return out
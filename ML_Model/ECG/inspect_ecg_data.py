@@ -1,9 +1,13 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dataset_io import read_dataset
+
 print("\n========== ECG DATA INSPECTION ==========\n")
 
-df = pd.read_csv("../data/data/ecg_synthetic_10k.csv")
+df = read_dataset("../data/data/ecg_synthetic_10k.csv")
 
 # Basic info
 print("Shape:", df.shape)
@@ -1,22 +1,40 @@
 """
 ECG Model Training — Properly calibrated binary classifier
-- GradientBoosting + Isotonic Calibration
+- Boosted trees + Isotonic Calibration (utils/train_backend.py; TRAIN_BACKEND=gbm|xgb|auto)
 - StandardScaler stored alongside model
 - Outputs: ECG_model.pkl
+
+Features come from ECG_dataset_realistic.csv, or — given a recordings
+file — straight from raw ECG via hrv.py:
+    python train.py recordings.npz     # X (recordings x samples), fs, labels[, lengths]
 """
-import pandas as pd
+import os
+import sys
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import classification_report, brier_score_loss
 
+from hrv import hrv_panel
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.train_backend import fit_calibrated
+from utils.dataset_io import read_dataset
+
 # ── Load ──────────────────────────────────────────────────────────────────────
-df = pd.read_csv("ECG_dataset_realistic.csv")
-X = df[["HeartRate", "HRV_SDNN"]].values
-y = df["Label"].values
+if len(sys.argv) > 1:
+    rec = np.load(sys.argv[1])
+    panel = hrv_panel(rec["X"], float(rec["fs"]), rec["lengths"] if "lengths" in rec else None)
+    keep = ~np.isnan(panel["sdnn"])
+    X = np.column_stack([panel["heart_rate"], panel["sdnn"]])[keep]
+    y = rec["labels"][keep]
+    print(f"HRV features from {keep.sum()} / {len(keep)} recordings "
+          f"(rest had too few beats)")
+else:
+    df = read_dataset("ECG_dataset_realistic.csv", ["HeartRate", "HRV_SDNN", "Label"])
+    X = df[["HeartRate", "HRV_SDNN"]].values
+    y = df["Label"].values
 
 # ── Scale ─────────────────────────────────────────────────────────────────────
 scaler = StandardScaler()
@@ -27,19 +45,8 @@ X_train, X_test, y_train, y_test = train_test_split(
     X_scaled, y, test_size=0.2, random_state=42, stratify=y
 )
 
-# ── Train base model ──────────────────────────────────────────────────────────
-base = GradientBoostingClassifier(
-    n_estimators=200,
-    max_depth=3,
-    learning_rate=0.05,
-    subsample=0.8,
-    random_state=42
-)
-base.fit(X_train, y_train)
-
-# ── Calibrate ─────────────────────────────────────────────────────────────────
-calibrated = CalibratedClassifierCV(base, method="isotonic", cv=5)
-calibrated.fit(X_train, y_train)
+# ── Train + calibrate ─────────────────────────────────────────────────────────
+calibrated = fit_calibrated(X_train, y_train, method="isotonic")
 
 # ── Evaluate ──────────────────────────────────────────────────────────────────
 y_pred  = calibrated.predict(X_test)
@@ -1,50 +1,57 @@
 """
 EEG Realistic Dataset Generator
-- 45% Normal | 35% Mild Neuro | 20% Epilepsy
+- 45% Normal | 35% Mild Neuro | 20% Epilepsy (exact in every chunk, rows shuffled)
 - Features: stress_ratio, sleep_hours
 - Overlapping distributions with noise
+
+Chunked and parallel via utils/synthetic.py:
+    python generate.py --rows 1000000 --workers 4 --output EEG_1m.csv
 """
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 
-np.random.seed(42)
-n = 5000
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.synthetic import class_labels, main
+from utils.dataset_io import read_dataset
+
+FRACTIONS = [0.45, 0.35, 0.20]
 
-n_normal = int(n * 0.45)   # label=0
-n_mild   = int(n * 0.35)   # label=1
-n_epil   = n - n_normal - n_mild  # label=2
+#                      NORMAL  MILD NEURO  EPILEPSY
+STRESS_MEAN = np.array([1.2,   1.8,        2.5])    # Low → elevated → high stress ratio
+STRESS_STD  = np.array([0.3,   0.4,        0.5])
+SLEEP_MEAN  = np.array([7.5,   5.5,        4.0])    # Healthy → disrupted → poor sleep
+SLEEP_STD   = np.array([0.8,   1.0,        1.2])
 
-# --- NORMAL ---
-normal_stress = np.random.normal(1.2, 0.3, n_normal)   # Low stress ratio
-normal_sleep  = np.random.normal(7.5, 0.8, n_normal)   # Healthy sleep
 
-# --- MILD NEURO ---
-mild_stress = np.random.normal(1.8, 0.4, n_mild)       # Elevated stress
-mild_sleep  = np.random.normal(5.5, 1.0, n_mild)       # Disrupted sleep
+def make_chunk(rng, n):
+    labels = class_labels(rng, n, FRACTIONS)
 
-# --- EPILEPSY ---
-epil_stress = np.random.normal(2.5, 0.5, n_epil)       # High stress ratio
-epil_sleep  = np.random.normal(4.0, 1.2, n_epil)       # Poor sleep
+    stress_ratio = rng.normal(STRESS_MEAN[labels], STRESS_STD[labels])
+    sleep_hours  = rng.normal(SLEEP_MEAN[labels], SLEEP_STD[labels])
 
-# Combine
-stress_ratio = np.concatenate([normal_stress, mild_stress, epil_stress])
-sleep_hours  = np.concatenate([normal_sleep,  mild_sleep,  epil_sleep])
-labels       = np.array([0]*n_normal + [1]*n_mild + [2]*n_epil)
+    # Overlap noise
+    stress_ratio += rng.normal(0, 0.15, n)
+    sleep_hours  += rng.normal(0, 0.3,  n)
 
-# Overlap noise
-stress_ratio += np.random.normal(0, 0.15, n)
-sleep_hours  += np.random.normal(0, 0.3,  n)
+    # Clip to realistic bounds
+    sleep_hours = np.clip(sleep_hours, 1.0, 12.0)
+    stress_ratio = np.clip(stress_ratio, 0.5, 5.0)
 
-# Clip to realistic bounds
-sleep_hours = np.clip(sleep_hours, 1.0, 12.0)
-stress_ratio = np.clip(stress_ratio, 0.5, 5.0)
+    return pd.DataFrame({
+        "stress_ratio": stress_ratio,
+        "sleep_hours":  sleep_hours,
+        "Label":        labels
+    })
 
-df = pd.DataFrame({
-    "stress_ratio": stress_ratio,
-    "sleep_hours":  sleep_hours,
-    "Label":        labels
-})
 
-df.to_csv("EEG_dataset_realistic.csv", index=False)
-print(f"✅ EEG dataset saved: {len(df)} rows | Normal: {n_normal} | Mild: {n_mild} | Epilepsy: {n_epil}")
-print(df.groupby("Label")[["stress_ratio", "sleep_hours"]].mean().round(2))
\ No newline at end of file
+if __name__ == "__main__":
+    args = main(make_chunk, 5000, "EEG_dataset_realistic.csv", "EEG realistic dataset")
+    if args.rows <= 1_000_000:
+        df = read_dataset(args.output)
+        counts = df.Label.value_counts().sort_index()
+        print(f"✅ EEG dataset saved: {len(df)} rows | Normal: {counts.get(0, 0)} | "
+              f"Mild: {counts.get(1, 0)} | Epilepsy: {counts.get(2, 0)}")
+        print(df.groupby("Label")[["stress_ratio", "sleep_hours"]].mean().round(2))
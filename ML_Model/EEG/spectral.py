@@ -0,0 +1,168 @@
+"""
+Multi-channel EEG spectral engine — batched Welch PSD and band powers
+======================================================================
+Band powers (delta / theta / alpha / beta / gamma) and the beta / alpha
+stress ratio for many channels and analysis windows at once.
+
+Welch's PSD of a window is the mean of its segments' periodograms, and
+band power is linear in the PSD, so the engine works per segment:
+
+  1. every channel is cut into Hann-windowed segments (``nperseg``,
+     50 % overlap by default) as a strided view — no copies;
+  2. one rfft call per block of channels gives all segment periodograms;
+  3. one matrix product with precomputed band masks turns them into
+     per-segment band powers;
+  4. window band powers are sliding means of those (cumulative sum over
+     the segment axis), so overlapping windows share every segment they
+     have in common instead of recomputing it.
+
+Results match scipy.signal.welch(window="hann", detrend="constant",
+scaling="density") integrated over each band.
+
+BandPowerCache keeps the per-segment band powers of live streams, so
+each update computes only the segments the new samples complete.
+
+Usage (from ML_Model/):
+    from EEG.spectral import SpectralEngine
+    engine = SpectralEngine(fs=256, window_s=4, hop_s=1)
+    powers = engine.band_powers(X)          # (..., n_windows, n_bands)
+    ratio = engine.stress_ratio(X)          # (..., n_windows)
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+BANDS = {
+    "delta": (0.5, 4.0),
+    "theta": (4.0, 8.0),
+    "alpha": (8.0, 13.0),
+    "beta":  (13.0, 30.0),
+    "gamma": (30.0, 45.0),
+}
+BLOCK_ELEMENTS = 1 << 24            # segment samples per FFT block (~128 MB of float64)
+
+
+class SpectralEngine:
+
+    def __init__(self, fs, window_s=4.0, hop_s=1.0, nperseg=None, noverlap=None, bands=BANDS):
+        self.fs = float(fs)
+        self.nperseg = int(nperseg or min(256, int(window_s * fs)))
+        self.noverlap = self.nperseg // 2 if noverlap is None else int(noverlap)
+        self.step = self.nperseg - self.noverlap
+
+        # Windows hop by whole segment steps so they share segments exactly
+        self.window = int(round(window_s * fs))
+        self.hop = max(int(round(hop_s * fs / self.step)), 1) * self.step
+        if self.window < self.nperseg:
+            raise ValueError("window_s is shorter than one Welch segment")
+        self.segments_per_window = (self.window - self.nperseg) // self.step + 1
+        self.hop_segments = self.hop // self.step
+
+        self.band_names = list(bands)
+        self.taper = np.hanning(self.nperseg + 1)[:-1]          # periodic Hann, as scipy
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1.0 / self.fs)
+        df = self.freqs[1] - self.freqs[0]
+
+        # Density scaling with the one-sided doubling, folded into the band masks
+        scale = np.full(len(self.freqs), 2.0 / (self.fs * np.sum(self.taper ** 2)))
+        scale[0] /= 2
+        if self.nperseg % 2 == 0:
+            scale[-1] /= 2
+        masks = np.stack([(self.freqs >= lo) & (self.freqs < hi) for lo, hi in bands.values()], axis=1)
+        self.band_matrix = masks * (scale * df)[:, None]       # (n_freqs, n_bands)
+
+    def band_index(self, name):
+        return self.band_names.index(name)
+
+    # ── segments ──
+    def segment_band_powers(self, X):
+        """
+        Band power of every Welch segment: X (..., n_samples) →
+        (..., n_segments, n_bands).
+        """
+        X = np.asarray(X, dtype=np.float64)
+        lead = X.shape[:-1]
+        flat = X.reshape(-1, X.shape[-1])
+        n_seg = (flat.shape[1] - self.nperseg) // self.step + 1 if flat.shape[1] >= self.nperseg else 0
+        out = np.empty((len(flat), max(n_seg, 0), len(self.band_names)))
+        if n_seg <= 0 or len(flat) == 0:
+            return out.reshape(*lead, 0, len(self.band_names))
+
+        rows_per_block = max(BLOCK_ELEMENTS // (n_seg * self.nperseg), 1)
+        for start in range(0, len(flat), rows_per_block):
+            block = flat[start:start + rows_per_block]
+            seg = sliding_window_view(block, self.nperseg, axis=1)[:, ::self.step]
+            seg = seg - seg.mean(axis=-1, keepdims=True)
+            spec = np.fft.rfft(seg * self.taper, axis=-1)
+            power = spec.real ** 2 + spec.imag ** 2
+            out[start:start + len(block)] = power @ self.band_matrix
+        return out.reshape(*lead, n_seg, len(self.band_names))
+
+    def window_band_powers(self, segment_powers):
+        """Sliding mean of segment band powers → (..., n_windows, n_bands)."""
+        n_seg = segment_powers.shape[-2]
+        spw = self.segments_per_window
+        if n_seg < spw:
+            return segment_powers[..., :0, :]
+        cs = np.cumsum(segment_powers, axis=-2)
+        zero = np.zeros_like(cs[..., :1, :])
+        cs = np.concatenate([zero, cs], axis=-2)
+        starts = np.arange(0, n_seg - spw + 1, self.hop_segments)
+        return (cs[..., starts + spw, :] - cs[..., starts, :]) / spw
+
+    # ── windows ──
+    def band_powers(self, X):
+        """X (..., n_samples) → band powers per analysis window (..., n_windows, n_bands)."""
+        return self.window_band_powers(self.segment_band_powers(X))
+
+    def stress_ratio(self, X=None, powers=None):
+        """Beta / alpha per window (NaN where alpha power is 0)."""
+        if powers is None:
+            powers = self.band_powers(X)
+        alpha = powers[..., self.band_index("alpha")]
+        beta = powers[..., self.band_index("beta")]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(alpha > 0, beta / alpha, np.nan)
+
+    def window_starts(self, n_samples):
+        """Sample offset of each analysis window for a signal of ``n_samples``."""
+        n_seg = (n_samples - self.nperseg) // self.step + 1 if n_samples >= self.nperseg else 0
+        n_win = max((n_seg - self.segments_per_window) // self.hop_segments + 1, 0)
+        return np.arange(n_win) * self.hop
+
+
+class BandPowerCache:
+    """
+    Per-stream segment band powers for live EEG. update() appends samples
+    and returns band powers of the windows they complete; segments
+    computed on earlier calls are reused, never recomputed.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._tail = {}             # stream -> samples not yet fully used by segments
+        self._segments = {}         # stream -> (first segment index, band powers)
+        self._next_window = {}      # stream -> index of the next window to emit
+
+    def update(self, stream, samples):
+        e = self.engine
+        tail = np.concatenate([self._tail.get(stream, np.empty(0)),
+                               np.asarray(samples, dtype=np.float64)])
+        new = e.segment_band_powers(tail)
+        self._tail[stream] = tail[len(new) * e.step:]
+
+        base, segments = self._segments.get(stream, (0, np.empty((0, len(e.band_names)))))
+        segments = np.concatenate([segments, new])
+        w = self._next_window.get(stream, 0)
+
+        out = []
+        spw, hop = e.segments_per_window, e.hop_segments
+        while w * hop + spw <= base + len(segments):
+            lo = w * hop - base
+            out.append(segments[lo:lo + spw].mean(axis=0))
+            w += 1
+
+        # Drop segments no future window will use
+        drop = min(max(w * hop - base, 0), len(segments))
+        self._segments[stream] = (base + drop, segments[drop:])
+        self._next_window[stream] = w
+        return np.array(out) if out else np.empty((0, len(e.band_names)))
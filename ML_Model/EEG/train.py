@@ -1,22 +1,24 @@
 """
 EEG Model Training — Properly calibrated 3-class classifier
-- GradientBoosting + Sigmoid Calibration
+- Boosted trees + Sigmoid Calibration (utils/train_backend.py; TRAIN_BACKEND=gbm|xgb|auto)
 - StandardScaler stored alongside model
 - Classes: 0=Normal, 1=Mild Neuro, 2=Epilepsy
 - Outputs: EEG_model.pkl
 """
-import pandas as pd
+import os
+import sys
 import numpy as np
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.multiclass import OneVsRestClassifier
-from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import classification_report
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.train_backend import fit_calibrated
+from utils.dataset_io import read_dataset
+
 # ── Load ──────────────────────────────────────────────────────────────────────
-df = pd.read_csv("EEG_dataset_realistic.csv")
+df = read_dataset("EEG_dataset_realistic.csv", ["stress_ratio", "sleep_hours", "Label"])
 X = df[["stress_ratio", "sleep_hours"]].values
 y = df["Label"].values
 
@@ -30,18 +32,8 @@ X_train, X_test, y_train, y_test = train_test_split(
 )
 
 # ── Train ─────────────────────────────────────────────────────────────────────
-base = GradientBoostingClassifier(
-    n_estimators=200,
-    max_depth=3,
-    learning_rate=0.05,
-    subsample=0.8,
-    random_state=42
-)
-base.fit(X_train, y_train)
-
 # Calibrate (sigmoid works well for multiclass)
-calibrated = CalibratedClassifierCV(base, method="sigmoid", cv=5)
-calibrated.fit(X_train, y_train)
+calibrated = fit_calibrated(X_train, y_train, method="sigmoid")
 
 # ── Evaluate ──────────────────────────────────────────────────────────────────
 y_pred = calibrated.predict(X_test)
@@ -1,4 +1,5 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
 import joblib
 
@@ -7,13 +8,16 @@ from sklearn.ensemble import GradientBoostingClassifier
 from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import classification_report, accuracy_score
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dataset_io import read_dataset
+
 print("\n========== TRAINING EEG MODEL ==========\n")
 
 # ==========================================
 # LOAD DATA
 # ==========================================
 
-df = pd.read_csv("../data/data/eeg_synthetic_10k.csv")
+df = read_dataset("../data/data/eeg_synthetic_10k.csv")
 
 X = df.drop("EEG_Abnormal", axis=1)
 y = df["EEG_Abnormal"]
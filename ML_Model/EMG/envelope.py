@@ -0,0 +1,164 @@
+"""
+EMG envelope and fatigue engine
+================================
+Muscle features for many EMG sessions at once (rows of a 2-D array,
+NaN-padded or with explicit lengths), e.g. the backend's "EMG Level"
+values x 10:
+
+  windowed RMS      cumulative sum of squares along the session axis →
+                    RMS of every window (the last may be partial)
+  mean / median     batched STFT (Hann segments as a strided view, one
+  frequency         rfft per block) → per segment MNF = Σ f·P / Σ P and
+                    MDF = frequency splitting the power in half
+  fatigue slope     least-squares slope over time of MDF (Hz/min) and of
+                    RMS (units/min) per session; muscle fatigue shows as
+                    falling MDF with rising RMS
+
+emg_panel() returns one value per session: rms_mean (sample-weighted
+mean of window RMS, as utils/raw_signals.emg_rms), mean_freq,
+median_freq, mdf_slope, rms_slope and n_samples.
+
+Usage (from ML_Model/):
+    from EMG.envelope import emg_panel
+    panel = emg_panel(X, fs=1000, lengths=lengths)
+"""
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW_S = 1.0
+NPERSEG = 256
+BLOCK_ELEMENTS = 1 << 24
+
+
+def pad_sessions(sessions, fill=np.nan):
+    """Stack variable-length sessions into (n, max_len) plus their lengths."""
+    lengths = np.array([len(s) for s in sessions], dtype=np.int64)
+    X = np.full((len(sessions), lengths.max(initial=0)), fill, dtype=np.float64)
+    for i, s in enumerate(sessions):
+        X[i, :lengths[i]] = s
+    return X, lengths
+
+
+def _lengths(X, lengths):
+    if lengths is not None:
+        return np.asarray(lengths, dtype=np.int64)
+    # Length = up to the last non-NaN sample
+    valid = ~np.isnan(X)
+    last = X.shape[1] - np.argmax(valid[:, ::-1], axis=1)
+    return np.where(valid.any(axis=1), last, 0)
+
+
+# ── RMS ───────────────────────────────────────────────────────────────────────
+def windowed_rms(X, window, lengths=None):
+    """
+    RMS of consecutive ``window``-sample windows: (rms, counts), each
+    (n_sessions, n_windows). Windows past a session's end have count 0
+    and RMS NaN; a session's last window may be partial.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    n, m = X.shape
+    lengths = _lengths(X, lengths)
+    n_win = -(-m // window) if m else 0
+
+    sq = np.where(np.arange(m)[None, :] < lengths[:, None], np.nan_to_num(X) ** 2, 0.0)
+    cs = np.zeros((n, n_win * window + 1))
+    cs[:, 1:m + 1] = np.cumsum(sq, axis=1)
+    cs[:, m + 1:] = cs[:, m:m + 1]
+    edges = np.arange(n_win + 1) * window
+    sums = cs[:, edges[1:]] - cs[:, edges[:-1]]
+    counts = np.clip(lengths[:, None] - edges[None, :-1], 0, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rms = np.where(counts > 0, np.sqrt(sums / counts), np.nan)
+    return rms, counts
+
+
+# ── Spectrum ──────────────────────────────────────────────────────────────────
+def spectral_frequencies(X, fs, lengths=None, nperseg=NPERSEG, hop=None, band=None):
+    """
+    Mean and median frequency of every STFT segment: (mnf, mdf), each
+    (n_sessions, n_segments), NaN for segments past a session's end.
+    ``band`` (lo, hi) Hz limits the spectrum (default: everything but DC).
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    n, m = X.shape
+    lengths = _lengths(X, lengths)
+    hop = hop or nperseg // 2
+    if m < nperseg:
+        empty = np.empty((n, 0))
+        return empty, empty
+
+    freqs = np.fft.rfftfreq(nperseg, 1.0 / fs)
+    lo, hi = band if band is not None else (freqs[1], fs / 2)
+    keep = (freqs >= lo) & (freqs <= hi)
+    f = freqs[keep]
+    taper = np.hanning(nperseg + 1)[:-1]
+
+    n_seg = (m - nperseg) // hop + 1
+    mnf = np.full((n, n_seg), np.nan)
+    mdf = np.full((n, n_seg), np.nan)
+    seg_valid = np.arange(n_seg)[None, :] * hop + nperseg <= lengths[:, None]
+
+    rows_per_block = max(BLOCK_ELEMENTS // (n_seg * nperseg), 1)
+    for start in range(0, n, rows_per_block):
+        block = np.nan_to_num(X[start:start + rows_per_block])
+        seg = sliding_window_view(block, nperseg, axis=1)[:, ::hop]
+        seg = seg - seg.mean(axis=-1, keepdims=True)
+        spec = np.fft.rfft(seg * taper, axis=-1)[..., keep]
+        P = spec.real ** 2 + spec.imag ** 2
+
+        total = P.sum(axis=-1)
+        cum = np.cumsum(P, axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            block_mnf = (P @ f) / total
+        block_mdf = f[np.argmax(cum >= 0.5 * total[..., None], axis=-1)]
+        ok = seg_valid[start:start + len(block)] & (total > 0)
+        mnf[start:start + len(block)] = np.where(ok, block_mnf, np.nan)
+        mdf[start:start + len(block)] = np.where(ok, block_mdf, np.nan)
+    return mnf, mdf
+
+
+def _slope(y, t):
+    """Least-squares slope of each row of ``y`` against ``t`` (NaNs ignored)."""
+    ok = ~np.isnan(y)
+    k = ok.sum(axis=1)
+    t = np.broadcast_to(t, y.shape)
+    tm = np.where(ok, t, 0).sum(axis=1) / np.maximum(k, 1)
+    ym = np.where(ok, y, 0).sum(axis=1) / np.maximum(k, 1)
+    dt = np.where(ok, t - tm[:, None], 0)
+    dy = np.where(ok, y - ym[:, None], 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(k >= 2, (dt * dy).sum(axis=1) / (dt * dt).sum(axis=1), np.nan)
+
+
+# ── Panel ─────────────────────────────────────────────────────────────────────
+def emg_panel(X, fs, lengths=None, window_s=WINDOW_S, nperseg=NPERSEG, band=None):
+    """Per-session RMS, MNF, MDF and fatigue slopes (see module docstring)."""
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    lengths = _lengths(X, lengths)
+    window = max(int(round(window_s * fs)), 1)
+
+    rms, counts = windowed_rms(X, window, lengths)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rms_mean = np.nansum(rms * counts, axis=1) / counts.sum(axis=1)
+    rms_t = (np.arange(rms.shape[1]) * window + window / 2) / fs / 60
+
+    nperseg = min(nperseg, X.shape[1]) if X.shape[1] else nperseg
+    mnf, mdf = spectral_frequencies(X, fs, lengths, nperseg=nperseg, band=band)
+    hop = nperseg // 2 or 1
+    seg_t = (np.arange(mdf.shape[1]) * hop + nperseg / 2) / fs / 60
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)         # all-NaN rows → NaN
+        mean_freq = np.nanmean(mnf, axis=1) if mnf.shape[1] else np.full(len(X), np.nan)
+        median_freq = np.nanmean(mdf, axis=1) if mdf.shape[1] else np.full(len(X), np.nan)
+
+    return {
+        "rms_mean":    rms_mean,
+        "mean_freq":   mean_freq,
+        "median_freq": median_freq,
+        "mdf_slope":   _slope(mdf, seg_t) if mdf.shape[1] else np.full(len(X), np.nan),
+        "rms_slope":   _slope(rms, rms_t),
+        "n_samples":   lengths,
+    }
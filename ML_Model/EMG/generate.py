@@ -1,45 +1,56 @@
 """
 EMG Realistic Dataset Generator
-- 50% Normal | 50% Abnormal (muscle disorder)
+- 50% Normal | 50% Abnormal (muscle disorder; exact in every chunk, rows shuffled)
 - Features: emg_rms, steps
 - Overlapping distributions with noise
+
+Chunked and parallel via utils/synthetic.py:
+    python generate.py --rows 1000000 --workers 4 --output EMG_1m.csv
 """
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 
-np.random.seed(42)
-n = 5000
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.synthetic import class_labels, main
+from utils.dataset_io import read_dataset
+
+FRACTIONS = [0.5, 0.5]
+
+#                     NORMAL  ABNORMAL (myopathy / neuropathy)
+RMS_MEAN   = np.array([0.45,  0.75])    # Healthy muscle signal | Elevated or irregular RMS
+RMS_STD    = np.array([0.10,  0.15])
+STEPS_MEAN = np.array([7500,  3500])    # Active steps/day      | Reduced activity
+STEPS_STD  = np.array([1500,  1800])
 
-n_normal = int(n * 0.5)   # label=0
-n_abnorm = n - n_normal   # label=1
 
-# --- NORMAL ---
-normal_rms   = np.random.normal(0.45, 0.10, n_normal)  # Healthy muscle signal
-normal_steps = np.random.normal(7500, 1500, n_normal)  # Active steps/day
+def make_chunk(rng, n):
+    labels = class_labels(rng, n, FRACTIONS)
 
-# --- ABNORMAL (myopathy / neuropathy) ---
-abnorm_rms   = np.random.normal(0.75, 0.15, n_abnorm)  # Elevated or irregular RMS
-abnorm_steps = np.random.normal(3500, 1800, n_abnorm)  # Reduced activity
+    emg_rms = rng.normal(RMS_MEAN[labels], RMS_STD[labels])
+    steps   = rng.normal(STEPS_MEAN[labels], STEPS_STD[labels])
 
-# Combine
-emg_rms = np.concatenate([normal_rms,   abnorm_rms])
-steps   = np.concatenate([normal_steps, abnorm_steps])
-labels  = np.array([0]*n_normal + [1]*n_abnorm)
+    # Overlap noise
+    emg_rms += rng.normal(0, 0.04, n)
+    steps   += rng.normal(0, 300,  n)
 
-# Overlap noise
-emg_rms += np.random.normal(0, 0.04, n)
-steps   += np.random.normal(0, 300,  n)
+    # Clip to realistic bounds
+    emg_rms = np.clip(emg_rms, 0.05, 1.5)
+    steps   = np.clip(steps, 0, 25000)
 
-# Clip to realistic bounds
-emg_rms = np.clip(emg_rms, 0.05, 1.5)
-steps   = np.clip(steps, 0, 25000)
+    return pd.DataFrame({
+        "emg_rms": emg_rms,
+        "steps":   steps,
+        "Label":   labels
+    })
 
-df = pd.DataFrame({
-    "emg_rms": emg_rms,
-    "steps":   steps,
-    "Label":   labels
-})
 
-df.to_csv("EMG_dataset_realistic.csv", index=False)
-print(f"✅ EMG dataset saved: {len(df)} rows | Normal: {n_normal} | Abnormal: {n_abnorm}")
-print(df.groupby("Label")[["emg_rms", "steps"]].mean().round(2))
\ No newline at end of file
+if __name__ == "__main__":
+    args = main(make_chunk, 5000, "EMG_dataset_realistic.csv", "EMG realistic dataset")
+    if args.rows <= 1_000_000:
+        df = read_dataset(args.output)
+        print(f"✅ EMG dataset saved: {len(df)} rows | Normal: {(df.Label == 0).sum()} | "
+              f"Abnormal: {(df.Label == 1).sum()}")
+        print(df.groupby("Label")[["emg_rms", "steps"]].mean().round(2))
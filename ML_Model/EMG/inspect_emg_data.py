@@ -1,9 +1,13 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dataset_io import read_dataset
+
 print("\n========== EMG DATA INSPECTION ==========\n")
 
-df = pd.read_csv("../data/data/emg_synthetic_10k.csv")
+df = read_dataset("../data/data/emg_synthetic_10k.csv")
 
 print("Shape:", df.shape)
 print("\nColumns:", df.columns.tolist())
@@ -19,56 +19,76 @@ FIX:
   so scaler expectations match pipeline outputs.
 
 Run this from ML_Model/EMG/
+    python train.py                   # synthetic dataset above
+    python train.py sessions.npz      # X (sessions x samples, backend units), fs,
+                                      # steps, labels[, lengths]
 """
+import os
+import sys
 import numpy as np
 import pandas as pd
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import classification_report, brier_score_loss
 
-np.random.seed(42)
-n = 5000
-
-# ── NORMAL (label=0) — 50% ──────────────────────────────────────────────────
-# Normal people: active (high steps) → pipeline rms = steps/10000 = ~0.7–1.0
-# BUT their actual muscle signal rms is LOW (clean, efficient contractions)
-n0 = int(n * 0.5)
-steps0   = np.random.normal(7500, 1500, n0)   # active
-steps0   = np.clip(steps0, 500, 20000)
-# Pipeline computes rms = steps/10000, so we simulate that exactly
-emg_rms0 = steps0 / 10000 + np.random.normal(0, 0.03, n0)  # slight noise
-
-# ── ABNORMAL (label=1) — 50% ────────────────────────────────────────────────
-# Abnormal: sedentary (low steps) AND elevated rms (noisy/disordered signal)
-n1 = n - n0
-steps1   = np.random.normal(2500, 1200, n1)
-steps1   = np.clip(steps1, 0, 8000)
-# Abnormal: rms is HIGHER than what steps/10000 would predict
-emg_rms1 = steps1 / 10000 + np.random.normal(0.35, 0.08, n1)  # elevated rms
-
-# ── Combine ─────────────────────────────────────────────────────────────────
-emg_rms = np.clip(np.concatenate([emg_rms0, emg_rms1]), 0.01, 1.5)
-steps   = np.clip(np.concatenate([steps0,   steps1]),   0,    20000)
-labels  = np.array([0]*n0 + [1]*n1)
-
-# Add small overlap noise
-emg_rms += np.random.normal(0, 0.02, n)
-steps   += np.random.normal(0, 200,  n)
-emg_rms  = np.clip(emg_rms, 0.01, 1.5)
-steps    = np.clip(steps, 0, 20000)
-
-df = pd.DataFrame({
-    "emg_rms": emg_rms,
-    "steps":   steps,
-    "Label":   labels
-})
-
-df.to_csv("EMG_dataset_fixed.csv", index=False)
-print(f"✅ EMG dataset: {len(df)} rows")
-print(df.groupby("Label")[["emg_rms", "steps"]].mean().round(3))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from envelope import emg_panel
+from utils.raw_signals import emg_model_units
+from utils.train_backend import fit_calibrated
+
+if len(sys.argv) > 1:
+    # ── Recorded sessions: emg_rms from the raw signal (envelope.py) ─────────
+    rec = np.load(sys.argv[1])
+    panel = emg_panel(rec["X"], float(rec["fs"]), rec["lengths"] if "lengths" in rec else None)
+    df = pd.DataFrame({
+        "emg_rms": emg_model_units(panel["rms_mean"]),
+        "steps":   rec["steps"],
+        "Label":   rec["labels"]
+    }).dropna()
+    print(f"✅ EMG features from {len(df)} / {len(panel['rms_mean'])} sessions")
+    print(df.groupby("Label")[["emg_rms", "steps"]].mean().round(3))
+else:
+    np.random.seed(42)
+    n = 5000
+
+    # ── NORMAL (label=0) — 50% ──────────────────────────────────────────────────
+    # Normal people: active (high steps) → pipeline rms = steps/10000 = ~0.7–1.0
+    # BUT their actual muscle signal rms is LOW (clean, efficient contractions)
+    n0 = int(n * 0.5)
+    steps0   = np.random.normal(7500, 1500, n0)   # active
+    steps0   = np.clip(steps0, 500, 20000)
+    # Pipeline computes rms = steps/10000, so we simulate that exactly
+    emg_rms0 = steps0 / 10000 + np.random.normal(0, 0.03, n0)  # slight noise
+
+    # ── ABNORMAL (label=1) — 50% ────────────────────────────────────────────────
+    # Abnormal: sedentary (low steps) AND elevated rms (noisy/disordered signal)
+    n1 = n - n0
+    steps1   = np.random.normal(2500, 1200, n1)
+    steps1   = np.clip(steps1, 0, 8000)
+    # Abnormal: rms is HIGHER than what steps/10000 would predict
+    emg_rms1 = steps1 / 10000 + np.random.normal(0.35, 0.08, n1)  # elevated rms
+
+    # ── Combine ─────────────────────────────────────────────────────────────────
+    emg_rms = np.clip(np.concatenate([emg_rms0, emg_rms1]), 0.01, 1.5)
+    steps   = np.clip(np.concatenate([steps0,   steps1]),   0,    20000)
+    labels  = np.array([0]*n0 + [1]*n1)
+
+    # Add small overlap noise
+    emg_rms += np.random.normal(0, 0.02, n)
+    steps   += np.random.normal(0, 200,  n)
+    emg_rms  = np.clip(emg_rms, 0.01, 1.5)
+    steps    = np.clip(steps, 0, 20000)
+
+    df = pd.DataFrame({
+        "emg_rms": emg_rms,
+        "steps":   steps,
+        "Label":   labels
+    })
+
+    df.to_csv("EMG_dataset_fixed.csv", index=False)
+    print(f"✅ EMG dataset: {len(df)} rows")
+    print(df.groupby("Label")[["emg_rms", "steps"]].mean().round(3))
 
 # ── Train ────────────────────────────────────────────────────────────────────
 X = df[["emg_rms", "steps"]].values
@@ -81,14 +101,7 @@ X_train, X_test, y_train, y_test = train_test_split(
     X_scaled, y, test_size=0.2, random_state=42, stratify=y
 )
 
-base = GradientBoostingClassifier(
-    n_estimators=200, max_depth=3,
-    learning_rate=0.05, subsample=0.8, random_state=42
-)
-base.fit(X_train, y_train)
-
-calibrated = CalibratedClassifierCV(base, method="isotonic", cv=5)
-calibrated.fit(X_train, y_train)
+calibrated = fit_calibrated(X_train, y_train, method="isotonic")
 
 y_pred  = calibrated.predict(X_test)
 y_proba = calibrated.predict_proba(X_test)[:, 1]
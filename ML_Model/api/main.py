@@ -1,40 +1,30 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
-import joblib
-import pandas as pd
 import numpy as np
 import os
 import sys
 
-# Allow importing preprocessing
+# Allow importing the feature kernels
 sys.path.append(os.path.abspath("../"))
-from utils.preprocessing import (
-    preprocess_heart,
-    preprocessing_stroke
+from utils.features import (
+    as_raw,
+    heart_features,
+    diabetes_features,
+    api_stroke_features
 )
 
-from utils.preprocessing_diabetes import preprocess_diabetes
-
 app = FastAPI(title="Multi-Disease Risk Prediction API")
 
 # ===============================
-# Load Models
-# ============
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
-
-heart_data = joblib.load(os.path.join(ROOT_DIR, "heart", "heart_model.pkl"))
-diabetes_data = joblib.load(os.path.join(ROOT_DIR, "diabetes", "diabetes_model.pkl"))
-stroke_data = joblib.load(os.path.join(ROOT_DIR, "stroke", "stroke_model.pkl"))
-
-heart_model = heart_data["model"]
-heart_threshold = heart_data["threshold"]
-
-diabetes_model = diabetes_data["model"]
-diabetes_threshold = diabetes_data["threshold"]
+# Models (loaded lazily by the shared registry)
+# ===============================
+from utils.model_registry import registry
+from utils.prediction_cache import cache_from_env
 
-stroke_model = stroke_data["model"]
-stroke_threshold = stroke_data["threshold"]
+# Repeated identical vitals are answered from cache (see
+# utils/prediction_cache.py for the PREDICTION_CACHE_* settings)
+SERVED_MODELS = ["heart", "diabetes", "stroke"]
+cache = cache_from_env(lambda: registry.fingerprint(SERVED_MODELS))
 
 # ===============================
 # Request Schema
@@ -53,28 +43,40 @@ class PatientInput(BaseModel):
 @app.post("/predict")
 def predict(data: PatientInput):
 
-    df = pd.DataFrame([data.dict()])
+    row = data.dict()
+    if cache is None:
+        return score(row)
+    return cache.get_or_compute(row, lambda: score(row))
+
+
+def score(row):
+
+    raw = as_raw([row])
+
+    heart_data = registry.get("heart")
+    diabetes_data = registry.get("diabetes")
+    stroke_data = registry.get("stroke")
 
     # --------------------
     # HEART
     # --------------------
-    heart_df = preprocess_heart(df.copy())
-    heart_prob = heart_model.predict_proba(heart_df)[0][1]
-    heart_pred = int(heart_prob > heart_threshold)
+    heart_prob = registry.compiled("heart").predict_proba(heart_features(raw))[0][1]
+    heart_pred = int(heart_prob > heart_data["threshold"])
 
     # --------------------
     # DIABETES
     # --------------------
-    diabetes_df = preprocess_diabetes(df.copy())
-    diabetes_prob = diabetes_model.predict_proba(diabetes_df)[0][1]
-    diabetes_pred = int(diabetes_prob > diabetes_threshold)
+    diabetes_prob = registry.compiled("diabetes").predict_proba(diabetes_features(raw))[0][1]
+    diabetes_pred = int(diabetes_prob > diabetes_data["threshold"])
 
     # --------------------
     # STROKE
     # --------------------
-    stroke_df = preprocessing_stroke(df.copy())
-    stroke_prob = stroke_model.predict_proba(stroke_df)[0][1]
-    stroke_pred = int(stroke_prob > stroke_threshold)
+    # Served without the scaler, as before
+    stroke_prob = registry.compiled("stroke", with_scaler=False).predict_proba(
+        api_stroke_features(raw)
+    )[0][1]
+    stroke_pred = int(stroke_prob > stroke_data["threshold"])
 
     return {
         "heart": {
@@ -93,4 +95,12 @@ def predict(data: PatientInput):
 
 @app.get("/")
 def home():
-    return {"message": "Multi-Disease Risk Prediction API Running"}
\ No newline at end of file
+    return {"message": "Multi-Disease Risk Prediction API Running"}
+
+@app.get("/models")
+def models():
+    return registry.stats()
+
+@app.get("/stats")
+def stats():
+    return {"cache": cache.stats() if cache is not None else None}
\ No newline at end of file
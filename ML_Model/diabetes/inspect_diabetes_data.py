@@ -1,7 +1,11 @@
-import pandas as pd
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.dataset_io import read_dataset
 
 # Load dataset
-df = pd.read_csv("../data/synthetic/diabetes_synthetic_10k.csv")
+df = read_dataset("../data/synthetic/diabetes_synthetic_10k.csv")
 
 print("\n===== FIRST 5 ROWS =====")
 print(df.head())
@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
@@ -17,11 +16,12 @@ import os
 # Allow importing from utils folder
 sys.path.append(os.path.abspath("../"))
 from utils.preprocessing_diabetes import preprocess_diabetes
+from utils.dataset_io import read_dataset
 
 # =============================
 # 1️⃣ Load Dataset
 # =============================
-df = pd.read_csv("../data/synthetic/diabetes_synthetic_10k.csv")
+df = read_dataset("../data/synthetic/diabetes_synthetic_10k.csv")
 
 # =============================
 # 2️⃣ Feature Engineering
@@ -1,31 +1,25 @@
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import StratifiedKFold
-from sklearn.metrics import roc_auc_score
 from xgboost import XGBClassifier
 import sys
 import os
 
 sys.path.append(os.path.abspath("../"))
 from utils.preprocessing_diabetes import preprocess_diabetes
+from utils.cross_validation import cross_validate, cv_arguments
+from utils.dataset_io import read_dataset
 
-df = pd.read_csv("../data/synthetic/diabetes_synthetic_10k.csv")
+args = cv_arguments("Diabetes k-fold validation (run from ML_Model/diabetes/)")
+
+df = read_dataset("../data/synthetic/diabetes_synthetic_10k.csv")
 df = preprocess_diabetes(df)
 
 X = df.drop("Diabetes", axis=1)
 y = df["Diabetes"]
 
-skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
-auc_scores = []
-
-for fold, (train_idx, val_idx) in enumerate(skf.split(X, y)):
-    X_train, X_val = X.iloc[train_idx], X.iloc[val_idx]
-    y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
 
+def make_model(y_train):
     scale_weight = len(y_train[y_train == 0]) / len(y_train[y_train == 1])
 
-    model = XGBClassifier(
+    return XGBClassifier(
         n_estimators=500,
         max_depth=5,
         learning_rate=0.05,
@@ -35,13 +29,6 @@ for fold, (train_idx, val_idx) in enumerate(skf.split(X, y)):
         eval_metric="logloss"
     )
 
-    model.fit(X_train, y_train)
-
-    y_prob = model.predict_proba(X_val)[:, 1]
-    auc = roc_auc_score(y_val, y_prob)
-    auc_scores.append(auc)
-
-    print(f"Fold {fold+1} AUC:", auc)
 
-print("\nMean AUC:", np.mean(auc_scores))
-print("Std Dev:", np.std(auc_scores))
\ No newline at end of file
+cross_validate(make_model, X, y, n_splits=args.folds, n_repeats=args.repeats,
+               n_jobs=args.jobs, cache=not args.no_cache, title="DIABETES")
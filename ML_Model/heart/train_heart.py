@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
@@ -16,11 +15,12 @@ import os
 
 sys.path.append(os.path.abspath("../"))
 from utils.preprocessing import preprocess_heart
+from utils.dataset_io import read_dataset
 
 # =============================
 # 1. Load Dataset
 # =============================
-df = pd.read_csv("../data/synthetic/heart_synthetic_10k.csv")
+df = read_dataset("../data/synthetic/heart_synthetic_10k.csv")
 
 # =============================
 # 2. Feature Engineering
@@ -0,0 +1,474 @@
+"""
+Serial ingestion service
+=========================
+Reads the hardware line protocol (utils/serial_protocol.py — the same
+lines Hardware_Backend/server.js parses) from one or more devices and
+appends the samples to a local SegmentStore (utils/segment_store.py).
+
+  - One reader thread per source: serial device (pyserial, if installed),
+    pty / FIFO, or a recorded log replayed with --replay.
+  - Per device and sensor, samples go into a fixed-size NumPy ring buffer;
+    every CHUNK (100) samples a chunk is handed to the writer.
+  - A single writer thread drains the chunk queue and appends everything
+    it got for a (device, sensor) with one write — earlier history is
+    never read back or rewritten.
+  - The chunk queue is bounded (--max-pending). When the store falls
+    behind, readers block on it and stop reading the port (backpressure)
+    instead of growing memory; time spent blocked is reported.
+  - Every --report seconds: lines/s, samples/s, queue depth, blocked time.
+  - With --compact-every, the writer also compacts the store between
+    batches (dropping data older than --retention-days, if given).
+  - Every write also folds the samples into the stream's summary pyramid
+    (utils/summary_pyramid.py) in the same store folder, unless
+    --no-pyramid; pyramids are not subject to --retention-days.
+  - With --features-dir, every chunk also updates the device's streaming
+    feature extractors (utils/streaming_features.py), checkpointed to
+    <features-dir>/<device>.json so a restart resumes them; --score-every
+    re-scores the ECG / EEG / EMG models from them every N seconds.
+    ECG / EEG / EMG chunks rejected by the signal-quality gate
+    (utils/signal_quality.py) are still stored but never reach them.
+
+Sources are ``path`` or ``device_id=path`` (the id names the store folder;
+default is the file name).
+
+Usage (from ML_Model/):
+    python ingest/serial_ingest.py /dev/ttyUSB0
+    python ingest/serial_ingest.py left=/dev/ttyUSB0 right=/dev/ttyACM0 --baud 115200
+    python ingest/serial_ingest.py --replay capture.log --rate 500
+"""
+import argparse
+import errno
+import io
+import os
+import queue
+import stat
+import sys
+import threading
+import time
+
+import numpy as np
+
+ML_MODEL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ML_MODEL)
+
+from utils.segment_store import SegmentStore, check_name
+from utils.serial_protocol import LineParser
+from utils.signal_quality import SENSOR_LIMITS, assess
+from utils.streaming_features import StreamingFeatures
+from utils.summary_pyramid import SummaryPyramid
+
+CHUNK = 100                 # samples per chunk, as the backend's flushes
+RING_CAPACITY = 4096        # samples kept per sensor (recent history for live use)
+BAUD_RATE = 115200          # Hardware_Backend's SerialPort baudRate
+
+
+# ── Ring buffer ───────────────────────────────────────────────────────────────
+class RingBuffer:
+    """
+    Fixed-capacity (timestamp, value) ring. ``pending`` counts samples not
+    yet handed out by take(); the newest ``capacity`` samples stay
+    readable through latest() whether taken or not.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.t = np.empty(capacity, dtype=np.float64)
+        self.v = np.empty(capacity, dtype=np.float32)
+        self.head = 0                   # next write position
+        self.size = 0
+        self.pending = 0
+        self.overwritten = 0            # pending samples lost to wrap-around
+
+    def push(self, t, v):
+        self.t[self.head] = t
+        self.v[self.head] = v
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        if self.pending == self.capacity:
+            self.overwritten += 1
+        else:
+            self.pending += 1
+
+    def _slice(self, start, n):
+        idx = (start + np.arange(n)) % self.capacity
+        return self.t[idx], self.v[idx]
+
+    def take(self, n=None):
+        """Copy out the oldest ``n`` pending samples (all pending by default)."""
+        n = self.pending if n is None else min(n, self.pending)
+        out = self._slice(self.head - self.pending, n)
+        self.pending -= n
+        return out
+
+    def latest(self, n):
+        n = min(n, self.size)
+        return self._slice(self.head - n, n)
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+class Metrics:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lines = 0
+        self.samples = 0
+        self.ignored = 0
+        self.overwritten = 0
+        self.blocked_seconds = 0.0
+        self.chunks_written = 0
+        self.samples_written = 0
+        self.write_batches = 0
+        self.write_seconds = 0.0
+        self.compactions = 0
+        self.records_dropped = 0
+        self.started = time.perf_counter()
+        self._last = (self.started, 0, 0)
+
+    def add(self, **counts):
+        with self.lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def report(self, queue_depth):
+        """One status line; rates are over the interval since the last call."""
+        now = time.perf_counter()
+        with self.lock:
+            last_t, last_lines, last_samples = self._last
+            dt = max(now - last_t, 1e-9)
+            line = (f"  {self.lines:>10,} lines ({(self.lines - last_lines) / dt:>8,.0f}/s) | "
+                    f"{self.samples:>10,} samples ({(self.samples - last_samples) / dt:>8,.0f}/s) | "
+                    f"written {self.samples_written:,} in {self.write_batches:,} batches | "
+                    f"queue {queue_depth} | blocked {self.blocked_seconds:.1f}s")
+            self._last = (now, self.lines, self.samples)
+        return line
+
+    def summary(self):
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                "elapsed_seconds":  round(elapsed, 3),
+                "lines":            self.lines,
+                "lines_per_second": round(self.lines / elapsed, 1) if elapsed else 0.0,
+                "samples":          self.samples,
+                "ignored_lines":    self.ignored,
+                "samples_written":  self.samples_written,
+                "chunks_written":   self.chunks_written,
+                "write_batches":    self.write_batches,
+                "write_seconds":    round(self.write_seconds, 3),
+                "blocked_seconds":  round(self.blocked_seconds, 3),
+                "overwritten":      self.overwritten,
+                "compactions":      self.compactions,
+                "records_dropped":  self.records_dropped,
+            }
+
+
+# ── Writer ────────────────────────────────────────────────────────────────────
+class BatchWriter(threading.Thread):
+    """Drains (device, sensor, t, v) chunks and appends them in batches."""
+
+    _STOP = object()
+    _POLL = 0.5             # seconds between writer liveness checks of a blocked submit
+
+    def __init__(self, store, metrics, max_pending=256, max_batch=64,
+                 compact_every=None, retention_seconds=None, pyramid=None):
+        super().__init__(name="ingest-writer", daemon=True)
+        self.store = store
+        self.pyramid = pyramid
+        self.metrics = metrics
+        self.max_batch = max_batch
+        self.compact_every = compact_every
+        self.retention_seconds = retention_seconds
+        self.queue = queue.Queue(maxsize=max_pending)
+        self._last_compaction = time.monotonic()
+        self.error = None
+
+    def _check(self):
+        """Raise the writer's failure instead of queueing for a dead thread."""
+        if self.error is not None or (self.ident is not None and not self.is_alive()):
+            raise RuntimeError("ingest writer stopped") from self.error
+
+    def _put(self, item):
+        while True:
+            self._check()
+            try:
+                self.queue.put(item, timeout=self._POLL)
+                return
+            except queue.Full:
+                continue
+
+    def submit(self, chunk):
+        """Queue a chunk, blocking while the queue is full (backpressure)."""
+        if self.error is not None:
+            self._check()
+        try:
+            self.queue.put_nowait(chunk)
+        except queue.Full:
+            start = time.perf_counter()
+            self._put(chunk)
+            self.metrics.add(blocked_seconds=time.perf_counter() - start)
+
+    def close(self):
+        if self.is_alive():
+            try:
+                self._put(self._STOP)
+            except RuntimeError:
+                pass
+        self.join()
+        if self.error is not None:
+            raise RuntimeError("ingest writer failed") from self.error
+
+    def run(self):
+        try:
+            self._drain()
+        except BaseException as exc:
+            self.error = exc
+            raise
+
+    def _drain(self):
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self.queue.get(timeout=self.compact_every)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Readers that outlived their join can still queue after _STOP
+            if any(chunk is self._STOP for chunk in batch):
+                batch = [chunk for chunk in batch if chunk is not self._STOP]
+                stopping = True
+            if batch:
+                self._write(batch)
+            if (self.compact_every
+                    and time.monotonic() - self._last_compaction >= self.compact_every):
+                self._compact()
+
+        # Chunks a straggling reader queued behind _STOP
+        rest = []
+        while True:
+            try:
+                rest.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        rest = [chunk for chunk in rest if chunk is not self._STOP]
+        if rest:
+            self._write(rest)
+
+    def _compact(self):
+        start = time.perf_counter()
+        before, after = self.store.compact_all(self.retention_seconds)
+        self._last_compaction = time.monotonic()
+        self.metrics.add(compactions=1, records_dropped=before - after,
+                         write_seconds=time.perf_counter() - start)
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        groups = {}
+        for device, sensor, t, v in batch:
+            groups.setdefault((device, sensor), []).append((t, v))
+        samples = 0
+        for (device, sensor), chunks in groups.items():
+            t = np.concatenate([c[0] for c in chunks])
+            v = np.concatenate([c[1] for c in chunks])
+            samples += self.store.append(device, sensor, t, v)
+            if self.pyramid is not None:
+                self.pyramid.update(device, sensor, t, v)
+        self.metrics.add(chunks_written=len(batch), samples_written=samples,
+                         write_batches=1, write_seconds=time.perf_counter() - start)
+
+
+# ── Sources ───────────────────────────────────────────────────────────────────
+def open_source(path, baud=BAUD_RATE, replay=False):
+    """Binary line reader for a device path (pyserial when available) or file."""
+    if not replay and stat.S_ISCHR(os.stat(path).st_mode):
+        try:
+            import serial
+        except ImportError:
+            serial = None                # plain open: works for ptys; baud stays as set
+        if serial is not None:
+            return serial.Serial(path, baudrate=baud, timeout=1.0)
+    return open(path, "rb", buffering=io.DEFAULT_BUFFER_SIZE)
+
+
+class DeviceReader(threading.Thread):
+    """Reads, parses and buffers one device's stream."""
+
+    def __init__(self, device, source, writer, metrics, stop, rate=0.0,
+                 ring_capacity=RING_CAPACITY, batch_lines=256,
+                 features_path=None, score_every=None):
+        super().__init__(name=f"ingest-{device}", daemon=True)
+        self.device = device
+        self.source = source
+        self.writer = writer
+        self.metrics = metrics
+        self.stop = stop
+        self.rate = rate
+        self.ring_capacity = ring_capacity
+        self.batch_lines = batch_lines
+        self.parser = LineParser()
+        self.rings = {}
+        self.features_path = features_path
+        self.features = StreamingFeatures.load(features_path) if features_path else None
+        self.score_every = score_every
+        self._last_score = time.monotonic()
+
+    def ring(self, sensor):
+        ring = self.rings.get(sensor)
+        if ring is None:
+            ring = self.rings[sensor] = RingBuffer(self.ring_capacity)
+        return ring
+
+    def _emit(self, sensor, ring, n=CHUNK):
+        t, v = ring.take(n)
+        if len(v):
+            self.writer.submit((self.device, sensor, t, v))
+            if self.features is not None:
+                if sensor in SENSOR_LIMITS and not assess(v, sensor)["ok"][0]:
+                    return
+                self.features.update(sensor, v)
+                if self.score_every and time.monotonic() - self._last_score >= self.score_every:
+                    self._score()
+
+    def _score(self):
+        self._last_score = time.monotonic()
+        self.features.save(self.features_path)
+        r = self.features.score()
+        print(f"  [{self.device}] HR {r['heart_rate']:.0f} SDNN {r['hrv_sdnn']:.0f} "
+              f"β/α {r['stress_ratio']:.2f} EMG {r['emg_rms']:.3f} → "
+              f"NCM {r['ncm_index']:.1f} ({r['risk_category']}, {r['systemic_flag']})", flush=True)
+
+    def run(self):
+        lines = samples = total = 0
+        start = time.perf_counter()
+        try:
+            for raw in self.source:
+                if self.stop.is_set():
+                    break
+                now = time.time()
+                line = raw.decode("utf-8", "replace").strip()
+                lines += 1
+                total += 1
+                for sensor, value in self.parser.parse(line):
+                    ring = self.ring(sensor)
+                    ring.push(now, value)
+                    samples += 1
+                    if ring.pending >= CHUNK:
+                        self._emit(sensor, ring)
+
+                if lines >= self.batch_lines:
+                    self._count(lines, samples)
+                    lines = samples = 0
+                if self.rate > 0:
+                    # Replay pacing: wait for this line's slot
+                    ahead = total / self.rate - (time.perf_counter() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except OSError as exc:
+            # EIO: the other end of a pty hung up / the device was unplugged
+            if exc.errno != errno.EIO:
+                print(f"{self.device}: read error: {exc}", file=sys.stderr)
+        finally:
+            self._count(lines, samples)
+            for sensor, ring in self.rings.items():
+                while ring.pending:
+                    self._emit(sensor, ring)
+            self.metrics.add(overwritten=sum(r.overwritten for r in self.rings.values()))
+            if self.features is not None:
+                self.features.save(self.features_path)
+            close = getattr(self.source, "close", None)
+            if close:
+                close()
+
+    def _count(self, lines, samples):
+        ignored, self.parser.ignored = self.parser.ignored, 0
+        self.metrics.add(lines=lines, samples=samples, ignored=ignored)
+
+
+# ── Main ───────────────────────────────────────────────────────────────────────
+def parse_source(spec):
+    """'device_id=path' or 'path' → (device_id, path)."""
+    device, sep, path = spec.partition("=")
+    if not sep:
+        path = spec
+        device = os.path.splitext(os.path.basename(spec))[0] or "device"
+    return check_name("device id", device), path
+
+
+def run(args):
+    store = SegmentStore(args.store)
+    metrics = Metrics()
+    stop = threading.Event()
+    writer = BatchWriter(
+        store, metrics, max_pending=args.max_pending, max_batch=args.max_batch,
+        compact_every=args.compact_every,
+        retention_seconds=args.retention_days * 86400 if args.retention_days else None,
+        pyramid=None if args.no_pyramid else SummaryPyramid(args.store),
+    )
+    writer.start()
+
+    readers = []
+    for spec in args.sources:
+        device, path = parse_source(spec)
+        source = open_source(path, baud=args.baud, replay=args.replay)
+        features_path = os.path.join(args.features_dir, f"{device}.json") if args.features_dir else None
+        readers.append(DeviceReader(device, source, writer, metrics, stop, rate=args.rate,
+                                    features_path=features_path, score_every=args.score_every))
+        print(f"Reading {path} as '{device}'")
+    for reader in readers:
+        reader.start()
+
+    try:
+        next_report = time.perf_counter() + args.report
+        while True:
+            alive = [r for r in readers if r.is_alive()]
+            if not alive:
+                break
+            alive[0].join(timeout=max(next_report - time.perf_counter(), 0.05)
+                          if args.report > 0 else None)
+            if args.report > 0 and time.perf_counter() >= next_report:
+                print(metrics.report(writer.queue.qsize()), flush=True)
+                next_report += args.report
+    except KeyboardInterrupt:
+        print("Stopping — flushing buffered samples")
+        stop.set()
+        for r in readers:
+            r.join(timeout=2.0)
+
+    writer.close()
+    summary = metrics.summary()
+    print(f"Ingested {summary['lines']:,} lines ({summary['lines_per_second']:,.0f} lines/s), "
+          f"{summary['samples_written']:,} samples in {summary['write_batches']:,} writes "
+          f"→ {args.store}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest hardware serial streams into the local sensor store.")
+    parser.add_argument("sources", nargs="+", help="device path or log file, optionally device_id=path")
+    parser.add_argument("--store", default=os.path.join(ML_MODEL, "data", "sensors"))
+    parser.add_argument("--baud", type=int, default=BAUD_RATE)
+    parser.add_argument("--replay", action="store_true", help="sources are recorded logs, not devices")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="replay speed in lines/s per source (0 = as fast as possible)")
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="chunks queued for the writer before readers block")
+    parser.add_argument("--max-batch", type=int, default=64, help="chunks per store write")
+    parser.add_argument("--compact-every", type=float, default=None,
+                        help="seconds between store compactions (default: never)")
+    parser.add_argument("--retention-days", type=float, default=None,
+                        help="drop samples older than this when compacting")
+    parser.add_argument("--no-pyramid", action="store_true",
+                        help="do not keep min/max/mean/count summary pyramids")
+    parser.add_argument("--features-dir", default=None,
+                        help="keep streaming features per device, checkpointed here")
+    parser.add_argument("--score-every", type=float, default=None,
+                        help="seconds between model re-scores (needs --features-dir)")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between status lines")
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import joblib
+from typing import List, Optional
 import numpy as np
-import pandas as pd
 import sys
 import os
 
@@ -15,32 +14,57 @@ app = FastAPI(title="Medical AI Diagnostic API")
 sys.path.append(os.path.abspath("."))
 
 # =====================================================
-# IMPORT PREPROCESSING
+# IMPORT FEATURE KERNELS
 # =====================================================
 
-from utils.preprocessing import preprocess_heart
-from utils.preprocessing_diabetes import preprocess_diabetes
-from utils.preprocessing_stroke import preprocess_stroke
+from utils.features import (
+    RAW_COLUMNS,
+    META_COLUMNS,
+    as_raw,
+    heart_features,
+    diabetes_features,
+    stroke_features,
+    signal_features,
+    meta_features,
+    class_scores
+)
 
 # =====================================================
-# LOAD MODELS
+# MODELS (loaded lazily by the shared registry)
 # =====================================================
 
-heart_model = joblib.load("heart/heart_model.pkl")["model"]
-diabetes_model = joblib.load("diabetes/diabetes_model.pkl")["model"]
-stroke_model = joblib.load("stroke/stroke_model.pkl")["model"]
+from utils.model_registry import registry
+from utils.rules import API_RULES
+from utils.raw_signals import score_recordings
+from utils.micro_batch import MicroBatcher
+from utils.prediction_cache import cache_from_env
+from utils.segment_store import SegmentStore, check_name
+from utils.signal_quality import quality_stats
+from utils.summary_pyramid import SummaryPyramid
+from utils.change_detector import CHANNELS, GatedPipeline, VitalMonitor
 
-ecg_data = joblib.load("./ECG/ECG_model.pkl")
-eeg_data = joblib.load("./EEG/EEG_model.pkl")
-emg_data = joblib.load("./EMG/EMG_model.pkl")
+# =====================================================
+# SETTINGS
+# =====================================================
+
+# Concurrent /predict calls are coalesced for up to this many
+# milliseconds (or until this many are waiting) and scored together
+PREDICT_BATCH_WINDOW_MS = float(os.environ.get("PREDICT_BATCH_WINDOW_MS", "2"))
+PREDICT_MAX_BATCH_SIZE = int(os.environ.get("PREDICT_MAX_BATCH_SIZE", "64"))
 
-ecg_model = ecg_data["model"]
-eeg_model = eeg_data["model"]
-emg_model = emg_data["model"]
+# Repeated identical vitals are answered from cache (see
+# utils/prediction_cache.py for the PREDICTION_CACHE_* settings)
+SERVED_MODELS = ["heart", "diabetes", "stroke", "ECG", "EEG", "EMG", "meta"]
+cache = cache_from_env(lambda: registry.fingerprint(SERVED_MODELS))
 
-meta_data = joblib.load("./meta/meta_model.pkl")
-meta_model = meta_data["model"]
-label_encoder = meta_data["label_encoder"]
+# Sampling rates for /predict-raw. Without RAW_EEG_FS the EEG samples
+# are read as the backend's focus index x 100 (see utils/raw_signals.py)
+RAW_ECG_FS = float(os.environ.get("RAW_ECG_FS", "100"))
+RAW_EEG_FS = float(os.environ["RAW_EEG_FS"]) if os.environ.get("RAW_EEG_FS") else None
+
+# Sensor streams written by ingest/serial_ingest.py
+sensor_store = SegmentStore(os.environ.get("SENSOR_STORE", "data/sensors"))
+history = SummaryPyramid(sensor_store.root)
 
 # =====================================================
 # DISEASE MAP
@@ -71,6 +95,57 @@ class PatientInput(BaseModel):
     Steps: float
 
 
+class PatientColumns(BaseModel):
+    BP: List[float]
+    HeartRate: List[float]
+    Glucose: List[float]
+    SpO2: List[float]
+    Sleep: List[float]
+    Steps: List[float]
+
+
+class PatientBatchInput(BaseModel):
+    # Either a list of patients or the same data as columnar arrays
+    patients: Optional[List[PatientInput]] = None
+    columns: Optional[PatientColumns] = None
+
+
+class RawSignalInput(BaseModel):
+    # Sample arrays as Hardware_Backend stores them (rawData.*)
+    heart_rate: List[float] = []
+    ecg: List[float] = []
+    eeg: List[float] = []
+    emg: List[float] = []
+    sleep: Optional[float] = None
+    steps: Optional[float] = None
+
+
+class RawSignalBatchInput(BaseModel):
+    recordings: List[RawSignalInput]
+
+
+class VitalsReading(BaseModel):
+    # One user's vitals for a monitor tick; missing vitals stay None
+    user_id: str
+    BP: Optional[float] = None
+    HeartRate: Optional[float] = None
+    Glucose: Optional[float] = None
+    SpO2: Optional[float] = None
+    Sleep: Optional[float] = None
+    Steps: Optional[float] = None
+
+
+class MonitorTickInput(BaseModel):
+    readings: List[VitalsReading]
+
+
+class HistoryInput(BaseModel):
+    # Vital-sign entries (e.g. the dashboard's blood_pressure / glucose
+    # readings): epoch seconds and values, same length
+    t: List[float]
+    v: List[float]
+
+
 # =====================================================
 # ROOT
 # =====================================================
@@ -80,156 +155,315 @@ def root():
     return {"status": "Medical AI API running"}
 
 
+@app.get("/models")
+def models():
+    return registry.stats()
+
+
+@app.get("/stats")
+def stats():
+    return {
+        "batching": batcher.stats(),
+        "cache": cache.stats() if cache is not None else None,
+        "signal_quality": quality_stats.stats(),
+        "monitor": monitor.stats()
+    }
+
+
 # =====================================================
-# PREDICT
+# PIPELINE (VECTORISED OVER ROWS)
 # =====================================================
 
-@app.post("/predict")
-def predict(data: PatientInput):
+INPUT_COLUMNS = RAW_COLUMNS
+
+
+def run_pipeline(raw):
+    """
+    Score every row of ``raw`` (anything utils.features.as_raw accepts,
+    columns = INPUT_COLUMNS). Each model is called once for the whole
+    batch and the priority rules / confidence fallback are evaluated as
+    array operations, so a one-row batch gives exactly the old
+    per-patient result.
+    """
+
+    raw = as_raw(raw)
+    if len(raw) == 0:
+        return []
+
+    # Compiled models take plain arrays. This service has always fed
+    # unscaled features to the stroke / signal models, so their scalers
+    # are left out.
+    heart_model = registry.compiled("heart")
+    diabetes_model = registry.compiled("diabetes")
+    stroke_model = registry.compiled("stroke", with_scaler=False)
+
+    ecg_model = registry.compiled("ECG", with_scaler=False)
+    eeg_model = registry.compiled("EEG", with_scaler=False)
+    emg_model = registry.compiled("EMG", with_scaler=False)
 
-    patient_input = data.dict()
-    input_df = pd.DataFrame([patient_input])
+    meta_model = registry.compiled("meta")
+    label_encoder = registry.get("meta")["label_encoder"]
 
     # =================================================
     # APPLY TRAINING PREPROCESSING
     # =================================================
 
-    heart_input = preprocess_heart(input_df.copy())
-    diabetes_input = preprocess_diabetes(input_df.copy())
-    stroke_input = preprocess_stroke(input_df.copy())
-
-    heart_prob = heart_model.predict_proba(heart_input)[0][1]
-    diabetes_prob = diabetes_model.predict_proba(diabetes_input)[0][1]
-    stroke_prob = stroke_model.predict_proba(stroke_input)[0][1]
+    heart_prob = heart_model.predict_proba(heart_features(raw))[:, 1]
+    diabetes_prob = diabetes_model.predict_proba(diabetes_features(raw))[:, 1]
+    stroke_prob = stroke_model.predict_proba(stroke_features(raw))[:, 1]
 
     # =================================================
     # SIGNAL FEATURES (FIXED SHAPES)
     # =================================================
 
-    heart_rate = patient_input["HeartRate"]
-    sleep_hours = patient_input["Sleep"]
-    steps = patient_input["Steps"]
-
-    hrv_sdnn = 100 - heart_rate * 0.5
-    stress_ratio = patient_input["BP"] / max(heart_rate, 1)
-    emg_rms = steps / 10000
-
-    # ECG expects 2 features
-    ecg_features = np.array([[heart_rate, hrv_sdnn]])
+    # ECG / EEG / EMG each expect 2 features
+    ecg_features, eeg_features, emg_features = signal_features(raw, clipped=False)
 
-    # EEG expects 2 features
-    eeg_features = np.array([[stress_ratio, sleep_hours]])
-
-    # EMG expects 2 features
-    emg_features = np.array([[emg_rms, steps]])
-
-    ecg_prob = ecg_model.predict_proba(ecg_features)[0][1]
-    eeg_prob = eeg_model.predict_proba(eeg_features)[0][1]
-    emg_prob = emg_model.predict_proba(emg_features)[0][1]
+    ecg_prob = ecg_model.predict_proba(ecg_features)[:, 1]
+    eeg_prob = eeg_model.predict_proba(eeg_features)[:, 1]
+    emg_prob = emg_model.predict_proba(emg_features)[:, 1]
 
     # =================================================
     # FUSION
     # =================================================
 
-    static_risk = (
-        0.30 * heart_prob +
-        0.25 * diabetes_prob +
-        0.20 * stroke_prob +
-        0.15 * ecg_prob +
-        0.10 * eeg_prob
+    meta_input = meta_features(
+        np.column_stack([
+            heart_prob,
+            diabetes_prob,
+            stroke_prob,
+            ecg_prob,
+            eeg_prob,
+            emg_prob
+        ]),
+        weights="api"
     )
-
-    cardio_combined = (heart_prob + ecg_prob) / 2
-    neuro_combined = (stroke_prob + eeg_prob + emg_prob) / 3
-    metabolic_combined = (diabetes_prob + static_risk) / 2
-    fatigue_index = (emg_prob + eeg_prob) / 2
-
-    ncm_index = (
-        0.25 * heart_prob +
-        0.20 * diabetes_prob +
-        0.20 * stroke_prob +
-        0.15 * ecg_prob +
-        0.10 * eeg_prob +
-        0.10 * static_risk
-    ) * 100
-
-    meta_input = np.array([[
-        heart_prob,
-        diabetes_prob,
-        stroke_prob,
-        ecg_prob,
-        eeg_prob,
-        emg_prob,
-        static_risk,
-        ncm_index,
-        cardio_combined,
-        neuro_combined,
-        metabolic_combined,
-        fatigue_index
-    ]])
-
-    probabilities = meta_model.predict_proba(meta_input)[0]
-    predicted_encoded = meta_model.predict(meta_input)[0]
-    predicted_original = label_encoder.inverse_transform([predicted_encoded])[0]
-    meta_confidence = float(np.max(probabilities))
+    probabilities = meta_model.predict_proba(meta_input)
+    predicted_encoded = meta_model.predict(meta_input)
+    predicted_original = label_encoder.inverse_transform(predicted_encoded)
+    meta_confidence = np.max(probabilities, axis=1)
 
     # =================================================
-    # PRIORITY RULES
+    # PRIORITY RULES (utils/rules.py, first match wins)
     # =================================================
 
-    final_class = predicted_original
-
-    if stroke_prob > 0.90 and patient_input["BP"] > 170:
-        final_class = 1
-
-    elif diabetes_prob > 0.90 and patient_input["Glucose"] > 200:
-        final_class = 2
-
-    elif heart_prob > 0.85 and ecg_prob > 0.85:
-        final_class = 0
-
-    elif ecg_prob > 0.92 and heart_prob < 0.70:
-        final_class = 4
-
-    elif eeg_prob > 0.90 and emg_prob > 0.75:
-        final_class = 7
-
-    elif static_risk < 0.20 and all([
-        heart_prob < 0.40,
-        diabetes_prob < 0.40,
-        stroke_prob < 0.40,
-        ecg_prob < 0.40,
-        eeg_prob < 0.40,
-        emg_prob < 0.40
-    ]):
-        final_class = 8
-
-    # Confidence fallback
-    if meta_confidence < 0.60:
-        system_scores = {
-            0: cardio_combined,
-            1: stroke_prob,
-            2: diabetes_prob,
-            3: static_risk,
-            4: ecg_prob,
-            5: metabolic_combined,
-            6: neuro_combined,
-            7: (eeg_prob + emg_prob) / 2,
-            8: 1 - static_risk
+    context = dict(zip(RAW_COLUMNS, raw.T))
+    context.update(zip(META_COLUMNS, meta_input.T))
+    final_class, _ = API_RULES.evaluate(context, default=predicted_original)
+
+    # Confidence fallback — column index == disease class
+    final_class = np.where(
+        meta_confidence < 0.60,
+        np.argmax(class_scores(meta_input), axis=1),
+        final_class
+    )
+
+    return [
+        {
+            "final_diagnosis": disease_names.get(int(final_class[i]), "Unknown"),
+            "confidence": round(float(meta_confidence[i]), 4),
+            "risk_breakdown": {
+                "heart": round(float(heart_prob[i]), 4),
+                "diabetes": round(float(diabetes_prob[i]), 4),
+                "stroke": round(float(stroke_prob[i]), 4),
+                "ecg": round(float(ecg_prob[i]), 4),
+                "eeg": round(float(eeg_prob[i]), 4),
+                "emg": round(float(emg_prob[i]), 4)
+            }
         }
-        final_class = max(system_scores, key=system_scores.get)
+        for i in range(len(raw))
+    ]
+
+
+# =====================================================
+# PREDICT
+# =====================================================
+
+batcher = MicroBatcher(
+    run_pipeline,
+    max_batch_size=PREDICT_MAX_BATCH_SIZE,
+    window_ms=PREDICT_BATCH_WINDOW_MS
+)
+
+
+@app.post("/predict")
+async def predict(data: PatientInput):
+
+    row = data.dict()
+
+    # Scored together with any concurrent /predict calls
+    if cache is None:
+        return await batcher.submit(row)
+    return await cache.aget_or_compute(row, lambda: batcher.submit(row))
+
+
+# =====================================================
+# PREDICT (BATCH)
+# =====================================================
+
+@app.post("/predict/batch")
+def predict_batch(batch: PatientBatchInput):
+
+    if batch.patients is not None:
+        raw = as_raw([p.dict() for p in batch.patients])
+    elif batch.columns is not None:
+        columns = batch.columns.dict()
+        if len({len(v) for v in columns.values()}) > 1:
+            raise HTTPException(
+                status_code=422,
+                detail="All columns must have the same length"
+            )
+        raw = as_raw(columns)
+    else:
+        raise HTTPException(
+            status_code=422,
+            detail="Provide either 'patients' or 'columns'"
+        )
+
+    results = run_pipeline(raw)
+
+    return {
+        "count": len(results),
+        "results": results
+    }
+
+
 
-    predicted_disease = disease_names.get(final_class, "Unknown")
+# =====================================================
+# MONITOR (CHANGE-POINT GATED PIPELINE)
+# =====================================================
+
+monitor = GatedPipeline(VitalMonitor(), run_pipeline)
+
+
+@app.post("/monitor/tick")
+def monitor_tick(tick: MonitorTickInput):
+
+    # Baselines update for every reading; the pipeline runs only for
+    # users with a change point (or not scored yet)
+    user_ids = [r.user_id for r in tick.readings]
+    if len(set(user_ids)) != len(user_ids):
+        raise HTTPException(status_code=422, detail="One reading per user per tick")
+
+    rows, results, changed, incomplete = monitor.tick(user_ids, [r.dict() for r in tick.readings])
+
+    return {
+        "count": len(user_ids),
+        "scored": len(rows),
+        # Due for scoring, but a vital has neither a reading nor a baseline yet
+        "insufficient_baseline": [user_ids[i] for i in incomplete],
+        "alerts": [
+            {
+                "user_id": user_ids[i],
+                "changed": [c for c, hit in zip(CHANNELS, changed[i]) if hit],
+                "result": result
+            }
+            for i, result in zip(rows, results)
+        ]
+    }
+
+
+# =====================================================
+# PREDICT FROM RAW SIGNALS
+# =====================================================
+
+@app.post("/predict-raw")
+def predict_raw(data: RawSignalInput):
+
+    return score_recordings(
+        [data.dict()], ecg_fs=RAW_ECG_FS, eeg_fs=RAW_EEG_FS
+    )[0]
+
+
+@app.post("/predict-raw/batch")
+def predict_raw_batch(batch: RawSignalBatchInput):
+
+    results = score_recordings(
+        [r.dict() for r in batch.recordings],
+        ecg_fs=RAW_ECG_FS,
+        eeg_fs=RAW_EEG_FS
+    )
+
+    return {
+        "count": len(results),
+        "results": results
+    }
+
+
+def _store_names(user_id, sensor=None):
+
+    # Path parameters become folders of the sensor store: one plain component each
+    try:
+        check_name("user_id", user_id)
+        if sensor is not None:
+            check_name("sensor", sensor)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@app.get("/predict-raw/stored/{user_id}")
+def predict_raw_stored(user_id: str, seconds: float = 300, end: Optional[float] = None):
+
+    _store_names(user_id)
+
+    # Score the last ``seconds`` of a user's stored streams (up to ``end``,
+    # epoch seconds; default the newest sample)
+    if end is None:
+        end = sensor_store.last_timestamp(user_id)
+        if end is None:
+            raise HTTPException(status_code=404, detail=f"No stored signals for {user_id}")
+        end = np.nextafter(end, np.inf)
+
+    window = sensor_store.window(
+        user_id, end - seconds, end,
+        sensors=["heart_rate", "ecg", "eeg", "emg"]
+    )
+
+    result = score_recordings(
+        [window],
+        ecg_fs=RAW_ECG_FS,
+        eeg_fs=RAW_EEG_FS
+    )[0]
+    result["window"] = {
+        "start": end - seconds,
+        "end": float(end),
+        "samples": {k: int(len(v)) for k, v in window.items()}
+    }
+    return result
+
+
+# =====================================================
+# HISTORY (SUMMARY PYRAMIDS)
+# =====================================================
 
+@app.post("/history/{user_id}/{sensor}")
+def history_append(user_id: str, sensor: str, data: HistoryInput):
+
+    _store_names(user_id, sensor)
+    if len(data.t) != len(data.v):
+        raise HTTPException(status_code=422, detail="t and v must have the same length")
+    t = np.asarray(data.t, dtype=np.float64)
+    v = np.asarray(data.v, dtype=np.float64)
+    written = sensor_store.append(user_id, sensor, t, v)
+    history.update(user_id, sensor, t, v)
+    return {"written": written}
+
+
+@app.get("/history/{user_id}/{sensor}")
+def history_query(user_id: str, sensor: str, start: Optional[float] = None,
+                  end: Optional[float] = None, points: int = 500):
+
+    _store_names(user_id, sensor)
+    # Range statistics and a chart-sized series from the pyramid,
+    # never the raw samples
+    summary = history.summary(user_id, sensor, start, end)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"No {sensor} history for {user_id} in range")
+    series = history.series(user_id, sensor, start, end, points=max(points, 1))
     return {
-        "final_diagnosis": predicted_disease,
-        "confidence": round(meta_confidence, 4),
-        "risk_breakdown": {
-            "heart": round(float(heart_prob), 4),
-            "diabetes": round(float(diabetes_prob), 4),
-            "stroke": round(float(stroke_prob), 4),
-            "ecg": round(float(ecg_prob), 4),
-            "eeg": round(float(eeg_prob), 4),
-            "emg": round(float(emg_prob), 4)
+        "summary": summary,
+        "series": {
+            "width": series["width"],
+            **{k: series[k].tolist() for k in ("t", "count", "mean", "min", "max")}
         }
-    }
\ No newline at end of file
+    }
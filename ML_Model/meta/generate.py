@@ -7,12 +7,20 @@ conditions equally, not just "Healthy".
 
 Target distribution (approximate):
   Each of 9 classes gets 8-14% of samples
+
+Chunked and parallel via utils/synthetic.py; every chunk has the
+SAMPLES_PER_CLASS mix before the label flips:
+    python generate.py --rows 10000000 --workers 4 --output meta_10m.csv
 """
 import numpy as np
 import pandas as pd
-from scipy.special import softmax
+import os
+import sys
 
-np.random.seed(42)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.features import META_COLUMNS, meta_features
+from utils.synthetic import class_labels, main
+from utils.dataset_io import read_dataset
 
 CLASS_NAMES = {
     0: "CHD",
@@ -81,88 +89,53 @@ SAMPLES_PER_CLASS = {
     8: 6000,   # Healthy (slightly more — most common in real world)
 }
 
-def sample_clipped(mu, sigma, size):
-    """Sample from normal, clipped to [0.01, 0.99]"""
-    return np.clip(np.random.normal(mu, sigma, size), 0.01, 0.99)
-
-
-# ── Generate per-class rows ────────────────────────────────────────────────────
-all_rows = []
-
-for cls, n in SAMPLES_PER_CLASS.items():
-    p = PROFILES[cls]
-
-    heart_prob    = sample_clipped(*p["heart"],    n)
-    diabetes_prob = sample_clipped(*p["diabetes"], n)
-    stroke_prob   = sample_clipped(*p["stroke"],   n)
-    ecg_prob      = sample_clipped(*p["ecg"],      n)
-    eeg_prob      = sample_clipped(*p["eeg"],      n)
-    emg_prob      = sample_clipped(*p["emg"],      n)
-
-    # ── Engineered features ──────────────────────────────────────────────────
-    static_risk = (
-        0.25 * heart_prob +
-        0.25 * diabetes_prob +
-        0.20 * stroke_prob +
-        0.15 * ecg_prob +
-        0.15 * eeg_prob
-    )
-    cardio_combined    = (heart_prob + ecg_prob) / 2
-    neuro_combined     = (stroke_prob + eeg_prob + emg_prob) / 3
-    metabolic_combined = (diabetes_prob + static_risk) / 2
-    fatigue_index      = (emg_prob + eeg_prob) / 2
-    ncm_index = (
-        0.22 * heart_prob +
-        0.22 * diabetes_prob +
-        0.20 * stroke_prob +
-        0.14 * ecg_prob +
-        0.12 * eeg_prob +
-        0.10 * static_risk
-    ) * 100
+SOURCES = ["heart", "diabetes", "stroke", "ecg", "eeg", "emg"]
+MU    = np.array([[PROFILES[c][k][0] for k in SOURCES] for c in sorted(PROFILES)])
+SIGMA = np.array([[PROFILES[c][k][1] for k in SOURCES] for c in sorted(PROFILES)])
+FRACTIONS = [SAMPLES_PER_CLASS[c] for c in sorted(SAMPLES_PER_CLASS)]
+
+
+def make_chunk(rng, n):
+    labels = class_labels(rng, n, FRACTIONS)
+
+    # Per-row profile draw, clipped to [0.01, 0.99]
+    probs = np.clip(rng.normal(MU[labels], SIGMA[labels]), 0.01, 0.99)
+
+    # ── Engineered features (utils/features.py) ─────────────────────────────
+    meta = meta_features(probs)
 
     # ── Add small within-class overlap noise (5% label flip) ────────────────
-    labels = np.full(n, cls)
-    flip_mask = np.random.rand(n) < 0.05
-    labels[flip_mask] = np.random.randint(0, 9, flip_mask.sum())
-
-    chunk = pd.DataFrame({
-        "heart_prob":        heart_prob,
-        "diabetes_prob":     diabetes_prob,
-        "stroke_prob":       stroke_prob,
-        "ecg_prob":          ecg_prob,
-        "eeg_prob":          eeg_prob,
-        "emg_prob":          emg_prob,
-        "static_risk":       static_risk,
-        "ncm_index":         ncm_index,
-        "cardio_combined":   cardio_combined,
-        "neuro_combined":    neuro_combined,
-        "metabolic_combined":metabolic_combined,
-        "fatigue_index":     fatigue_index,
-        "Disease_Class":     labels.astype(int)
-    })
-    all_rows.append(chunk)
-
-# ── Combine and shuffle ────────────────────────────────────────────────────────
-df = pd.concat(all_rows, ignore_index=True)
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-df.to_csv("meta_dataset_realistic_balanced.csv", index=False)
-
-# ── Report ─────────────────────────────────────────────────────────────────────
-print("=" * 55)
-print("  Meta Dataset Generated")
-print("=" * 55)
-print(f"  Total samples : {len(df):,}")
-print(f"  Features      : {df.shape[1] - 1}")
-print()
-print("  Class Distribution:")
-dist = df["Disease_Class"].value_counts(normalize=True).sort_index()
-for cls_id, pct in dist.items():
-    count = int(pct * len(df))
-    bar = "█" * int(pct * 50)
-    print(f"  {cls_id} {CLASS_NAMES[cls_id]:20s}: {pct:.3f}  {bar}")
-print()
-print("  Feature Ranges:")
-print(df.describe().loc[["min","mean","max"]].round(3).to_string())
-print()
-print("✅ Saved → meta_dataset_realistic_balanced.csv")
\ No newline at end of file
+    flip_mask = rng.random(n) < 0.05
+    labels[flip_mask] = rng.integers(0, 9, flip_mask.sum())
+
+    chunk = pd.DataFrame(meta, columns=META_COLUMNS)
+    chunk["Disease_Class"] = labels.astype(int)
+    return chunk
+
+
+def report(path):
+    df = read_dataset(path)
+    print("=" * 55)
+    print("  Meta Dataset Generated")
+    print("=" * 55)
+    print(f"  Total samples : {len(df):,}")
+    print(f"  Features      : {df.shape[1] - 1}")
+    print()
+    print("  Class Distribution:")
+    dist = df["Disease_Class"].value_counts(normalize=True).sort_index()
+    for cls_id, pct in dist.items():
+        bar = "█" * int(pct * 50)
+        print(f"  {cls_id} {CLASS_NAMES[cls_id]:20s}: {pct:.3f}  {bar}")
+    print()
+    print("  Feature Ranges:")
+    print(df.describe().loc[["min","mean","max"]].round(3).to_string())
+    print()
+    print(f"✅ Saved → {path}")
+
+
+if __name__ == "__main__":
+    args = main(make_chunk, sum(FRACTIONS), "meta_dataset_realistic_balanced.csv",
+                "Balanced meta-model dataset")
+    # Reading the file back for the report only makes sense at the default scale
+    if args.rows <= 1_000_000:
+        report(args.output)
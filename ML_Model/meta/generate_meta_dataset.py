@@ -1,7 +1,12 @@
 import numpy as np
 import pandas as pd
+import os
+import sys
 from scipy.special import softmax
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.features import META_COLUMNS, meta_features, class_scores
+
 np.random.seed(42)
 
 n = 40000
@@ -23,61 +28,20 @@ eeg_prob = np.random.beta(2.3, 3.2, n)
 emg_prob = np.random.beta(2.4, 3.0, n)
 
 # ==========================================
-# Static Risk
-# ==========================================
-
-static_risk = (
-    0.25 * heart_prob +
-    0.25 * diabetes_prob +
-    0.20 * stroke_prob +
-    0.15 * ecg_prob +
-    0.15 * eeg_prob
-)
-
-# ==========================================
-# Engineered Features
+# Engineered Features (utils/features.py)
 # ==========================================
 
-cardio_combined = (heart_prob + ecg_prob) / 2
-neuro_combined = (stroke_prob + eeg_prob + emg_prob) / 3
-metabolic_combined = (diabetes_prob + static_risk) / 2
-fatigue_index = (emg_prob + eeg_prob) / 2
-
-ncm_index = (
-    0.22 * heart_prob +
-    0.22 * diabetes_prob +
-    0.20 * stroke_prob +
-    0.14 * ecg_prob +
-    0.12 * eeg_prob +
-    0.10 * static_risk
-) * 100
+meta = meta_features(np.column_stack([
+    heart_prob, diabetes_prob, stroke_prob,
+    ecg_prob, eeg_prob, emg_prob
+]))
 
 # ==========================================
 # BALANCED NORMALIZED SCORING
 # (No artificial multiplier explosion)
 # ==========================================
 
-score_chd = cardio_combined
-score_stroke = stroke_prob
-score_diabetes = diabetes_prob
-score_hypertension = static_risk
-score_arrhythmia = ecg_prob
-score_metabolic = metabolic_combined
-score_neuro = neuro_combined
-score_epilepsy = (eeg_prob + emg_prob) / 2
-score_healthy = 1 - static_risk
-
-scores = np.vstack([
-    score_chd,          # 0
-    score_stroke,       # 1
-    score_diabetes,     # 2
-    score_hypertension, # 3
-    score_arrhythmia,   # 4
-    score_metabolic,    # 5
-    score_neuro,        # 6
-    score_epilepsy,     # 7
-    score_healthy       # 8
-]).T
+scores = class_scores(meta)
 
 # ==========================================
 # STRUCTURED DOMINANCE WITH CONTROLLED OVERLAP
@@ -114,21 +78,8 @@ for row in scores:
 # Build Dataset
 # ==========================================
 
-df = pd.DataFrame({
-    "heart_prob": heart_prob,
-    "diabetes_prob": diabetes_prob,
-    "stroke_prob": stroke_prob,
-    "ecg_prob": ecg_prob,
-    "eeg_prob": eeg_prob,
-    "emg_prob": emg_prob,
-    "static_risk": static_risk,
-    "ncm_index": ncm_index,
-    "cardio_combined": cardio_combined,
-    "neuro_combined": neuro_combined,
-    "metabolic_combined": metabolic_combined,
-    "fatigue_index": fatigue_index,
-    "Disease_Class": disease
-})
+df = pd.DataFrame(meta, columns=META_COLUMNS)
+df["Disease_Class"] = disease
 
 df.to_csv("meta_dataset_realistic_balanced.csv", index=False)
 
@@ -8,7 +8,6 @@ Fixes applied vs v1:
   4. EEG sleep feature correctly passed
 """
 
-import joblib
 import numpy as np
 import pandas as pd
 import sys, os
@@ -17,9 +16,13 @@ BASE     = os.path.dirname(os.path.abspath(__file__))
 ML_MODEL = os.path.dirname(BASE)
 sys.path.append(ML_MODEL)
 
-from utils.preprocessing import preprocess_heart
-from utils.preprocessing_diabetes import preprocess_diabetes
-from utils.preprocessing_stroke import preprocess_stroke
+from utils.features import (
+    RAW_COLUMNS, STROKE_COLUMNS, META_COLUMNS, as_raw,
+    heart_features, diabetes_features, stroke_features,
+    signal_features, meta_features
+)
+from utils.rules import PIPELINE_RULES
+from utils.model_registry import registry
 
 DISEASE_NAMES = {
     0: "Coronary Heart Disease",
@@ -34,23 +37,33 @@ DISEASE_NAMES = {
 }
 
 # ── Load all models ────────────────────────────────────────────────────────────
-def load_models():
-    def _load_clinical(folder, filename):
-        data = joblib.load(os.path.join(ML_MODEL, folder, filename))
+def load_models(compiled: bool = False):
+    """
+    compiled=True swaps every model for a utils.compiled_model.CompiledModel
+    (same probabilities, far less per-call overhead). ECG / EEG / EMG use
+    their exact lookup table instead when one has been built
+    (utils/lookup_table.py). Scalers are folded into the compiled models,
+    so their "*_scaler" entries become None.
+
+    Artifacts come from the process-wide utils.model_registry, so calling
+    this repeatedly does not reload anything.
+    """
+    def _load_clinical(name):
+        data = registry.get(name)
         if isinstance(data, dict):
             return data.get("model"), data.get("scaler")
         return data, None  # old format — no scaler
 
-    heart_model,    heart_scaler    = _load_clinical("heart",    "heart_model.pkl")
-    diabetes_model, diabetes_scaler = _load_clinical("diabetes", "diabetes_model.pkl")
-    stroke_model,   stroke_scaler   = _load_clinical("stroke",   "stroke_model.pkl")
+    heart_model,    heart_scaler    = _load_clinical("heart")
+    diabetes_model, diabetes_scaler = _load_clinical("diabetes")
+    stroke_model,   stroke_scaler   = _load_clinical("stroke")
 
-    ecg_data = joblib.load(os.path.join(ML_MODEL, "ECG", "ECG_model.pkl"))
-    eeg_data = joblib.load(os.path.join(ML_MODEL, "EEG", "EEG_model.pkl"))
-    emg_data = joblib.load(os.path.join(ML_MODEL, "EMG", "EMG_model.pkl"))
-    meta_data = joblib.load(os.path.join(BASE, "meta_model.pkl"))
+    ecg_data  = registry.get("ECG")
+    eeg_data  = registry.get("EEG")
+    emg_data  = registry.get("EMG")
+    meta_data = registry.get("meta")
 
-    return {
+    models = {
         "heart_model":    heart_model,    "heart_scaler":    heart_scaler,
         "diabetes_model": diabetes_model, "diabetes_scaler": diabetes_scaler,
         "stroke_model":   stroke_model,   "stroke_scaler":   stroke_scaler,
@@ -61,188 +74,141 @@ def load_models():
         "label_encoder":  meta_data.get("label_encoder"),
     }
 
+    if compiled:
+        for name in ("heart", "diabetes", "stroke", "ECG", "EEG", "EMG"):
+            key = name.lower()
+            table = registry.lookup(name) if name in ("ECG", "EEG", "EMG") else None
+            models[f"{key}_model"]  = table if table is not None else registry.compiled(name)
+            models[f"{key}_scaler"] = None
+        models["meta_model"] = registry.compiled("meta")
 
-# ── Core prediction ────────────────────────────────────────────────────────────
-def predict(patient_input: dict, models: dict, verbose: bool = True) -> dict:
-    df = pd.DataFrame([patient_input])
+    return models
+
+
+def _scaled(scaler, X):
+    return scaler.transform(X) if scaler is not None else X
 
-    bp     = patient_input["BP"]
-    hr     = patient_input["HeartRate"]
-    glucose= patient_input["Glucose"]
-    spo2   = patient_input["SpO2"]
-    sleep  = patient_input["Sleep"]
-    steps  = patient_input["Steps"]
+
+# ── Core prediction ────────────────────────────────────────────────────────────
+def predict_batch(raw, models: dict) -> dict:
+    """
+    Score every row of ``raw`` (anything utils.features.as_raw accepts).
+    Returns a dict of per-row arrays: final_class, meta_class,
+    meta_confidence, rule_override, rule_fired (utils.rules index), the
+    base probabilities and the engineered meta features.
+    """
+    raw = as_raw(raw)
 
     # ── Step 1: Clinical preprocessing ────────────────────────────────────────
-    heart_input    = preprocess_heart(df.copy())
-    diabetes_input = preprocess_diabetes(df.copy())
-    stroke_input   = preprocess_stroke(df.copy())
+    heart_input    = heart_features(raw)
+    diabetes_input = diabetes_features(raw)
+    stroke_input   = stroke_features(raw)
 
     # ── Step 2: Clinical probabilities ────────────────────────────────────────
     # Heart / Diabetes — apply scaler if new format model
-    if models["heart_scaler"] is not None:
-        heart_input_s = models["heart_scaler"].transform(heart_input)
-    else:
-        heart_input_s = heart_input
+    heart_input_s    = _scaled(models["heart_scaler"],    heart_input)
+    diabetes_input_s = _scaled(models["diabetes_scaler"], diabetes_input)
 
-    if models["diabetes_scaler"] is not None:
-        diabetes_input_s = models["diabetes_scaler"].transform(diabetes_input)
-    else:
-        diabetes_input_s = diabetes_input
-
-    # Stroke — always apply scaler (retrained model always has one)
-    # Pass as DataFrame to match how scaler was fitted (avoids feature name warning)
+    # Stroke — the sklearn scaler and model were fitted on DataFrames, so the
+    # uncompiled path passes named columns (avoids feature name warning)
     if models["stroke_scaler"] is not None:
         stroke_input_s = pd.DataFrame(
-            models["stroke_scaler"].transform(stroke_input),
-            columns=stroke_input.columns
+            models["stroke_scaler"].transform(
+                pd.DataFrame(stroke_input, columns=STROKE_COLUMNS)),
+            columns=STROKE_COLUMNS
         )
     else:
         stroke_input_s = stroke_input
 
-    heart_prob    = float(models["heart_model"].predict_proba(heart_input_s)[0][1])
-    diabetes_prob = float(models["diabetes_model"].predict_proba(diabetes_input_s)[0][1])
-    stroke_prob   = float(models["stroke_model"].predict_proba(stroke_input_s)[0][1])
+    heart_prob    = models["heart_model"].predict_proba(heart_input_s)[:, 1]
+    diabetes_prob = models["diabetes_model"].predict_proba(diabetes_input_s)[:, 1]
+    stroke_prob   = models["stroke_model"].predict_proba(stroke_input_s)[:, 1]
 
     # ── Step 3: Signal features ────────────────────────────────────────────────
-    hrv_sdnn     = float(np.clip(100 - hr * 0.5, 5, 80))
-    stress_ratio = float(np.clip(bp / hr, 0.5, 5.0))
-
-    # EMG: pipeline computes rms = steps/10000 (model retrained on same logic)
-    emg_rms      = float(np.clip(steps / 10000, 0.01, 1.5))
+    # hrv = 100 - hr/2, stress = bp/hr, EMG rms = steps/10000 (model retrained
+    # on same logic), each clipped to the training range
+    ecg_raw, eeg_raw, emg_raw = signal_features(raw)
 
     # ── Step 4: Signal predictions ─────────────────────────────────────────────
-    ecg_raw    = np.array([[hr,           hrv_sdnn]])
-    eeg_raw    = np.array([[stress_ratio, sleep]])
-    emg_raw    = np.array([[emg_rms,      steps]])
-
-    ecg_prob  = float(models["ecg_model"].predict_proba(
-                    models["ecg_scaler"].transform(ecg_raw))[0][1])
+    ecg_prob  = models["ecg_model"].predict_proba(
+                    _scaled(models["ecg_scaler"], ecg_raw))[:, 1]
 
     eeg_proba = models["eeg_model"].predict_proba(
-                    models["eeg_scaler"].transform(eeg_raw))[0]
-    eeg_neuro_prob    = float(1 - eeg_proba[0])
-    eeg_epilepsy_prob = float(eeg_proba[2])
+                    _scaled(models["eeg_scaler"], eeg_raw))
+    eeg_neuro_prob    = 1 - eeg_proba[:, 0]
+    eeg_epilepsy_prob = eeg_proba[:, 2]
 
-    emg_prob  = float(models["emg_model"].predict_proba(
-                    models["emg_scaler"].transform(emg_raw))[0][1])
+    emg_prob  = models["emg_model"].predict_proba(
+                    _scaled(models["emg_scaler"], emg_raw))[:, 1]
 
     # ── Step 5: Engineered meta features ──────────────────────────────────────
-    static_risk = (
-        0.25 * heart_prob +
-        0.25 * diabetes_prob +
-        0.20 * stroke_prob +
-        0.15 * ecg_prob +
-        0.15 * eeg_neuro_prob
-    )
-    cardio_combined    = (heart_prob + ecg_prob) / 2
-    neuro_combined     = (stroke_prob + eeg_neuro_prob + emg_prob) / 3
-    metabolic_combined = (diabetes_prob + static_risk) / 2
-    fatigue_index      = (emg_prob + eeg_neuro_prob) / 2
-    ncm_index = (
-        0.22 * heart_prob +
-        0.22 * diabetes_prob +
-        0.20 * stroke_prob +
-        0.14 * ecg_prob +
-        0.12 * eeg_neuro_prob +
-        0.10 * static_risk
-    ) * 100
-
-    # ── Step 6: Meta model ─────────────────────────────────────────────────────
-    meta_input = np.array([[
+    meta_input = meta_features(np.column_stack([
         heart_prob, diabetes_prob, stroke_prob,
-        ecg_prob, eeg_neuro_prob, emg_prob,
-        static_risk, ncm_index,
-        cardio_combined, neuro_combined,
-        metabolic_combined, fatigue_index
-    ]])
+        ecg_prob, eeg_neuro_prob, emg_prob
+    ]))
 
-    meta_proba    = models["meta_model"].predict_proba(meta_input)[0]
-    meta_raw_pred = int(models["meta_model"].predict(meta_input)[0])
+    # ── Step 6: Meta model ─────────────────────────────────────────────────────
+    # predict() is argmax of predict_proba — reuse it instead of a second pass
+    meta_proba    = models["meta_model"].predict_proba(meta_input)
+    meta_raw_pred = models["meta_model"].classes_[np.argmax(meta_proba, axis=1)].astype(int)
 
     le = models.get("label_encoder")
     if le is not None:
         try:
-            meta_pred_class = int(le.inverse_transform([meta_raw_pred])[0])
+            meta_pred_class = le.inverse_transform(meta_raw_pred).astype(int)
         except Exception:
             meta_pred_class = meta_raw_pred
     else:
         meta_pred_class = meta_raw_pred
 
-    meta_confidence = float(np.max(meta_proba))
-
-    # ── Step 7: Rule engine ────────────────────────────────────────────────────
-    final_class = meta_pred_class
-
-    # LEVEL 1 — Life threatening
-    # Stroke requires BOTH high probability AND vascular indicators (not just glucose)
-    # High glucose alone = diabetes, not stroke
-    if stroke_prob > 0.85 and bp > 150 and spo2 < 97:
-        final_class = 1                                         # Stroke (low O2 + high BP)
-
-    elif stroke_prob > 0.90 and bp > 165:
-        final_class = 1                                         # Stroke (very high BP)
-
-    elif heart_prob > 0.88 and ecg_prob > 0.75:
-        final_class = 0                                         # CHD
-
-    # LEVEL 2 — Metabolic
-    # Diabetes wins if glucose is the dominant elevated feature
-    elif diabetes_prob > 0.85 and glucose > 180 and bp < 160:
-        final_class = 2                                         # Diabetes
-
-    elif metabolic_combined > 0.80 and glucose > 140:
-        final_class = 5                                         # Metabolic Syndrome
-
-    elif bp > 175 and stroke_prob > 0.60:
-        final_class = 3                                         # Hypertension
-
-    # LEVEL 3 — Signal dominant
-    elif ecg_prob > 0.92 and stroke_prob < 0.75 and heart_prob < 0.75:
-        final_class = 4                                         # Arrhythmia
-
-    elif eeg_epilepsy_prob > 0.85 and emg_prob > 0.65 and stroke_prob < 0.75:
-        final_class = 7                                         # Epilepsy
-
-    elif neuro_combined > 0.80 and stroke_prob < 0.75:
-        final_class = 6                                         # Neuro Disorder
+    meta_confidence = np.max(meta_proba, axis=1)
+
+    # ── Step 7: Rule engine (utils/rules.py) ──────────────────────────────────
+    context = dict(zip(RAW_COLUMNS, raw.T))
+    context.update(zip(META_COLUMNS, meta_input.T))
+    context["eeg_epilepsy_prob"] = eeg_epilepsy_prob
+
+    final_class, fired = PIPELINE_RULES.evaluate(context, default=meta_pred_class)
+
+    out = {
+        "final_class":       final_class,
+        "meta_class":        meta_pred_class,
+        "meta_confidence":   meta_confidence,
+        "rule_override":     final_class != meta_pred_class,
+        "rule_fired":        fired,
+        "heart_prob":        heart_prob,
+        "diabetes_prob":     diabetes_prob,
+        "stroke_prob":       stroke_prob,
+        "ecg_prob":          ecg_prob,
+        "eeg_neuro_prob":    eeg_neuro_prob,
+        "eeg_epilepsy_prob": eeg_epilepsy_prob,
+        "emg_prob":          emg_prob,
+    }
+    for j, name in enumerate(META_COLUMNS[6:], start=6):
+        out[name] = meta_input[:, j]
+    return out
 
-    # LEVEL 4 — Healthy
-    elif (
-        static_risk < 0.25 and
-        heart_prob < 0.35 and diabetes_prob < 0.35 and stroke_prob < 0.50 and
-        ecg_prob < 0.35 and eeg_neuro_prob < 0.35 and emg_prob < 0.35
-    ):
-        final_class = 8                                         # No Disease
 
-    # LEVEL 5 — Meta fallback
-    else:
-        final_class = meta_pred_class
+def predict(patient_input: dict, models: dict, verbose: bool = True) -> dict:
+    b = {k: v[0] for k, v in predict_batch([patient_input], models).items()}
 
-    final_disease  = DISEASE_NAMES.get(final_class, "Unknown")
-    rule_overrode  = (final_class != meta_pred_class)
+    final_class     = int(b["final_class"])
+    meta_pred_class = int(b["meta_class"])
 
     result = {
-        "final_disease":   final_disease,
+        "final_disease":   DISEASE_NAMES.get(final_class, "Unknown"),
         "final_class":     final_class,
-        "meta_confidence": round(meta_confidence, 4),
-        "rule_override":   rule_overrode,
+        "meta_confidence": round(float(b["meta_confidence"]), 4),
+        "rule_override":   bool(b["rule_override"]),
+        "rule_fired":      PIPELINE_RULES.describe(b["rule_fired"])[0],
         "probabilities": {
-            "heart_prob":        round(heart_prob,        4),
-            "diabetes_prob":     round(diabetes_prob,     4),
-            "stroke_prob":       round(stroke_prob,       4),
-            "ecg_prob":          round(ecg_prob,          4),
-            "eeg_neuro_prob":    round(eeg_neuro_prob,    4),
-            "eeg_epilepsy_prob": round(eeg_epilepsy_prob, 4),
-            "emg_prob":          round(emg_prob,          4),
+            name: round(float(b[name]), 4)
+            for name in ("heart_prob", "diabetes_prob", "stroke_prob", "ecg_prob",
+                         "eeg_neuro_prob", "eeg_epilepsy_prob", "emg_prob")
         },
         "meta_features": {
-            "static_risk":        round(static_risk,        4),
-            "ncm_index":          round(ncm_index,          2),
-            "cardio_combined":    round(cardio_combined,    4),
-            "neuro_combined":     round(neuro_combined,     4),
-            "metabolic_combined": round(metabolic_combined, 4),
-            "fatigue_index":      round(fatigue_index,      4),
+            name: round(float(b[name]), 2 if name == "ncm_index" else 4)
+            for name in META_COLUMNS[6:]
         }
     }
 
@@ -284,14 +250,14 @@ def _print_result(inp, r, meta_pred_class):
     print("="*52)
     print(f"  Meta Model Predicted: {DISEASE_NAMES.get(meta_pred_class,'?')} ({r['meta_confidence']} confidence)")
     if r["rule_override"]:
-        print(f"  ⚠️  Rule Engine Override Applied")
+        print(f"  ⚠️  Rule Engine Override Applied ({r['rule_fired']})")
     print(f"  ✅ Final Diagnosis  : {r['final_disease']}")
     print("="*52)
 
 
 # ── Entry point ────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    models = load_models()
+    models = load_models(compiled=True)
 
     test_patients = [
         {
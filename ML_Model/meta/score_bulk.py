@@ -0,0 +1,226 @@
+"""
+Bulk scoring — stream a patient extract through the full pipeline
+==================================================================
+Scores every row of a CSV / Parquet file with the same logic as
+predict_full_pipeline.predict (compiled models, vectorised per chunk).
+
+  - Input is read in fixed-size chunks; at most ``2 x workers`` chunks are
+    in flight, so memory stays bounded whatever the file size.
+  - Chunks are scored in a process pool (models load once per worker)
+    and appended to the output CSV in input order as they complete.
+  - After every chunk the output is flushed and a checkpoint
+    (<output>.ckpt) records how far it got, including the CSV input's
+    byte offset; --resume seeks there instead of re-reading the rows
+    already scored.
+
+Input needs the columns BP, HeartRate, Glucose, SpO2, Sleep, Steps.
+Parquet input needs pyarrow.
+
+Usage (from ML_Model/):
+    python meta/score_bulk.py patients.csv scored.csv
+    python meta/score_bulk.py patients.parquet scored.csv --workers 4 --keep patient_id
+    python meta/score_bulk.py patients.csv scored.csv --resume
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BASE     = os.path.dirname(os.path.abspath(__file__))
+ML_MODEL = os.path.dirname(BASE)
+sys.path.append(BASE)
+sys.path.append(ML_MODEL)
+
+from utils.features import RAW_COLUMNS
+from utils.rules import PIPELINE_RULES
+from predict_full_pipeline import DISEASE_NAMES, load_models, predict_batch
+
+OUTPUT_COLUMNS = [
+    "final_class", "final_disease", "meta_class", "meta_confidence",
+    "rule_override", "rule_fired",
+    "heart_prob", "diabetes_prob", "stroke_prob", "ecg_prob",
+    "eeg_neuro_prob", "eeg_epilepsy_prob", "emg_prob",
+    "static_risk", "ncm_index", "cardio_combined", "neuro_combined",
+    "metabolic_combined", "fatigue_index",
+]
+
+
+# ── Input ──────────────────────────────────────────────────────────────────────
+def _csv_records(fh, n):
+    """Up to ``n`` raw CSV records from ``fh`` (a quoted field may span lines)."""
+    records = []
+    record = b""
+    for line in iter(fh.readline, b""):
+        record = record + line if record else line
+        if record.count(b'"') % 2 == 0:
+            records.append(record)
+            record = b""
+            if len(records) == n:
+                break
+    if record:
+        records.append(record)
+    return records
+
+
+def read_chunks(path, chunk_size, columns, skip_chunks=0, offset=None):
+    """
+    Yield (index, DataFrame, input byte offset after it) chunks of
+    ``columns`` from a CSV or Parquet file (offset None for Parquet).
+    A CSV resumes at ``offset`` when given; skipped chunks are only split
+    into records, never parsed.
+    """
+    if path.endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet input needs pyarrow: pip install pyarrow")
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns)
+        for i, batch in enumerate(batches):
+            if i >= skip_chunks:
+                yield i, batch.to_pandas(), None
+        return
+
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        if offset:
+            fh.seek(offset)
+        else:
+            for _ in range(skip_chunks):
+                _csv_records(fh, chunk_size)
+        index = skip_chunks
+        while True:
+            records = _csv_records(fh, chunk_size)
+            if not records:
+                return
+            chunk = pd.read_csv(io.BytesIO(header + b"".join(records)), usecols=columns)
+            yield index, chunk, fh.tell()
+            index += 1
+
+
+# ── Worker ─────────────────────────────────────────────────────────────────────
+_models = None
+
+
+def _init_worker():
+    global _models
+    import warnings
+    warnings.filterwarnings("ignore")
+    _models = load_models(compiled=True)
+
+
+def score_chunk(chunk, keep=()):
+    """Scored DataFrame (``keep`` columns first, then OUTPUT_COLUMNS) for one chunk."""
+    if _models is None:
+        _init_worker()
+    b = predict_batch(chunk[RAW_COLUMNS].to_numpy(dtype=np.float64), _models)
+
+    out = pd.DataFrame({c: chunk[c].to_numpy() for c in keep})
+    for name in OUTPUT_COLUMNS:
+        if name == "final_disease":
+            out[name] = [DISEASE_NAMES.get(int(c), "Unknown") for c in b["final_class"]]
+        elif name == "rule_fired":
+            out[name] = PIPELINE_RULES.describe(b["rule_fired"])
+        else:
+            out[name] = b[name]
+    return out
+
+
+# ── Checkpoint ─────────────────────────────────────────────────────────────────
+def _load_checkpoint(path, args):
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        ckpt = json.load(fh)
+    if ckpt["input"] != os.path.abspath(args.input) or ckpt["chunk_size"] != args.chunk_size:
+        sys.exit(f"Checkpoint {path} is for a different input / chunk size; "
+                 f"delete it or rerun without --resume")
+    return ckpt
+
+
+def _save_checkpoint(path, ckpt):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(ckpt, fh)
+    os.replace(tmp, path)
+
+
+# ── Main ───────────────────────────────────────────────────────────────────────
+def run(args):
+    ckpt_path = args.output + ".ckpt"
+    ckpt = _load_checkpoint(ckpt_path, args) if args.resume else None
+    if ckpt is None:
+        ckpt = {"input": os.path.abspath(args.input), "chunk_size": args.chunk_size,
+                "chunks_done": 0, "rows_done": 0, "output_bytes": 0, "input_offset": None}
+        if os.path.exists(args.output):
+            os.remove(args.output)
+    elif ckpt["chunks_done"]:
+        print(f"Resuming after chunk {ckpt['chunks_done']} ({ckpt['rows_done']:,} rows)")
+
+    columns = RAW_COLUMNS + [c for c in args.keep if c not in RAW_COLUMNS]
+    chunks = read_chunks(args.input, args.chunk_size, columns, skip_chunks=ckpt["chunks_done"],
+                         offset=ckpt.get("input_offset"))
+    max_in_flight = 2 * args.workers
+
+    start = time.perf_counter()
+    rows = 0
+
+    # Drop anything written after the last checkpoint (a half-written chunk)
+    with open(args.output, "ab") as out:
+        out.truncate(ckpt["output_bytes"])
+
+    with open(args.output, "a", newline="") as out, \
+         ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+        pending = []                               # (chunk index, future, offset), input order
+
+        def write_next():
+            nonlocal rows
+            index, future, offset = pending.pop(0)
+            scored = future.result()
+            scored.to_csv(out, header=(out.tell() == 0), index=False)
+            out.flush()
+            os.fsync(out.fileno())
+
+            rows += len(scored)
+            ckpt.update(chunks_done=index + 1, rows_done=ckpt["rows_done"] + len(scored),
+                        output_bytes=out.tell(), input_offset=offset)
+            _save_checkpoint(ckpt_path, ckpt)
+
+            elapsed = time.perf_counter() - start
+            print(f"  chunk {index + 1:5d} | {ckpt['rows_done']:>12,} rows | "
+                  f"{rows / elapsed:>10,.0f} rows/s", flush=True)
+
+        for index, chunk, offset in chunks:
+            pending.append((index, pool.submit(score_chunk, chunk, tuple(args.keep)), offset))
+            if len(pending) >= max_in_flight:
+                write_next()
+        while pending:
+            write_next()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows:,} rows in {elapsed:.1f}s "
+          f"({rows / elapsed if elapsed else 0:,.0f} rows/s) → {args.output}")
+    if os.path.exists(ckpt_path):
+        os.remove(ckpt_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a patient CSV / Parquet file in bulk.")
+    parser.add_argument("input")
+    parser.add_argument("output", help="output CSV")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--keep", nargs="*", default=[],
+                        help="input columns copied to the output (e.g. a patient id)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from <output>.ckpt instead of starting over")
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
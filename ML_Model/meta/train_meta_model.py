@@ -26,13 +26,19 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.calibration import CalibratedClassifierCV
 from xgboost import XGBClassifier
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.features import meta_features
+from utils.dataset_io import read_dataset
+
 CLASS_NAMES = [
     "CHD", "Stroke", "Diabetes", "Hypertension",
     "Arrhythmia", "Metabolic", "Neuro", "Epilepsy", "Healthy"
 ]
 
 # ── Load ───────────────────────────────────────────────────────────────────────
-df = pd.read_csv("meta_dataset_realistic_balanced.csv")
+df = read_dataset("meta_dataset_realistic_balanced.csv")
 X = df.drop("Disease_Class", axis=1)
 y = df["Disease_Class"]
 
@@ -198,17 +204,8 @@ sanity_cases = [
 feature_cols = list(X.columns)
 
 for name, vals in sanity_cases:
-    heart_p, diab_p, stroke_p, ecg_p, eeg_p, emg_p = vals[:6]
-    static   = 0.25*heart_p + 0.25*diab_p + 0.20*stroke_p + 0.15*ecg_p + 0.15*eeg_p
-    cardio   = (heart_p + ecg_p) / 2
-    neuro    = (stroke_p + eeg_p + emg_p) / 3
-    metab    = (diab_p + static) / 2
-    fatigue  = (emg_p + eeg_p) / 2
-    ncm      = (0.22*heart_p + 0.22*diab_p + 0.20*stroke_p + 0.14*ecg_p + 0.12*eeg_p + 0.10*static) * 100
-
-    row = pd.DataFrame([[heart_p, diab_p, stroke_p, ecg_p, eeg_p, emg_p,
-                         static, ncm, cardio, neuro, metab, fatigue]],
-                       columns=feature_cols)
+    # Engineered columns from the same kernel the dataset / pipeline use
+    row = pd.DataFrame(meta_features([vals[:6]]), columns=feature_cols)
 
     proba   = model.predict_proba(row)[0]
     pred_id = int(np.argmax(proba))
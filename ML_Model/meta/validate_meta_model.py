@@ -1,15 +1,21 @@
-import pandas as pd
+import os
+import sys
+
 import numpy as np
-from sklearn.model_selection import StratifiedKFold
 from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import accuracy_score
 from xgboost import XGBClassifier
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cross_validation import cross_validate, cv_arguments
+from utils.dataset_io import read_dataset
+
+args = cv_arguments("Meta model k-fold validation (run from ML_Model/meta/)")
+
 # ==============================
 # Load Dataset
 # ==============================
 
-df = pd.read_csv("meta_dataset_realistic_balanced.csv")
+df = read_dataset("meta_dataset_realistic_balanced.csv")
 
 X = df.drop("Disease_Class", axis=1)
 y = df["Disease_Class"]
@@ -21,39 +27,21 @@ y = le.fit_transform(y)
 num_classes = len(np.unique(y))
 
 # ==============================
-# 5-Fold Cross Validation
+# K-Fold Cross Validation
 # ==============================
 
-skf = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
-scores = []
-
-for fold, (train_index, test_index) in enumerate(skf.split(X, y), 1):
-
-    X_train, X_test = X.iloc[train_index], X.iloc[test_index]
-    y_train, y_test = y[train_index], y[test_index]
-
-    model = XGBClassifier(
-        n_estimators=600,
-        max_depth=6,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        objective="multi:softprob",
-        num_class=num_classes,
-        eval_metric="mlogloss",
-        tree_method="hist",
-        random_state=42
-    )
-
-    model.fit(X_train, y_train)
-
-    y_pred = model.predict(X_test)
-
-    acc = accuracy_score(y_test, y_pred)
-    scores.append(acc)
-
-    print(f"Fold {fold} Accuracy: {round(acc,4)}")
-
-print("\nMean Accuracy:", round(np.mean(scores),4))
-print("Std Dev:", round(np.std(scores),4))
\ No newline at end of file
+model = XGBClassifier(
+    n_estimators=600,
+    max_depth=6,
+    learning_rate=0.05,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    objective="multi:softprob",
+    num_class=num_classes,
+    eval_metric="mlogloss",
+    tree_method="hist",
+    random_state=42
+)
+
+cross_validate(model, X, y, n_splits=args.folds, n_repeats=args.repeats,
+               n_jobs=args.jobs, cache=not args.no_cache, title="META MODEL")
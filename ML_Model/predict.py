@@ -9,22 +9,25 @@ Usage:
     print(predict_eeg(stress_ratio=1.8, sleep_hours=5.5))
     print(predict_emg(emg_rms=0.75, steps=2500))
 """
-import joblib
 import numpy as np
 import os
+import sys
 
 _BASE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(_BASE)
+
+from utils.model_registry import registry
 
 
 def _load(name):
-    """Load model + scaler from ML_Model/<name>/<name>_model.pkl"""
-    path = os.path.join(_BASE, name, f"{name}_model.pkl")
+    """Model + scaler from ML_Model/<name>/<name>_model.pkl (cached by the registry)"""
+    path = registry.path(name)
     if not os.path.exists(path):
         raise FileNotFoundError(
             f"Model not found at: {path}\n"
             f"Make sure you ran train.py inside the {name}/ folder first."
         )
-    data = joblib.load(path)
+    data = registry.get(name)
     if not isinstance(data, dict) or "model" not in data or "scaler" not in data:
         raise ValueError(
             f"Old model format detected at: {path}\n"
@@ -33,6 +36,19 @@ def _load(name):
     return data["model"], data["scaler"]
 
 
+def signal_proba(name, X):
+    """
+    Class probabilities for raw (unscaled) rows of the ECG / EEG / EMG model.
+    Uses the exact lookup table from utils/lookup_table.py when one has been
+    built for the current model, otherwise the model + scaler.
+    """
+    table = registry.lookup(name)
+    if table is not None:
+        return table.predict_proba(X)
+    model, scaler = _load(name)
+    return model.predict_proba(scaler.transform(X))
+
+
 def predict_ecg(heart_rate: float, hrv_sdnn: float) -> dict:
     """
     Predict ECG class.
@@ -42,9 +58,7 @@ def predict_ecg(heart_rate: float, hrv_sdnn: float) -> dict:
     Returns:
         dict with prediction, confidence, and probabilities
     """
-    model, scaler = _load("ECG")
-    X = scaler.transform([[heart_rate, hrv_sdnn]])
-    proba = model.predict_proba(X)[0]
+    proba = signal_proba("ECG", [[heart_rate, hrv_sdnn]])[0]
     classes = ["Normal", "Arrhythmia"]
     idx = int(np.argmax(proba))
     return {
@@ -63,9 +77,7 @@ def predict_eeg(stress_ratio: float, sleep_hours: float) -> dict:
     Returns:
         dict with prediction, confidence, and probabilities
     """
-    model, scaler = _load("EEG")
-    X = scaler.transform([[stress_ratio, sleep_hours]])
-    proba = model.predict_proba(X)[0]
+    proba = signal_proba("EEG", [[stress_ratio, sleep_hours]])[0]
     classes = ["Normal", "Mild Neuro", "Epilepsy"]
     idx = int(np.argmax(proba))
     return {
@@ -84,9 +96,7 @@ def predict_emg(emg_rms: float, steps: float) -> dict:
     Returns:
         dict with prediction, confidence, and probabilities
     """
-    model, scaler = _load("EMG")
-    X = scaler.transform([[emg_rms, steps]])
-    proba = model.predict_proba(X)[0]
+    proba = signal_proba("EMG", [[emg_rms, steps]])[0]
     classes = ["Normal", "Abnormal"]
     idx = int(np.argmax(proba))
     return {
@@ -12,17 +12,20 @@ Fix:
   - Scaler fit on DataFrame (not numpy) to fix the feature names warning
   - Softer class boundaries
 
-Run from ML_Model/stroke/
+Run from ML_Model/stroke/ (TRAIN_BACKEND=gbm|xgb|auto, see utils/train_backend.py)
 """
+import os
+import sys
 import numpy as np
 import pandas as pd
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import classification_report, brier_score_loss
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.train_backend import fit_calibrated
+
 np.random.seed(42)
 n = 6000
 
@@ -102,14 +105,7 @@ X_train, X_test, y_train, y_test = train_test_split(
     X_scaled_df, y, test_size=0.2, random_state=42, stratify=y
 )
 
-base = GradientBoostingClassifier(
-    n_estimators=200, max_depth=3,
-    learning_rate=0.05, subsample=0.8, random_state=42
-)
-base.fit(X_train, y_train)
-
-calibrated = CalibratedClassifierCV(base, method="isotonic", cv=5)
-calibrated.fit(X_train, y_train)
+calibrated = fit_calibrated(X_train, y_train, method="isotonic")
 
 y_pred  = calibrated.predict(X_test)
 y_proba = calibrated.predict_proba(X_test)[:, 1]
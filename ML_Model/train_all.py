@@ -0,0 +1,366 @@
+"""
+Train the whole model stack — dependency graph, parallel, cached
+================================================================
+Every training / dataset script of ML_Model is a step with the files it
+reads and writes (paths relative to ML_Model/); a step depends on the
+steps that write its inputs, so the graph is:
+
+    heart_data → heart        diabetes_data → diabetes
+    meta_dataset → meta_model
+    ecg   eeg   emg   stroke  (no inputs produced by another step)
+
+  - Ready steps run concurrently, each as its own process started in the
+    script's directory (the scripts use relative paths). A step gets a
+    CPU budget: its cores (sched_setaffinity) and the thread / worker
+    limits of numpy, XGBoost and joblib (OMP_NUM_THREADS,
+    LOKY_MAX_CPU_COUNT, ...). Budgets never add up to more than --cpus.
+  - A step's fingerprint is the sha256 of its code (the script and the
+    local modules it imports, followed recursively), its input files
+    (and their columnar .cols copies, utils/dataset_io.py), its
+    arguments, TRAIN_BACKEND and the numpy / scikit-learn / XGBoost
+    versions. .train/state.json keeps it with the sha256 of every output
+    of the step's last successful run; the step is skipped while both
+    are unchanged (an artifact overwritten by hand reruns it). A rerun
+    that writes identical outputs does not make its dependents stale.
+  - Each step's wall time and peak RSS (os.wait4) go to
+    .train/report.json, its output to .train/logs/<step>.log.
+
+A failed step blocks its dependents; the other steps still run.
+
+Usage (from ML_Model/):
+    python train_all.py                       # everything that is stale
+    python train_all.py meta_model heart      # these steps (and stale inputs)
+    python train_all.py --cpus 4 --force
+    python train_all.py --dry-run
+    python train_all.py --ecg-recordings recordings.npz --emg-sessions sessions.npz
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from importlib import metadata
+
+from utils.dataset_io import columnar_path
+
+ML_MODEL = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = os.path.join(ML_MODEL, ".train")
+LIBRARIES = ("numpy", "scipy", "pandas", "scikit-learn", "xgboost")
+MODEL_VARS = ("TRAIN_BACKEND",)          # environment that changes what a step trains
+THREAD_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+               "NUMEXPR_NUM_THREADS", "LOKY_MAX_CPU_COUNT")
+
+Step = namedtuple("Step", "name script inputs outputs cpus args", defaults=((), 1, ()))
+
+STEPS = [
+    Step("heart_data",    "data/synthetic/generate_heart_data.py", (),
+         ["data/synthetic/heart_synthetic_10k.csv"]),
+    Step("diabetes_data", "data/synthetic/generate_diabetes_data.py", (),
+         ["data/synthetic/diabetes_synthetic_10k.csv"]),
+    Step("ecg",      "ECG/train.py", ["ECG/ECG_dataset_realistic.csv"], ["ECG/ECG_model.pkl"]),
+    Step("eeg",      "EEG/train.py", ["EEG/EEG_dataset_realistic.csv"], ["EEG/EEG_model.pkl"]),
+    Step("emg",      "EMG/train.py", (), ["EMG/EMG_model.pkl", "EMG/EMG_dataset_fixed.csv"]),
+    Step("heart",    "heart/train_heart.py", ["data/synthetic/heart_synthetic_10k.csv"],
+         ["heart/heart_model.pkl"], cpus=2),
+    Step("diabetes", "diabetes/train_diabetes.py", ["data/synthetic/diabetes_synthetic_10k.csv"],
+         ["diabetes/diabetes_model.pkl"], cpus=2),
+    Step("stroke",   "stroke/train_stroke.py", (),
+         ["stroke/stroke_model.pkl", "stroke/stroke_dataset_realistic.csv"]),
+    Step("meta_dataset", "meta/generate_meta_dataset.py", (),
+         ["meta/meta_dataset_realistic_balanced.csv"]),
+    Step("meta_model",   "meta/train_meta_model.py", ["meta/meta_dataset_realistic_balanced.csv"],
+         ["meta/meta_model.pkl", "meta/meta_confusion_matrix.png",
+          "meta/meta_learning_curve.png", "meta/meta_feature_importance.png"], cpus=4),
+]
+
+
+# ── Graph ─────────────────────────────────────────────────────────────────────
+def build_steps(args):
+    """STEPS with the optional recorded-data inputs of ECG / EMG training."""
+    steps = []
+    for step in STEPS:
+        extra = {"ecg": args.ecg_recordings, "emg": args.emg_sessions}.get(step.name)
+        if extra:
+            extra = os.path.abspath(extra)
+            step = step._replace(inputs=[*step.inputs, extra], args=[extra])
+        steps.append(step)
+    return steps
+
+
+def dependencies(steps):
+    """{step: names of the steps writing one of its inputs}"""
+    writer = {out: s.name for s in steps for out in s.outputs}
+    return {s.name: sorted({writer[i] for i in s.inputs if i in writer}) for s in steps}
+
+
+def select(steps, names, deps):
+    """The named steps plus everything upstream of them, in STEPS order."""
+    known = {s.name for s in steps}
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        raise SystemExit(f"unknown step(s): {', '.join(unknown)} (choose from {', '.join(sorted(known))})")
+    wanted, todo = set(), list(names or known)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [s for s in steps if s.name in wanted]
+
+
+# ── Fingerprints ──────────────────────────────────────────────────────────────
+def _path(rel):
+    return rel if os.path.isabs(rel) else os.path.join(ML_MODEL, rel)
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def code_files(script):
+    """The script and the ML_Model modules it imports, recursively."""
+    seen, todo = [], [_path(script)]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+        with open(path, encoding="utf-8") as fh:
+            tree = ast.parse(fh.read(), path)
+        modules = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules += [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                modules.append(node.module)
+        for module in modules:
+            rel = module.replace(".", os.sep) + ".py"
+            for root in (os.path.dirname(path), ML_MODEL):
+                if os.path.exists(os.path.join(root, rel)):
+                    todo.append(os.path.join(root, rel))
+                    break
+    return sorted(seen)
+
+
+def _versions():
+    out = {}
+    for lib in LIBRARIES:
+        try:
+            out[lib] = metadata.version(lib)
+        except metadata.PackageNotFoundError:
+            out[lib] = None
+    return out
+
+
+def fingerprint(step, versions):
+    h = hashlib.sha256()
+    for path in code_files(step.script):
+        h.update(f"code {os.path.relpath(path, ML_MODEL)} {_file_hash(path)}\n".encode())
+    for rel in step.inputs:
+        path = _path(rel)
+        digest = _file_hash(path) if os.path.exists(path) else "missing"
+        h.update(f"input {rel} {digest}\n".encode())
+        cols = columnar_path(path)
+        if os.path.isdir(cols):
+            for name in sorted(os.listdir(cols)):
+                h.update(f"columns {name} {_file_hash(os.path.join(cols, name))}\n".encode())
+    env = {var: os.environ.get(var) for var in MODEL_VARS}
+    h.update(json.dumps({"args": list(step.args), "env": env, "versions": versions},
+                        sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def output_state(step):
+    """{output: {size, mtime_ns, sha256}} of a step's outputs as they are now."""
+    out = {}
+    for rel in step.outputs:
+        st = os.stat(_path(rel))
+        out[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _file_hash(_path(rel))}
+    return out
+
+
+def _output_unchanged(rel, recorded):
+    path = _path(rel)
+    if recorded is None or not os.path.exists(path):
+        return False
+    st = os.stat(path)
+    if st.st_size == recorded["size"] and st.st_mtime_ns == recorded["mtime_ns"]:
+        return True
+    return st.st_size == recorded["size"] and _file_hash(path) == recorded["sha256"]
+
+
+def up_to_date(step, fp, state):
+    recorded = state.get(step.name, {})
+    return (recorded.get("fingerprint") == fp
+            and all(_output_unchanged(o, recorded.get("outputs", {}).get(o)) for o in step.outputs))
+
+
+def load_state():
+    path = os.path.join(STATE_DIR, "state.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh, indent=2)
+    os.replace(tmp, path)
+
+
+# ── Scheduler ─────────────────────────────────────────────────────────────────
+def _launch(step, cores, log_dir):
+    env = dict(os.environ, PYTHONUNBUFFERED="1", MPLBACKEND="Agg")
+    env.update({var: str(len(cores)) for var in THREAD_VARS})
+
+    def pin():
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+
+    log = open(os.path.join(log_dir, f"{step.name}.log"), "w")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.basename(step.script), *step.args],
+        cwd=os.path.dirname(_path(step.script)), env=env,
+        stdout=log, stderr=subprocess.STDOUT, preexec_fn=pin,
+    )
+    log.close()
+    return proc
+
+
+def _peak_rss_mb(usage):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run(args):
+    steps = build_steps(args)
+    deps = dependencies(steps)
+    steps = select(steps, args.steps, deps)
+    versions = _versions()
+    state = load_state()
+
+    if hasattr(os, "sched_getaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+    else:
+        available = list(range(os.cpu_count() or 1))
+    cpus = max(1, min(args.cpus or len(available), len(available)))
+    free = available[:cpus]
+
+    if args.dry_run:
+        stale = set()
+        for step in steps:
+            fp = fingerprint(step, versions)
+            if args.force or any(d in stale for d in deps[step.name]) or not up_to_date(step, fp, state):
+                stale.add(step.name)
+            after = f"  (after {', '.join(deps[step.name])})" if deps[step.name] else ""
+            print(f"  {step.name:<14} {'run' if step.name in stale else 'up to date':<11} "
+                  f"{min(step.cpus, cpus)} cpu{after}")
+        return {"planned": [s.name for s in steps if s.name in stale]}
+
+    log_dir = os.path.join(STATE_DIR, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    pending = list(steps)
+    status, report, running = {}, {}, {}
+    start = time.perf_counter()
+
+    while pending or running:
+        # Start every ready step the CPU budget allows, in STEPS order
+        for step in list(pending):
+            needs = deps[step.name]
+            if any(status.get(d) in ("failed", "blocked") for d in needs):
+                pending.remove(step)
+                status[step.name] = "blocked"
+                report[step.name] = {"status": "blocked", "after": needs}
+                print(f"  {step.name:<14} blocked")
+                continue
+            if not all(status.get(d) in ("ran", "skipped") for d in needs):
+                continue
+            fp = fingerprint(step, versions)
+            if not args.force and up_to_date(step, fp, state):
+                pending.remove(step)
+                status[step.name] = "skipped"
+                report[step.name] = {"status": "skipped", "fingerprint": fp[:16]}
+                print(f"  {step.name:<14} up to date")
+                continue
+            need = min(step.cpus, cpus)
+            if need > len(free):
+                continue
+            cores, free = free[:need], free[need:]
+            pending.remove(step)
+            proc = _launch(step, cores, log_dir)
+            running[proc.pid] = (step, proc, cores, fp, time.perf_counter())
+            print(f"  {step.name:<14} started on {need} cpu")
+
+        if not running:
+            continue
+
+        pid, wait_status, usage = os.wait4(-1, 0)
+        if pid not in running:
+            continue
+        step, proc, cores, fp, t0 = running.pop(pid)
+        proc.returncode = os.waitstatus_to_exitcode(wait_status)
+        free = sorted(free + cores)
+        ok = proc.returncode == 0 and all(os.path.exists(_path(o)) for o in step.outputs)
+        status[step.name] = "ran" if ok else "failed"
+        report[step.name] = {
+            "status":      status[step.name],
+            "seconds":     round(time.perf_counter() - t0, 2),
+            "peak_rss_mb": _peak_rss_mb(usage),
+            "cpus":        len(cores),
+            "returncode":  proc.returncode,
+            "fingerprint": fp[:16],
+            "log":         os.path.relpath(os.path.join(log_dir, f"{step.name}.log"), ML_MODEL),
+        }
+        if ok:
+            state[step.name] = {"fingerprint": fp, "outputs": output_state(step),
+                                "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            _write_json(os.path.join(STATE_DIR, "state.json"), state)
+        r = report[step.name]
+        print(f"  {step.name:<14} {r['status']} in {r['seconds']:.1f}s, peak {r['peak_rss_mb']:.0f} MB")
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "finished":      time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cpus":          cpus,
+        "wall_seconds":  round(elapsed, 2),
+        "step_seconds":  round(sum(r.get("seconds", 0.0) for r in report.values()), 2),
+        "versions":      versions,
+        "steps":         {s.name: report[s.name] for s in steps},
+    }
+    _write_json(os.path.join(STATE_DIR, "report.json"), summary)
+    counts = {k: sum(1 for v in status.values() if v == k) for k in ("ran", "skipped", "failed", "blocked")}
+    print(f"{counts['ran']} ran, {counts['skipped']} up to date, {counts['failed']} failed, "
+          f"{counts['blocked']} blocked in {elapsed:.1f}s on {cpus} cpu "
+          f"→ {os.path.relpath(os.path.join(STATE_DIR, 'report.json'), ML_MODEL)}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train every stale model of ML_Model, in parallel.")
+    parser.add_argument("steps", nargs="*",
+                        help=f"steps to bring up to date (default: all of {', '.join(s.name for s in STEPS)})")
+    parser.add_argument("--cpus", type=int, default=None,
+                        help="CPU budget shared by the running steps (default: all available)")
+    parser.add_argument("--force", action="store_true", help="rerun steps even when up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would run")
+    parser.add_argument("--ecg-recordings", default=None,
+                        help="train ECG on a recordings .npz (see ECG/train.py)")
+    parser.add_argument("--emg-sessions", default=None,
+                        help="train EMG on a sessions .npz (see EMG/train.py)")
+    summary = run(parser.parse_args(argv))
+    if any(r.get("status") in ("failed", "blocked") for r in summary.get("steps", {}).values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Streaming change detection over vitals — early warnings between model runs
+==========================================================================
+One EWMA baseline and a two-sided CUSUM per user and channel:
+
+  channels   the PatientInput vitals (RAW_COLUMNS) and the signal features
+             derived from them (utils.features.signal_features: hrv_sdnn,
+             stress_ratio, emg_rms)
+  baseline   EWMA mean / variance (running mean during the first WARMUP
+             samples); the std is floored per channel (MIN_STD) so a
+             perfectly steady vital does not turn every wobble into a
+             change
+  CUSUM      z = (x - mean) / std;  S+ = max(0, S+ + z - DRIFT),
+             S- = max(0, S- - z - DRIFT); a channel changes when either
+             passes THRESHOLD. The user's channels then all re-baseline
+             on the tick's values and their CUSUMs restart — the derived
+             channels move with their source vitals — so a sustained
+             shift alarms once.
+
+State is five numbers per user and channel in preallocated arrays
+(grown by doubling); one tick updates any number of users with array
+operations, O(1) per sample. NaN means "not measured this tick".
+
+GatedPipeline runs an expensive scorer (predict_full_pipeline's
+predict_batch, main.py's run_pipeline) only for the users whose tick
+shows a change point, or who have not been scored yet; vitals missing
+from the tick are filled from the user's baselines before scoring. A row
+that still lacks a vital (no baseline for it yet) is not scored but
+reported as incomplete — until a user's first complete row they stay
+due for scoring.
+
+Usage:
+    monitor = VitalMonitor()
+    changed = monitor.update(user_ids, vitals)       # (k, 6) RAW_COLUMNS order
+    gate = GatedPipeline(monitor, score)             # score(raw) -> results
+    rows, results, changed, incomplete = gate.tick(user_ids, vitals)
+"""
+import threading
+
+import numpy as np
+
+from utils.features import RAW_COLUMNS, as_raw, signal_features
+
+DERIVED_COLUMNS = ["hrv_sdnn", "stress_ratio", "emg_rms"]
+CHANNELS = RAW_COLUMNS + DERIVED_COLUMNS
+
+# Smallest std each channel's baseline may have (clinical units)
+MIN_STD = {
+    "BP": 5.0, "HeartRate": 4.0, "Glucose": 10.0, "SpO2": 1.0, "Sleep": 0.5, "Steps": 1000.0,
+    "hrv_sdnn": 2.0, "stress_ratio": 0.1, "emg_rms": 0.1,
+}
+
+ALPHA = 0.05            # EWMA weight of a new sample
+DRIFT = 0.5             # CUSUM allowance, in std
+THRESHOLD = 5.0         # CUSUM decision level, in std
+WARMUP = 5              # samples before a channel can alarm
+
+
+def channel_values(raw):
+    """(n, len(CHANNELS)) monitor input from raw vitals (NaN kept as missing)."""
+    raw = as_raw(raw)
+    ecg, eeg, emg = signal_features(raw)
+    return np.column_stack([raw, ecg[:, 1], eeg[:, 0], emg[:, 0]])
+
+
+class VitalMonitor:
+
+    def __init__(self, channels=CHANNELS, alpha=ALPHA, drift=DRIFT, threshold=THRESHOLD,
+                 warmup=WARMUP, min_std=None, capacity=1024):
+        self.channels = list(channels)
+        self.alpha = alpha
+        self.drift = drift
+        self.threshold = threshold
+        self.warmup = warmup
+        floor = {**MIN_STD, **(min_std or {})}
+        self.min_var = np.array([floor.get(c, 1e-6) for c in self.channels]) ** 2
+        self._rows = {}
+        self._lock = threading.Lock()
+        self._alloc(capacity)
+        self.samples = self.changes = 0
+
+    def _alloc(self, capacity):
+        shape = (capacity, len(self.channels))
+        old = getattr(self, "mean", None)
+        fresh = {
+            "mean": np.zeros(shape), "var": np.zeros(shape),
+            "pos": np.zeros(shape), "neg": np.zeros(shape),
+            "n": np.zeros(shape, dtype=np.int64),
+        }
+        if old is not None:
+            for name, arr in fresh.items():
+                arr[:len(old)] = getattr(self, name)
+        for name, arr in fresh.items():
+            setattr(self, name, arr)
+
+    def rows(self, user_ids):
+        """State row of each user (new users get a fresh row)."""
+        rows = np.empty(len(user_ids), dtype=np.int64)
+        for i, user in enumerate(user_ids):
+            row = self._rows.get(user)
+            if row is None:
+                row = self._rows[user] = len(self._rows)
+            rows[i] = row
+        if len(self._rows) > len(self.mean):
+            self._alloc(max(len(self._rows), 2 * len(self.mean)))
+        return rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, user):
+        return user in self._rows
+
+    def update(self, user_ids, values):
+        """
+        Fold one sample per user (rows of ``values``, CHANNELS order) into
+        the baselines. Returns a (k, n_channels) bool array of change points.
+        """
+        X = np.atleast_2d(np.asarray(values, dtype=np.float64))
+        if len(set(user_ids)) != len(user_ids):
+            raise ValueError("one sample per user per update")
+        with self._lock:
+            rows = self.rows(user_ids)
+            mean, var, n = self.mean[rows], self.var[rows], self.n[rows]
+            pos, neg = self.pos[rows], self.neg[rows]
+            seen = ~np.isnan(X)
+            ready = seen & (n >= self.warmup)
+
+            with np.errstate(invalid="ignore"):
+                z = (X - mean) / np.sqrt(np.maximum(var, self.min_var))
+                pos = np.where(ready, np.maximum(pos + z - self.drift, 0.0), pos)
+                neg = np.where(ready, np.maximum(neg - z - self.drift, 0.0), neg)
+                changed = ready & ((pos > self.threshold) | (neg > self.threshold))
+
+                # Baseline: running mean while warming up, then EWMA
+                a = np.maximum(self.alpha, 1.0 / (n + 1))
+                delta = X - mean
+                new_mean = np.where(seen, mean + a * delta, mean)
+                new_var = np.where(seen, (1 - a) * (var + a * delta * delta), var)
+
+            # A change re-baselines all of the user's channels on the new level
+            reset = changed.any(axis=1, keepdims=True)
+            new_mean = np.where(reset & seen, X, new_mean)
+            pos = np.where(reset, 0.0, pos)
+            neg = np.where(reset, 0.0, neg)
+
+            self.mean[rows], self.var[rows] = new_mean, new_var
+            self.pos[rows], self.neg[rows] = pos, neg
+            self.n[rows] = n + seen
+            self.samples += int(seen.sum())
+            self.changes += int(changed.any(axis=1).sum())
+        return changed
+
+    def baseline(self, user_ids):
+        """Current baseline means (NaN for channels never seen)."""
+        with self._lock:
+            rows = np.array([self._rows.get(u, -1) for u in user_ids], dtype=np.int64)
+            out = np.where(self.n[rows] > 0, self.mean[rows], np.nan)
+        out[rows < 0] = np.nan
+        return out
+
+    def stats(self):
+        return {"users": len(self._rows), "samples": self.samples, "changes": self.changes}
+
+    # ── checkpoint ──
+    def save(self, path):
+        with self._lock:
+            users = np.array(list(self._rows), dtype=object)
+            k = len(users)
+            np.savez(path, users=users, channels=np.array(self.channels),
+                     mean=self.mean[:k], var=self.var[:k], pos=self.pos[:k],
+                     neg=self.neg[:k], n=self.n[:k])
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        data = np.load(path, allow_pickle=True)
+        monitor = cls(channels=list(data["channels"]), capacity=max(len(data["users"]), 1), **kwargs)
+        monitor.rows(list(data["users"]))
+        k = len(data["users"])
+        for name in ("mean", "var", "pos", "neg", "n"):
+            getattr(monitor, name)[:k] = data[name]
+        return monitor
+
+
+class GatedPipeline:
+    """Runs ``score(raw_rows)`` only for users whose tick shows a change."""
+
+    def __init__(self, monitor, score):
+        self.monitor = monitor
+        self.score = score
+        self.ticks = self.rows_seen = self.rows_scored = self.rows_incomplete = 0
+        self._unscored = set()          # users seen but never scored (no complete vitals yet)
+
+    def tick(self, user_ids, raw):
+        """
+        One sample per user (raw vitals, RAW_COLUMNS order). Returns
+        (indices of the rows that were scored, their results, the
+        per-channel change mask, indices of the rows that were due but
+        had a vital with neither a reading nor a baseline).
+        """
+        raw = as_raw(raw)
+        self._unscored.update(u for u in user_ids if u not in self.monitor)
+        due = np.array([u in self._unscored for u in user_ids], dtype=bool)
+        changed = self.monitor.update(user_ids, channel_values(raw))
+        candidates = np.flatnonzero(due | changed.any(axis=1))
+        rows = incomplete = candidates
+        results = []
+        if len(candidates):
+            picked = raw[candidates]
+            fill = self.monitor.baseline([user_ids[i] for i in candidates])[:, :picked.shape[1]]
+            picked = np.where(np.isnan(picked), fill, picked)
+            complete = ~np.isnan(picked).any(axis=1)
+            rows, incomplete = candidates[complete], candidates[~complete]
+            if len(rows):
+                results = self.score(picked[complete])
+                self._unscored.difference_update(user_ids[i] for i in rows)
+        self.ticks += 1
+        self.rows_seen += len(raw)
+        self.rows_scored += len(rows)
+        self.rows_incomplete += len(incomplete)
+        return rows, results, changed, incomplete
+
+    def stats(self):
+        return {
+            **self.monitor.stats(),
+            "ticks": self.ticks,
+            "rows_seen": self.rows_seen,
+            "rows_scored": self.rows_scored,
+            "rows_incomplete": self.rows_incomplete,
+            "scored_ratio": round(self.rows_scored / self.rows_seen, 4) if self.rows_seen else 0.0,
+        }
@@ -0,0 +1,313 @@
+"""
+Compiled inference for the saved model artifacts
+=================================================
+The signal / stroke artifacts are CalibratedClassifierCV wrappers around
+five GradientBoostingClassifier folds, so one sklearn predict_proba call
+walks ~1,000 trees through Python-level dispatch per fold and class.
+
+compile_model() flattens such an artifact into NumPy node arrays
+(feature, threshold, left, right, value) for every tree of every fold,
+keeps the isotonic / sigmoid calibrators as plain arrays and folds the
+StandardScaler in front. CompiledModel.predict_proba then evaluates all
+trees for a block of rows with a handful of vectorised gathers.
+
+Tree sums are accumulated in the same order as sklearn's predict_stages,
+so raw scores are bit-identical; calibrated outputs agree to float
+rounding (np.interp vs scipy interp1d).
+
+XGBoost estimators (heart, diabetes, meta, and the signal / stroke
+models trained with utils/train_backend.py's xgb backend) already have a
+native vectorised predictor, so they are kept as the raw Booster and only the
+sklearn wrapper + calibration layer is compiled away.
+
+Usage:
+    python utils/compiled_model.py      # parity + speed check on all artifacts
+"""
+import numpy as np
+from scipy.special import expit
+
+# Upper bound on rows x trees evaluated at once (keeps gathers in cache / RAM)
+BLOCK_CELLS = 1 << 20
+
+
+# ── Tree ensembles ────────────────────────────────────────────────────────────
+class _TreeArrays:
+    """
+    All trees of one or more GradientBoosting ensembles as flat node arrays.
+    Node ``j`` of tree ``t`` lives at ``t * n_nodes + j``; ``children`` stores
+    [right, left] pairs so that ``children[2 * i + (x <= threshold)]`` steps.
+    """
+
+    def __init__(self, trees, scales):
+        n_nodes = max(t.node_count for t in trees)
+        n_trees = len(trees)
+
+        feature   = np.zeros((n_trees, n_nodes), dtype=np.intp)
+        threshold = np.zeros((n_trees, n_nodes), dtype=np.float64)
+        children  = np.zeros((n_trees, n_nodes, 2), dtype=np.intp)
+        value     = np.zeros((n_trees, n_nodes), dtype=np.float64)
+
+        for i, (t, scale) in enumerate(zip(trees, scales)):
+            n = t.node_count
+            base = i * n_nodes
+            nodes = np.arange(n)
+            leaf = t.children_left == -1
+            # Leaves point at themselves so extra traversal steps are no-ops
+            feature[i, :n]     = np.where(leaf, 0, t.feature)
+            threshold[i, :n]   = t.threshold
+            children[i, :n, 0] = base + np.where(leaf, nodes, t.children_right)
+            children[i, :n, 1] = base + np.where(leaf, nodes, t.children_left)
+            # predict_stages adds ``learning_rate * value`` per tree
+            value[i, :n]       = scale * t.value[:, 0, 0]
+
+        self.feature   = feature.ravel()
+        self.threshold = threshold.ravel()
+        self.children  = children.ravel()
+        self.value     = value.ravel()
+        self.roots     = np.arange(n_trees) * n_nodes
+        self.n_trees   = n_trees
+        self.depth     = max(t.max_depth for t in trees)
+
+    def leaf_values(self, X32):
+        """(n_rows, n_trees) leaf value reached by each row in each tree."""
+        n_rows, n_features = X32.shape
+        x_flat = X32.ravel()
+        row_off = (np.arange(n_rows) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.depth):
+            x = x_flat[row_off + self.feature[node]]
+            node = self.children[2 * node + (x <= self.threshold[node])]
+        return self.value[node]
+
+
+class _GBMGroup:
+    """Slice of the shared tree arrays belonging to one (fold, class) score."""
+
+    def __init__(self, start, stop, init):
+        self.start, self.stop, self.init = start, stop, init
+
+
+# ── Calibrators ───────────────────────────────────────────────────────────────
+def _compile_calibrator(cal):
+    name = type(cal).__name__
+    if name == "IsotonicRegression":
+        return ("isotonic", float(cal.X_min_), float(cal.X_max_),
+                np.asarray(cal.X_thresholds_, dtype=np.float64),
+                np.asarray(cal.y_thresholds_, dtype=np.float64))
+    if name == "_SigmoidCalibration":
+        # Keep numpy float64 scalars: sklearn scores float32 XGBoost output
+        # with them, and a python float would keep the product in float32
+        return ("sigmoid", np.float64(cal.a_), np.float64(cal.b_))
+    raise TypeError(f"Unsupported calibrator: {name}")
+
+
+def _apply_calibrator(cal, T):
+    if cal[0] == "isotonic":
+        _, lo, hi, xs, ys = cal
+        return np.interp(np.clip(T, lo, hi), xs, ys)
+    _, a, b = cal
+    return expit(-(a * T + b))
+
+
+# ── Compiled model ────────────────────────────────────────────────────────────
+class _Booster:
+    """Bare XGBoost booster + the iteration range sklearn would predict with."""
+
+    def __init__(self, est):
+        self.booster = est.get_booster()
+        try:
+            self.iteration_range = (0, int(est.best_iteration) + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+    def predict(self, X):
+        return self.booster.inplace_predict(
+            X, iteration_range=self.iteration_range, validate_features=False
+        )
+
+
+class CompiledModel:
+    """
+    Drop-in replacement for the ``predict_proba`` / ``predict`` of a saved
+    model (optionally with its scaler folded in). Accepts raw feature
+    arrays or DataFrames in the column order the original model expects.
+
+    ``members`` holds one (scorer, calibrators) pair per calibration fold;
+    the scorer is either a list of _GBMGroup slices into ``trees`` or a
+    _Booster. A model without calibrators is a bare XGBClassifier.
+    """
+
+    def __init__(self, classes, members, trees=None, mean=None, scale=None):
+        self.classes_ = np.asarray(classes)
+        self.members = members
+        self.trees = trees
+        self.mean = mean
+        self.scale = scale
+
+    def _prepare(self, X):
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.mean is not None:
+            X -= self.mean
+            X /= self.scale
+        return X
+
+    def _gbm_scores(self, X):
+        """Decision score of every (fold, class) group: (n_rows, n_groups)."""
+        X32 = X.astype(np.float32)
+        groups = [g for scorer, _ in self.members for g in scorer]
+        out = np.empty((X.shape[0], len(groups)))
+        step = max(1, BLOCK_CELLS // self.trees.n_trees)
+        for lo in range(0, X.shape[0], step):
+            leaves = self.trees.leaf_values(X32[lo:lo + step])
+            for j, g in enumerate(groups):
+                # Sequential sum starting from the init score == predict_stages
+                leaves[:, g.start] += g.init
+                out[lo:lo + step, j] = np.cumsum(leaves[:, g.start:g.stop], axis=1)[:, -1]
+        return out
+
+    def predict_proba(self, X):
+        X = self._prepare(X)
+        n_classes = len(self.classes_)
+
+        if isinstance(self.members, _Booster):         # bare XGBClassifier
+            proba = self.members.predict(X)
+            if proba.ndim == 1:
+                proba = np.column_stack([1 - proba, proba])
+            return proba
+
+        gbm_scores = self._gbm_scores(X) if self.trees is not None else None
+        col = 0
+
+        mean_proba = np.zeros((X.shape[0], n_classes))
+        for scorer, calibrators in self.members:
+            if isinstance(scorer, _Booster):
+                scores = scorer.predict(X).reshape(X.shape[0], -1)
+            else:
+                scores = gbm_scores[:, col:col + len(scorer)]
+                col += len(scorer)
+
+            proba = np.zeros((X.shape[0], n_classes))
+            for k, cal in enumerate(calibrators):
+                class_idx = k + 1 if n_classes == 2 else k
+                proba[:, class_idx] = _apply_calibrator(cal, scores[:, k])
+
+            if n_classes == 2:
+                proba[:, 0] = 1.0 - proba[:, 1]
+            else:
+                denominator = np.sum(proba, axis=1)[:, np.newaxis]
+                uniform = np.full_like(proba, 1 / n_classes)
+                proba = np.divide(proba, denominator, out=uniform,
+                                  where=denominator != 0)
+            proba[(1.0 < proba) & (proba <= 1.0 + 1e-5)] = 1.0
+            mean_proba += proba
+
+        mean_proba /= len(self.members)
+        return mean_proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# ── Compilation ───────────────────────────────────────────────────────────────
+def compile_model(model, scaler=None):
+    """
+    Compile a fitted CalibratedClassifierCV(GradientBoosting / XGBoost) or
+    a bare XGBClassifier. If ``scaler`` is given, the CompiledModel expects
+    unscaled features and applies the StandardScaler itself.
+    """
+    mean  = None if scaler is None else np.asarray(scaler.mean_,  dtype=np.float64)
+    scale = None if scaler is None else np.asarray(scaler.scale_, dtype=np.float64)
+
+    if not hasattr(model, "calibrated_classifiers_"):
+        return CompiledModel(model.classes_, _Booster(model), mean=mean, scale=scale)
+
+    trees, scales, members = [], [], []
+    for cc in model.calibrated_classifiers_:
+        est = cc.estimator
+        if not np.array_equal(est.classes_, model.classes_):
+            raise ValueError("Fold classes differ from model classes")
+        calibrators = [_compile_calibrator(c) for c in cc.calibrators]
+
+        if not hasattr(est, "estimators_"):             # XGBClassifier fold
+            members.append((_Booster(est), calibrators))
+            continue
+
+        x0 = np.zeros((1, est.n_features_in_), dtype=np.float32)
+        init = est._raw_predict_init(x0)[0]
+        groups = []
+        for k in range(est.estimators_.shape[1]):
+            start = len(trees)
+            trees.extend(e.tree_ for e in est.estimators_[:, k])
+            scales.extend([est.learning_rate] * est.estimators_.shape[0])
+            groups.append(_GBMGroup(start, len(trees), float(init[k])))
+        members.append((groups, calibrators))
+
+    return CompiledModel(
+        model.classes_, members,
+        trees=_TreeArrays(trees, scales) if trees else None,
+        mean=mean, scale=scale
+    )
+
+
+def compile_artifact(data, with_scaler=True):
+    """
+    Compile a joblib artifact dict ({"model", "scaler"?, ...}), by default
+    with its scaler folded in (with_scaler=False expects scaled inputs).
+    """
+    if not isinstance(data, dict):
+        return compile_model(data)
+    return compile_model(data["model"], data.get("scaler") if with_scaler else None)
+
+
+# ── Parity / speed check ──────────────────────────────────────────────────────
+if __name__ == "__main__":
+    import os, time, warnings
+    import joblib
+
+    warnings.filterwarnings("ignore")
+    ML_MODEL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    rng = np.random.default_rng(0)
+
+    artifacts = [
+        ("ECG",      "ECG/ECG_model.pkl"),
+        ("EEG",      "EEG/EEG_model.pkl"),
+        ("EMG",      "EMG/EMG_model.pkl"),
+        ("stroke",   "stroke/stroke_model.pkl"),
+        ("heart",    "heart/heart_model.pkl"),
+        ("diabetes", "diabetes/diabetes_model.pkl"),
+        ("meta",     "meta/meta_model.pkl"),
+    ]
+
+    print(f"{'model':10s} {'max |Δp|':>10s} {'sklearn 1-row':>14s} {'compiled 1-row':>15s} {'10k rows':>10s}")
+    for name, rel in artifacts:
+        path = os.path.join(ML_MODEL, rel)
+        if not os.path.exists(path):
+            print(f"{name:10s} (missing: {rel})")
+            continue
+        data = joblib.load(path)
+        model, scaler = data["model"], data.get("scaler")
+        compiled = compile_artifact(data)
+
+        n_features = model.n_features_in_
+        X = rng.normal(size=(10_000, n_features)) * 20 + 50
+        X_ref = scaler.transform(X) if scaler is not None else X
+
+        ref = model.predict_proba(X_ref)
+        out = compiled.predict_proba(X)
+        diff = float(np.max(np.abs(ref - out)))
+
+        t = time.perf_counter()
+        for i in range(50):
+            model.predict_proba(X_ref[i:i + 1])
+        t_ref = (time.perf_counter() - t) / 50
+
+        t = time.perf_counter()
+        for i in range(50):
+            compiled.predict_proba(X[i:i + 1])
+        t_cmp = (time.perf_counter() - t) / 50
+
+        t = time.perf_counter()
+        compiled.predict_proba(X)
+        t_bulk = time.perf_counter() - t
+
+        print(f"{name:10s} {diff:10.2e} {t_ref*1e3:11.2f} ms {t_cmp*1e3:12.2f} ms {t_bulk*1e3:7.1f} ms")
@@ -0,0 +1,211 @@
+"""
+Parallel, cached k-fold validation for the validate_*.py scripts
+================================================================
+cross_validate() runs repeated stratified k-fold CV of one model:
+
+  - Folds fit in parallel joblib (loky) processes; large arrays are
+    memory-mapped to the workers, not copied. Estimators with an unset
+    ``n_jobs`` (XGBoost, CalibratedClassifierCV) get the cores left per
+    worker.
+  - Repeat r uses StratifiedKFold(shuffle=True, random_state + r), so a
+    single repeat gives the same folds as the old hand-rolled loops.
+  - Fold assignments are cached by a hash of the labels and the split
+    settings; fitted fold models by a hash of the data, the unfitted
+    model, the fold and the library versions. Re-running unchanged
+    validation only predicts; changing the model refits, changing the
+    data re-splits.
+  - Every fold reports accuracy, ROC AUC (one-vs-rest macro for more
+    than two classes), Brier score, log-loss, fit / predict seconds and
+    whether the model came from the cache.
+
+``model`` is an estimator (cloned per fold) or a callable
+``model(y_train) -> estimator`` for settings that depend on the fold,
+e.g. scale_pos_weight.
+
+Usage (from a model folder, e.g. ML_Model/ECG/):
+    python validate_ecg.py                          # 5 folds
+    python validate_ecg.py --repeats 5 --jobs 4
+    python validate_ecg.py --no-cache
+
+    from utils.cross_validation import cross_validate
+    folds = cross_validate(model, X, y, n_splits=5, n_repeats=5)   # DataFrame, one row per fold
+"""
+import argparse
+import os
+import time
+from importlib import metadata
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, brier_score_loss, log_loss, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+ML_MODEL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ML_MODEL, ".cv_cache")
+METRICS = ("accuracy", "auc", "brier", "log_loss")
+_LIBRARIES = ("numpy", "scikit-learn", "xgboost")
+
+
+# ── Splits ────────────────────────────────────────────────────────────────────
+def fold_ids(y, n_splits=5, n_repeats=1, random_state=42, cache_dir=None):
+    """(n_repeats, n) int8 test-fold number of every row, cached by content."""
+    path = None
+    if cache_dir:
+        key = joblib.hash((np.asarray(y), n_splits, n_repeats, random_state))
+        path = os.path.join(cache_dir, "splits", f"{key}.npy")
+        if os.path.exists(path):
+            return np.load(path)
+
+    ids = np.empty((n_repeats, len(y)), dtype=np.int8)
+    for r in range(n_repeats):
+        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state + r)
+        for fold, (_, test) in enumerate(skf.split(np.zeros(len(y)), y)):
+            ids[r, test] = fold
+
+    if path:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.save(path + ".tmp.npy", ids)
+        os.replace(path + ".tmp.npy", path)
+    return ids
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+def scores(y_true, proba, classes):
+    """accuracy / auc / brier / log_loss of class probabilities."""
+    y_true = np.asarray(y_true)
+    onehot = (y_true[:, None] == classes[None, :]).astype(np.float64)
+    out = {"accuracy": accuracy_score(y_true, classes[np.argmax(proba, axis=1)])}
+    try:
+        if len(classes) == 2:
+            out["auc"] = roc_auc_score(y_true, proba[:, 1])
+        else:
+            out["auc"] = roc_auc_score(y_true, proba, multi_class="ovr", labels=classes)
+    except ValueError:                      # a class missing from the fold
+        out["auc"] = np.nan
+    if len(classes) == 2:
+        out["brier"] = brier_score_loss(onehot[:, 1], proba[:, 1])
+    else:
+        out["brier"] = float(np.mean(np.sum((proba - onehot) ** 2, axis=1)))
+    out["log_loss"] = log_loss(y_true, proba, labels=classes)
+    return out
+
+
+# ── Folds ─────────────────────────────────────────────────────────────────────
+def _versions():
+    out = []
+    for lib in _LIBRARIES:
+        try:
+            out.append(metadata.version(lib))
+        except metadata.PackageNotFoundError:
+            out.append(None)
+    return out
+
+
+def _set_threads(model, threads):
+    unset = {k: threads for k, v in model.get_params(deep=True).items()
+             if k.split("__")[-1] == "n_jobs" and v is None}
+    if unset:
+        model.set_params(**unset)
+    return model
+
+
+def _fold(model, X, y, ids, repeat, fold, data_key, cache_dir, threads):
+    test = ids[repeat] == fold
+    train = ~test
+    est = model(y[train]) if not hasattr(model, "fit") else clone(model)
+
+    path = None
+    if cache_dir:
+        key = joblib.hash((data_key, joblib.hash(ids[repeat]), fold, est, _versions()))
+        path = os.path.join(cache_dir, "models", f"{key}.joblib")
+
+    cached = bool(path) and os.path.exists(path)
+    start = time.perf_counter()
+    if cached:
+        est = joblib.load(path)
+    else:
+        _set_threads(est, threads).fit(X[train], y[train])
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            joblib.dump(est, path + ".tmp")
+            os.replace(path + ".tmp", path)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proba = est.predict_proba(X[test])
+    predict_s = time.perf_counter() - start
+    return {
+        "repeat": repeat, "fold": fold, "rows": int(test.sum()),
+        **scores(y[test], proba, np.asarray(est.classes_)),
+        "fit_s": round(fit_s, 3), "predict_s": round(predict_s, 3), "cached": cached,
+    }
+
+
+def _cpus():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def cross_validate(model, X, y, n_splits=5, n_repeats=1, random_state=42, n_jobs=None,
+                   cache=True, cache_dir=CACHE_DIR, title=None, verbose=True):
+    """Per-fold metrics of ``model`` on (X, y) as a DataFrame (see the module docstring)."""
+    X = np.asarray(X)
+    y = np.asarray(y)
+    cache_dir = cache_dir if cache else None
+    start = time.perf_counter()
+
+    ids = fold_ids(y, n_splits, n_repeats, random_state, cache_dir)
+    data_key = joblib.hash((X, y)) if cache_dir else None
+    tasks = [(r, f) for r in range(n_repeats) for f in range(n_splits)]
+    cpus = _cpus()
+    workers = min(n_jobs or cpus, len(tasks))
+    threads = max(1, cpus // workers)
+
+    rows = joblib.Parallel(n_jobs=workers)(
+        joblib.delayed(_fold)(model, X, y, ids, r, f, data_key, cache_dir, threads)
+        for r, f in tasks
+    )
+    folds = pd.DataFrame(rows)
+    folds.attrs["wall_s"] = time.perf_counter() - start
+    if verbose:
+        report(folds, title)
+    return folds
+
+
+def summarise(folds):
+    """{metric: (mean, std)} over all folds."""
+    return {m: (float(folds[m].mean()), float(folds[m].std(ddof=0))) for m in METRICS}
+
+
+def report(folds, title=None):
+    n_repeats = folds["repeat"].nunique()
+    n_splits = folds["fold"].nunique()
+    header = f"{title} " if title else ""
+    print(f"\n========== {header}{n_splits}-FOLD VALIDATION"
+          f"{f' x {n_repeats} REPEATS' if n_repeats > 1 else ''} ==========\n")
+    print(f"{'repeat':>6} {'fold':>4} {'rows':>9} {'accuracy':>9} {'auc':>7} {'brier':>7} "
+          f"{'log_loss':>8} {'fit_s':>7} {'pred_s':>7}")
+    for r in folds.itertuples():
+        print(f"{r.repeat + 1:>6} {r.fold + 1:>4} {r.rows:>9,} {r.accuracy:>9.4f} {r.auc:>7.4f} "
+              f"{r.brier:>7.4f} {r.log_loss:>8.4f} {r.fit_s:>7.2f} {r.predict_s:>7.2f}"
+              f"{'  (cached)' if r.cached else ''}")
+    print()
+    for metric, (mean, std) in summarise(folds).items():
+        print(f"Mean {metric + ':':<10} {mean:.4f} ± {std:.4f}")
+    wall = folds.attrs.get("wall_s")
+    print(f"\n{len(folds)} folds, {int(folds['cached'].sum())} from cache, "
+          f"{folds['fit_s'].sum():.1f}s of fitting"
+          f"{f' in {wall:.1f}s wall time' if wall is not None else ''}")
+
+
+def cv_arguments(description):
+    """The --folds / --repeats / --jobs / --no-cache options of the validate_*.py scripts."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=None, help="folds fitted at once (default: all CPUs)")
+    parser.add_argument("--no-cache", action="store_true", help=f"refit everything (cache: {CACHE_DIR})")
+    return parser.parse_args()
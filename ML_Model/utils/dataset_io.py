@@ -0,0 +1,217 @@
+"""
+Columnar binary datasets — memory-mapped loading with column projection
+=======================================================================
+A dataset is a directory next to (or instead of) its CSV:
+
+    heart_synthetic_10k.cols/
+        schema.json     {"version", "rows", "columns": [{"name", "dtype"}]}
+        000.bin ...     one raw little-endian array per column
+
+  - Types are compacted on write: integer columns (labels, flags) take
+    the smallest integer type that holds them (int8 for class labels),
+    float columns are stored as float32 (tree models split on float32
+    anyway) unless ``float_dtype=np.float64``.
+  - open_columns() memory-maps only the requested columns — nothing is
+    parsed and untouched columns are never read; read_columns() wraps
+    them in a DataFrame.
+  - ColumnWriter appends chunk by chunk (utils/synthetic.py writes .cols
+    output this way), widening an integer column if a later chunk needs
+    it; the directory appears atomically on close().
+
+read_dataset("x.csv", columns) is what the trainers and inspect_*.py
+scripts call: it loads x.cols when that is at least as new as x.csv (or
+the CSV is gone) and falls back to pd.read_csv(usecols=columns).
+
+Usage (from ML_Model/):
+    python utils/dataset_io.py data/synthetic/*.csv ECG/*.csv   # write x.cols next to each
+    python utils/dataset_io.py meta/meta_dataset_realistic_balanced.csv --float64
+
+    from utils.dataset_io import read_dataset, open_columns
+    df = read_dataset("../data/synthetic/heart_synthetic_10k.csv", ["BP", "HeartDisease"])
+    bp = open_columns("heart.cols", ["BP"])["BP"]            # np.memmap
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+SUFFIX = ".cols"
+SCHEMA = "schema.json"
+VERSION = 1
+CONVERT_CHUNK_ROWS = 1_000_000
+_INTS = (np.int8, np.int16, np.int32, np.int64)
+
+
+def columnar_path(path):
+    """x.csv → x.cols (paths already ending in .cols are returned as is)."""
+    root, ext = os.path.splitext(path)
+    return path if ext == SUFFIX else root + SUFFIX
+
+
+def _column_file(path, i):
+    return os.path.join(path, f"{i:03d}.bin")
+
+
+def _compact_dtype(values, float_dtype):
+    kind = values.dtype.kind
+    if kind == "b":
+        return np.dtype(np.bool_)
+    if kind in "iu":
+        lo, hi = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+        for t in _INTS:
+            info = np.iinfo(t)
+            if info.min <= lo and hi <= info.max:
+                return np.dtype(t).newbyteorder("<")
+        return np.dtype("<u8")
+    if kind == "f":
+        return np.dtype(float_dtype or values.dtype).newbyteorder("<")
+    raise TypeError(f"only numeric columns can be stored, got dtype {values.dtype}")
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+class ColumnWriter:
+    """Append DataFrames (same columns every time) to a new .cols dataset."""
+
+    def __init__(self, path, float_dtype=np.float32):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.float_dtype = float_dtype
+        self.columns = None
+        self.dtypes = []
+        self.rows = 0
+        if os.path.exists(self.tmp):
+            shutil.rmtree(self.tmp)
+        os.makedirs(self.tmp)
+
+    def append(self, frame):
+        frame = pd.DataFrame(frame)
+        if self.columns is None:
+            self.columns = [str(c) for c in frame.columns]
+            self.dtypes = [None] * len(self.columns)
+        elif [str(c) for c in frame.columns] != self.columns:
+            raise ValueError("every chunk must have the same columns")
+
+        for i, name in enumerate(self.columns):
+            values = frame.iloc[:, i].to_numpy()
+            dtype = _compact_dtype(values, self.float_dtype)
+            if self.dtypes[i] is None:
+                self.dtypes[i] = dtype
+            elif dtype != self.dtypes[i]:
+                self._widen(i, np.promote_types(self.dtypes[i], dtype).newbyteorder("<"))
+            with open(_column_file(self.tmp, i), "ab") as fh:
+                fh.write(values.astype(self.dtypes[i], copy=False).tobytes())
+        self.rows += len(frame)
+
+    def _widen(self, i, dtype):
+        if dtype == self.dtypes[i]:
+            return
+        path = _column_file(self.tmp, i)
+        old = np.fromfile(path, dtype=self.dtypes[i]) if os.path.exists(path) else np.empty(0)
+        old.astype(dtype).tofile(path)
+        self.dtypes[i] = dtype
+
+    def close(self):
+        schema = {
+            "version": VERSION,
+            "rows": self.rows,
+            "columns": [{"name": n, "dtype": d.str} for n, d in zip(self.columns or [], self.dtypes)],
+        }
+        with open(os.path.join(self.tmp, SCHEMA), "w") as fh:
+            json.dump(schema, fh, indent=1)
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp, self.path)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def write_columns(frame, path, float_dtype=np.float32):
+    """Write a whole DataFrame as a .cols dataset."""
+    with ColumnWriter(path, float_dtype) as writer:
+        writer.append(frame)
+    return path
+
+
+def convert(csv_path, out=None, chunk_rows=CONVERT_CHUNK_ROWS, float_dtype=np.float32):
+    """CSV → .cols, reading ``chunk_rows`` at a time."""
+    out = out or columnar_path(csv_path)
+    with ColumnWriter(out, float_dtype) as writer:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            writer.append(chunk)
+    return out
+
+
+# ── Reading ───────────────────────────────────────────────────────────────────
+def schema(path):
+    with open(os.path.join(path, SCHEMA)) as fh:
+        return json.load(fh)
+
+
+def open_columns(path, columns=None):
+    """{name: np.memmap (copy-on-write)} of the requested columns (all by default)."""
+    info = schema(path)
+    index = {c["name"]: (i, np.dtype(c["dtype"])) for i, c in enumerate(info["columns"])}
+    names = list(index) if columns is None else list(columns)
+    missing = [c for c in names if c not in index]
+    if missing:
+        raise KeyError(f"{path}: no column(s) {', '.join(missing)}")
+
+    out = {}
+    for name in names:
+        i, dtype = index[name]
+        if info["rows"] == 0:
+            out[name] = np.empty(0, dtype=dtype)
+        else:
+            out[name] = np.memmap(_column_file(path, i), dtype=dtype, mode="c", shape=(info["rows"],))
+    return out
+
+
+def read_columns(path, columns=None):
+    """DataFrame of the requested columns of a .cols dataset."""
+    return pd.DataFrame(open_columns(path, columns), copy=False)
+
+
+def read_dataset(path, columns=None):
+    """A dataset by its CSV name: the .cols copy when it is current, else the CSV."""
+    cols = columnar_path(path)
+    if os.path.exists(os.path.join(cols, SCHEMA)) and (
+        not os.path.exists(path) or path == cols
+        or os.path.getmtime(os.path.join(cols, SCHEMA)) >= os.path.getmtime(path)
+    ):
+        return read_columns(cols, columns)
+    return pd.read_csv(path, usecols=columns)[columns] if columns else pd.read_csv(path)
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Write a columnar .cols copy of CSV datasets.")
+    parser.add_argument("csv", nargs="+")
+    parser.add_argument("--float64", action="store_true", help="keep float columns as float64")
+    parser.add_argument("--chunk-rows", type=int, default=CONVERT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    for src in args.csv:
+        out = convert(src, chunk_rows=args.chunk_rows,
+                      float_dtype=np.float64 if args.float64 else np.float32)
+        size = sum(os.path.getsize(os.path.join(out, f)) for f in os.listdir(out))
+
+        t = time.perf_counter()
+        pd.read_csv(src)
+        t_csv = time.perf_counter() - t
+        t = time.perf_counter()
+        frame = read_columns(out)
+        t_cols = time.perf_counter() - t
+        print(f"{src}: {len(frame):,} rows, {os.path.getsize(src) / 1e6:.1f} → {size / 1e6:.1f} MB | "
+              f"load {t_csv * 1000:.0f} ms (csv) → {t_cols * 1000:.1f} ms (cols)")
@@ -0,0 +1,210 @@
+"""
+Feature specs shared by training and serving
+=============================================
+Every engineered feature the clinical, signal and meta models use,
+computed with NumPy from one float array of raw vitals:
+
+    raw = as_raw(rows)            # (n, 6) in RAW_COLUMNS order
+    heart_features(raw)           # (n, 10) in HEART_COLUMNS order
+    signal_features(raw)          # ECG / EEG / EMG inputs
+    meta_features(probs)          # (n, 12) in META_COLUMNS order
+
+The kernels are column-wise array expressions, so one row and ten
+million rows go through the same code. Each formula is written in the
+same operation order as the pandas version it replaces, so outputs are
+bit-identical to what the models were trained on.
+
+utils/preprocessing*.py are thin DataFrame wrappers around these
+kernels (the training scripts keep calling them); the serving paths
+call the kernels directly and never build a DataFrame.
+"""
+import numpy as np
+
+RAW_COLUMNS = ["BP", "HeartRate", "Glucose", "SpO2", "Sleep", "Steps"]
+BP, HEART_RATE, GLUCOSE, SPO2, SLEEP, STEPS = range(len(RAW_COLUMNS))
+
+HEART_COLUMNS = RAW_COLUMNS + [
+    "PulsePressure", "ActivityScore", "SleepDeficit", "CardioStressIndex"
+]
+DIABETES_COLUMNS = RAW_COLUMNS + [
+    "GlucoseStress", "ActivityScore", "SleepDeficit", "MetabolicIndex"
+]
+STROKE_COLUMNS = RAW_COLUMNS + [
+    "PulsePressure", "ActivityScore", "OxygenDeficit", "StrokeRiskIndex"
+]
+
+PROB_COLUMNS = [
+    "heart_prob", "diabetes_prob", "stroke_prob",
+    "ecg_prob", "eeg_prob", "emg_prob"
+]
+META_COLUMNS = PROB_COLUMNS + [
+    "static_risk", "ncm_index", "cardio_combined",
+    "neuro_combined", "metabolic_combined", "fatigue_index"
+]
+
+# static_risk weights (heart, diabetes, stroke, ecg, eeg) and
+# ncm_index weights (heart, diabetes, stroke, ecg, eeg, static_risk)
+META_WEIGHTS = {
+    # Meta dataset generators, train_meta_model.py, predict_full_pipeline.py
+    "pipeline": {
+        "static": (0.25, 0.25, 0.20, 0.15, 0.15),
+        "ncm":    (0.22, 0.22, 0.20, 0.14, 0.12, 0.10),
+    },
+    # main.py (served as-is; differs from what the meta model was trained on)
+    "api": {
+        "static": (0.30, 0.25, 0.20, 0.15, 0.10),
+        "ncm":    (0.25, 0.20, 0.20, 0.15, 0.10, 0.10),
+    },
+}
+
+
+# ── Input ─────────────────────────────────────────────────────────────────────
+def as_raw(X):
+    """
+    Raw vitals as a float64 (n, 6) array in RAW_COLUMNS order. Accepts an
+    array / list of rows, a DataFrame, a dict of columns or a list of dicts.
+    """
+    if hasattr(X, "columns"):                               # DataFrame
+        return X[RAW_COLUMNS].to_numpy(dtype=np.float64)
+    if isinstance(X, dict):
+        return np.column_stack([np.asarray(X[c], dtype=np.float64) for c in RAW_COLUMNS])
+    if len(X) and isinstance(X[0], dict):
+        return np.array([[row[c] for c in RAW_COLUMNS] for row in X], dtype=np.float64)
+    return np.asarray(X, dtype=np.float64).reshape(-1, len(RAW_COLUMNS))
+
+
+def _append(raw, *columns):
+    out = np.empty((raw.shape[0], raw.shape[1] + len(columns)))
+    out[:, :raw.shape[1]] = raw
+    for j, col in enumerate(columns):
+        out[:, raw.shape[1] + j] = col
+    return out
+
+
+# ── Clinical models ───────────────────────────────────────────────────────────
+def heart_features(raw):
+    raw = as_raw(raw)
+    bp, hr, glucose, spo2, sleep, steps = raw.T
+    return _append(
+        raw,
+        bp - 80,
+        steps / 1000,
+        8 - sleep,
+        0.02 * bp + 0.02 * hr + 0.01 * glucose - 0.04 * sleep,
+    )
+
+
+def diabetes_features(raw):
+    raw = as_raw(raw)
+    bp, hr, glucose, spo2, sleep, steps = raw.T
+    return _append(
+        raw,
+        glucose / 100,
+        steps / 1000,
+        8 - sleep,
+        0.05 * glucose + 0.02 * bp - 0.03 * sleep,
+    )
+
+
+def stroke_features(raw):
+    """Stroke features as served by main.py / predict_full_pipeline.py."""
+    raw = as_raw(raw)
+    bp, hr, glucose, spo2, sleep, steps = raw.T
+    return _append(
+        raw,
+        bp - bp * 0.5,
+        steps / 10000,
+        100 - spo2,
+        (0.4 * bp + 0.3 * hr + 0.3 * glucose) / 200,
+    )
+
+
+def api_stroke_features(raw):
+    """Stroke features as served by api/main.py (utils.preprocessing.preprocessing_stroke)."""
+    raw = as_raw(raw)
+    bp, hr, glucose, spo2, sleep, steps = raw.T
+    return _append(
+        raw,
+        bp - 80,
+        steps / 1000,
+        98 - spo2,
+        0.04 * bp + 0.03 * glucose - 0.2 * spo2,
+    )
+
+
+# ── Signal models ─────────────────────────────────────────────────────────────
+def signal_features(raw, clipped=True):
+    """
+    Two-feature inputs of ECG (heart_rate, hrv_sdnn), EEG (stress_ratio,
+    sleep_hours) and EMG (emg_rms, steps) derived from vitals.
+    clipped=True is predict_full_pipeline.py; clipped=False is main.py.
+    """
+    raw = as_raw(raw)
+    hr, sleep, steps = raw[:, HEART_RATE], raw[:, SLEEP], raw[:, STEPS]
+
+    if clipped:
+        hrv_sdnn     = np.clip(100 - hr * 0.5, 5, 80)
+        stress_ratio = np.clip(raw[:, BP] / hr, 0.5, 5.0)
+        emg_rms      = np.clip(steps / 10000, 0.01, 1.5)
+    else:
+        hrv_sdnn     = 100 - hr * 0.5
+        stress_ratio = raw[:, BP] / np.maximum(hr, 1)
+        emg_rms      = steps / 10000
+
+    return (
+        np.column_stack([hr, hrv_sdnn]),
+        np.column_stack([stress_ratio, sleep]),
+        np.column_stack([emg_rms, steps]),
+    )
+
+
+# ── Meta model ────────────────────────────────────────────────────────────────
+def meta_features(probs, weights="pipeline"):
+    """
+    (n, 12) meta-model input in META_COLUMNS order from the six base
+    probabilities (n, 6) in PROB_COLUMNS order.
+    """
+    probs = np.array(probs, dtype=np.float64, ndmin=2)
+    heart, diabetes, stroke, ecg, eeg, emg = probs.T
+    ws = META_WEIGHTS[weights]["static"]
+    wn = META_WEIGHTS[weights]["ncm"]
+
+    static_risk = (
+        ws[0] * heart + ws[1] * diabetes + ws[2] * stroke +
+        ws[3] * ecg + ws[4] * eeg
+    )
+    ncm_index = (
+        wn[0] * heart + wn[1] * diabetes + wn[2] * stroke +
+        wn[3] * ecg + wn[4] * eeg + wn[5] * static_risk
+    ) * 100
+
+    return _append(
+        probs,
+        static_risk,
+        ncm_index,
+        (heart + ecg) / 2,                  # cardio_combined
+        (stroke + eeg + emg) / 3,           # neuro_combined
+        (diabetes + static_risk) / 2,       # metabolic_combined
+        (emg + eeg) / 2,                    # fatigue_index
+    )
+
+
+def class_scores(meta):
+    """
+    Heuristic per-class scores (n, 9) from meta_features() output; column
+    index == disease class. Labels the generated meta dataset and backs
+    main.py's low-confidence fallback.
+    """
+    m = np.asarray(meta, dtype=np.float64)
+    static_risk = m[:, 6]
+    return np.column_stack([
+        m[:, 8],            # CHD          ← cardio_combined
+        m[:, 2],            # Stroke       ← stroke_prob
+        m[:, 1],            # Diabetes     ← diabetes_prob
+        static_risk,        # Hypertension
+        m[:, 3],            # Arrhythmia   ← ecg_prob
+        m[:, 10],           # Metabolic    ← metabolic_combined
+        m[:, 9],            # Neuro        ← neuro_combined
+        m[:, 11],           # Epilepsy     ← fatigue_index
+        1 - static_risk,    # Healthy
+    ])
@@ -0,0 +1,191 @@
+"""
+Exact decision-region lookup tables for the two-feature signal models
+======================================================================
+ECG (heart_rate, hrv_sdnn), EEG (stress_ratio, sleep_hours) and EMG
+(emg_rms, steps) are tree ensembles over two features, so every fold's
+calibrated output is piecewise constant on the grid formed by that
+fold's split thresholds. build_lookup() evaluates each fold once per
+grid cell (with sklearn itself, so values are bit-identical) and
+LookupTable.predict_proba() answers queries with two searchsorted
+calls and an index per table.
+
+Folds are merged into one dense grid when it fits ``max_bytes``
+(ECG, EMG); otherwise (EEG, ~3.5k thresholds per axis) the per-fold
+grids are kept and averaged at query time in CalibratedClassifierCV's
+order, which is still exact.
+
+Usage (from ML_Model/):
+    python utils/lookup_table.py          # build + verify ECG/EEG/EMG tables
+"""
+import os
+import numpy as np
+
+ML_MODEL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIGNAL_MODELS = ("ECG", "EEG", "EMG")
+DENSE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _representatives(thresholds):
+    """
+    One float32 value inside every cell (-inf, t0], (t0, t1], ..., (tn, inf).
+    Trees see float32 inputs and go left on ``x <= t``; a cell with no
+    float32 value in it can never be queried, so its value is irrelevant.
+    """
+    below = thresholds.astype(np.float32)
+    over = below > thresholds
+    below[over] = np.nextafter(below[over], np.float32(-np.inf))
+
+    last = np.float32(thresholds[-1]) if len(thresholds) else np.float32(0)
+    if len(thresholds) and last <= thresholds[-1]:
+        last = np.nextafter(last, np.float32(np.inf))
+    return np.append(below, last)
+
+
+def _split_thresholds(estimator, n_features=2):
+    found = [[] for _ in range(n_features)]
+    for tree in estimator.estimators_.ravel():
+        t = tree.tree_
+        split = t.children_left != -1
+        for f in range(n_features):
+            found[f].append(t.threshold[split & (t.feature == f)])
+    return [np.unique(np.concatenate(f)) for f in found]
+
+
+class LookupTable:
+    """
+    Calibrated class probabilities of a two-feature model on its split grid.
+
+    ``parts`` is a list of (thresholds_0, thresholds_1, grid) where grid has
+    shape (len(t0) + 1, len(t1) + 1, n_classes). One part = dense table;
+    several parts = per-fold tables averaged like CalibratedClassifierCV.
+    """
+
+    def __init__(self, classes, parts, mean=None, scale=None):
+        self.classes_ = np.asarray(classes)
+        self.parts = parts
+        self.mean = mean
+        self.scale = scale
+
+    @property
+    def nbytes(self):
+        return sum(t0.nbytes + t1.nbytes + g.nbytes for t0, t1, g in self.parts)
+
+    def _prepare(self, X):
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.mean is not None:
+            X -= self.mean
+            X /= self.scale
+        return X.astype(np.float32)
+
+    def predict_proba(self, X):
+        X32 = self._prepare(X)
+        if len(self.parts) == 1:
+            t0, t1, grid = self.parts[0]
+            return grid[np.searchsorted(t0, X32[:, 0]), np.searchsorted(t1, X32[:, 1])]
+
+        mean_proba = np.zeros((X32.shape[0], len(self.classes_)))
+        for t0, t1, grid in self.parts:
+            mean_proba += grid[np.searchsorted(t0, X32[:, 0]), np.searchsorted(t1, X32[:, 1])]
+        mean_proba /= len(self.parts)
+        return mean_proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ── persistence ──
+    def save(self, path):
+        arrays = {"classes": self.classes_, "n_parts": np.array(len(self.parts))}
+        if self.mean is not None:
+            arrays["mean"], arrays["scale"] = self.mean, self.scale
+        for i, (t0, t1, grid) in enumerate(self.parts):
+            arrays[f"t0_{i}"], arrays[f"t1_{i}"], arrays[f"grid_{i}"] = t0, t1, grid
+        with open(path, "wb") as fh:
+            np.savez(fh, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            parts = [(z[f"t0_{i}"], z[f"t1_{i}"], z[f"grid_{i}"])
+                     for i in range(int(z["n_parts"]))]
+            mean = z["mean"] if "mean" in z else None
+            scale = z["scale"] if "scale" in z else None
+            return cls(z["classes"], parts, mean, scale)
+
+
+def build_lookup(model, scaler=None, max_bytes=DENSE_MAX_BYTES):
+    """
+    Build the exact lookup table of a CalibratedClassifierCV over two
+    features. With ``scaler`` the table takes unscaled inputs.
+    """
+    if getattr(model, "n_features_in_", 2) != 2:
+        raise ValueError("Lookup tables only apply to two-feature models")
+    if not all(hasattr(cc.estimator, "estimators_") for cc in model.calibrated_classifiers_):
+        raise ValueError("Lookup tables need GradientBoosting folds (TRAIN_BACKEND=gbm)")
+
+    n_classes = len(model.classes_)
+    parts = []
+    for cc in model.calibrated_classifiers_:
+        t0, t1 = _split_thresholds(cc.estimator)
+        r0, r1 = _representatives(t0), _representatives(t1)
+        points = np.column_stack([np.repeat(r0, len(r1)), np.tile(r1, len(r0))])
+        grid = cc.predict_proba(points).reshape(len(r0), len(r1), n_classes)
+        parts.append((t0, t1, grid))
+
+    # Merge the folds into one grid over the union of thresholds if it fits
+    u0 = np.unique(np.concatenate([p[0] for p in parts]))
+    u1 = np.unique(np.concatenate([p[1] for p in parts]))
+    if (len(u0) + 1) * (len(u1) + 1) * n_classes * 8 <= max_bytes:
+        r0, r1 = _representatives(u0), _representatives(u1)
+        dense = np.zeros((len(r0), len(r1), n_classes))
+        for t0, t1, grid in parts:
+            dense += grid[np.searchsorted(t0, r0)[:, None], np.searchsorted(t1, r1)[None, :]]
+        dense /= len(parts)
+        parts = [(u0, u1, dense)]
+
+    mean  = None if scaler is None else np.asarray(scaler.mean_,  dtype=np.float64)
+    scale = None if scaler is None else np.asarray(scaler.scale_, dtype=np.float64)
+    return LookupTable(model.classes_, parts, mean, scale)
+
+
+def lookup_path(name):
+    return os.path.join(ML_MODEL, name, f"{name}_lookup.npz")
+
+
+# ── Build + verify ────────────────────────────────────────────────────────────
+if __name__ == "__main__":
+    import time, warnings
+    import joblib
+
+    warnings.filterwarnings("ignore")
+    rng = np.random.default_rng(0)
+
+    for name in SIGNAL_MODELS:
+        model_path = os.path.join(ML_MODEL, name, f"{name}_model.pkl")
+        if not os.path.exists(model_path):
+            print(f"{name}: no model at {model_path}, skipped")
+            continue
+        data = joblib.load(model_path)
+
+        t = time.perf_counter()
+        try:
+            table = build_lookup(data["model"], data["scaler"])
+        except ValueError as e:
+            print(f"{name}: {e}, skipped")
+            continue
+        t_build = time.perf_counter() - t
+        table.save(lookup_path(name))
+
+        # Random rows around the training range plus every grid threshold
+        X = data["scaler"].inverse_transform(rng.normal(size=(200_000, 2)) * 1.5)
+        ref = data["model"].predict_proba(data["scaler"].transform(X))
+        out = table.predict_proba(X)
+        exact = np.array_equal(ref, out)
+
+        t = time.perf_counter()
+        table.predict_proba(X)
+        t_query = time.perf_counter() - t
+
+        kind = "dense" if len(table.parts) == 1 else f"{len(table.parts)} folds"
+        print(f"{name}: {kind}, {table.nbytes / 1e6:.1f} MB, built in {t_build:.1f}s | "
+              f"exact={exact} | {len(X) / t_query / 1e6:.1f}M rows/s")
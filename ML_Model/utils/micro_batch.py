@@ -0,0 +1,106 @@
+"""
+Dynamic micro-batching for async endpoints
+===========================================
+Concurrent single-item requests are queued and scored together: the
+first request opens a window of ``window_ms`` milliseconds (closed early
+once ``max_batch_size`` items are waiting), then the whole batch goes
+through one call of the vectorised ``batch_fn`` in a worker thread and
+every waiter gets its own result back.
+
+Only one batch runs at a time, so requests arriving while a batch is
+being scored simply form the next batch. A lone request pays at most
+``window_ms`` of extra latency.
+
+Usage:
+    batcher = MicroBatcher(run_pipeline, max_batch_size=64, window_ms=2)
+    result = await batcher.submit(row)
+"""
+import asyncio
+import time
+
+
+class MicroBatcher:
+
+    def __init__(self, batch_fn, max_batch_size=64, window_ms=2.0):
+        """``batch_fn(items) -> results`` (same length and order)."""
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window = max(0.0, float(window_ms)) / 1000
+        self._loop = None
+        self._queue = None
+        self._full = None
+        self._worker = None
+
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.busy_seconds = 0.0
+
+    def _start(self):
+        # Queues are bound to an event loop; (re)start on the current one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._full = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        self._start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        # The worker already holds the batch's first item
+        if self._queue.qsize() >= self.max_batch_size - 1:
+            self._full.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+
+            if self.window and self._queue.qsize() < self.max_batch_size - 1:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Drop waiters that went away (client disconnected)
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if batch:
+                await self._score(batch)
+
+    async def _score(self, batch):
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await self._loop.run_in_executor(None, self.batch_fn, items)
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    def stats(self):
+        return {
+            "window_ms":       self.window * 1000,
+            "max_batch_size":  self.max_batch_size,
+            "batches":         self.batches,
+            "items":           self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch":   self.largest_batch,
+            "busy_seconds":    round(self.busy_seconds, 4),
+        }
@@ -0,0 +1,228 @@
+"""
+Process-wide model registry
+============================
+One place that loads the saved artifacts. Every entry point (main.py,
+api/main.py, meta/predict_full_pipeline.load_models, predict.py) asks
+the registry instead of calling joblib.load itself.
+
+  - Artifacts load lazily on first use and stay cached in process.
+  - Entries are keyed by (name, version); the version is the artifact
+    file's mtime + size, so a retrained model is picked up on the next
+    call without a restart, and loading it drops the older versions.
+  - Loads run outside the registry lock (one at a time per entry), so a
+    cold load never stalls requests for models that are already cached.
+  - Derived objects (compiled models, lookup tables) are cached as their
+    own entries under the version of the model they came from.
+  - Per-entry memory, load time and hit counts are reported by stats().
+  - With a memory budget (MODEL_MEMORY_BUDGET_MB env var or
+    ModelRegistry(memory_budget=...)) least-recently-used entries are
+    evicted once the budget is exceeded.
+
+Usage:
+    from utils.model_registry import registry
+
+    ecg = registry.get("ECG")            # {"model": ..., "scaler": ...}
+    fast = registry.compiled("stroke")   # utils.compiled_model.CompiledModel
+    table = registry.lookup("EEG")       # LookupTable or None
+    registry.fingerprint()               # changes whenever any artifact does
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+
+from utils.compiled_model import compile_artifact
+from utils.lookup_table import LookupTable, lookup_path
+
+ML_MODEL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> artifact path relative to ML_Model/
+ARTIFACTS = {
+    "heart":    os.path.join("heart",    "heart_model.pkl"),
+    "diabetes": os.path.join("diabetes", "diabetes_model.pkl"),
+    "stroke":   os.path.join("stroke",   "stroke_model.pkl"),
+    "ECG":      os.path.join("ECG",      "ECG_model.pkl"),
+    "EEG":      os.path.join("EEG",      "EEG_model.pkl"),
+    "EMG":      os.path.join("EMG",      "EMG_model.pkl"),
+    "meta":     os.path.join("meta",     "meta_model.pkl"),
+}
+
+
+def _nbytes(obj):
+    """Approximate in-memory size: ``nbytes`` if the object reports it, else its pickle size."""
+    size = getattr(obj, "nbytes", None)
+    if isinstance(size, int):
+        return size
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class _Entry:
+    def __init__(self, value, nbytes, load_seconds):
+        self.value = value
+        self.nbytes = nbytes
+        self.load_seconds = load_seconds
+        self.hits = 0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+
+    def __init__(self, root=ML_MODEL, memory_budget=None):
+        self.root = root
+        self.memory_budget = memory_budget      # bytes, None = unbounded
+        self._paths = dict(ARTIFACTS)
+        self._entries = OrderedDict()           # (name, version) -> _Entry, LRU first
+        self._lock = threading.RLock()
+        self._loading = {}                      # key -> threading.Lock held while it loads
+        self.evictions = 0
+        self.replaced = 0
+
+    # ── artifacts ──
+    def register(self, name, path):
+        """Add or repoint an artifact (path absolute or relative to ML_Model/)."""
+        with self._lock:
+            self._paths[name] = path
+
+    def path(self, name):
+        if name not in self._paths:
+            raise KeyError(f"Unknown model: {name!r} (known: {sorted(self._paths)})")
+        return os.path.join(self.root, self._paths[name])
+
+    def version(self, name):
+        """Version of the artifact currently on disk."""
+        path = self.path(name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Model not found at: {path}\n"
+                f"Run the training script in {os.path.dirname(path)} first."
+            )
+        st = os.stat(path)
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+    def fingerprint(self, names=None):
+        """Combined version of several artifacts (default: all registered)."""
+        names = sorted(self._paths) if names is None else names
+        versions = ",".join(f"{n}={self.version(n)}" for n in names)
+        return hashlib.blake2b(versions.encode(), digest_size=8).hexdigest()
+
+    def get(self, name):
+        """The loaded artifact (whatever joblib.load returns, usually a dict)."""
+        path = self.path(name)
+        return self._cached((name, self.version(name)), lambda: joblib.load(path))
+
+    def compiled(self, name, with_scaler=True):
+        """
+        utils.compiled_model.CompiledModel of an artifact, scaler folded in
+        unless with_scaler=False (the caller passes model-ready features).
+        """
+        suffix = "compiled" if with_scaler else "compiled-unscaled"
+        key = (f"{name}:{suffix}", self.version(name))
+        return self._cached(key, lambda: compile_artifact(self.get(name), with_scaler))
+
+    def lookup(self, name):
+        """Exact lookup table of ECG / EEG / EMG, or None if none is built for the current model."""
+        path = lookup_path(name)
+        if not os.path.exists(path):
+            return None
+        if os.path.getmtime(path) < os.path.getmtime(self.path(name)):
+            return None
+        st = os.stat(path)
+        key = (f"{name}:lookup", f"{st.st_mtime_ns:x}-{st.st_size:x}")
+        return self._cached(key, lambda: LookupTable.load(path))
+
+    # ── cache ──
+    def _hit(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.hits += 1
+            entry.last_used = time.time()
+            self._entries.move_to_end(key)
+        return entry
+
+    def _cached(self, key, loader):
+        with self._lock:
+            entry = self._hit(key)
+            if entry is not None:
+                return entry.value
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        with loading:
+            with self._lock:
+                entry = self._hit(key)      # loaded by the thread we waited for
+                if entry is not None:
+                    return entry.value
+            try:
+                start = time.perf_counter()
+                value = loader()
+                entry = _Entry(value, _nbytes(value), time.perf_counter() - start)
+                with self._lock:
+                    self._entries[key] = entry
+                    self._drop_replaced(key)
+                    self._evict(keep=key)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+        return entry.value
+
+    @staticmethod
+    def _mtime(version):
+        return int(version.split("-")[0], 16)
+
+    def _drop_replaced(self, key):
+        """Forget entries of the same name built from an older artifact."""
+        name, version = key
+        for old in [k for k in self._entries if k[0] == name and k != key]:
+            if self._mtime(old[1]) <= self._mtime(version):
+                del self._entries[old]
+                self.replaced += 1
+
+    def _evict(self, keep):
+        if self.memory_budget is None:
+            return
+        while self.total_bytes() > self.memory_budget:
+            victim = next((k for k in self._entries if k != keep), None)
+            if victim is None:
+                break
+            del self._entries[victim]
+            self.evictions += 1
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(e.nbytes for e in self._entries.values())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Per-entry memory / load time / usage, least recently used first."""
+        with self._lock:
+            return {
+                "memory_budget_bytes": self.memory_budget,
+                "total_bytes": self.total_bytes(),
+                "evictions": self.evictions,
+                "replaced": self.replaced,
+                "models": [
+                    {
+                        "name":         name,
+                        "version":      version,
+                        "bytes":        e.nbytes,
+                        "load_seconds": round(e.load_seconds, 4),
+                        "hits":         e.hits,
+                        "last_used":    e.last_used,
+                    }
+                    for (name, version), e in self._entries.items()
+                ],
+            }
+
+
+def _budget_from_env():
+    mb = os.environ.get("MODEL_MEMORY_BUDGET_MB")
+    return int(float(mb) * 1024 * 1024) if mb else None
+
+
+registry = ModelRegistry(memory_budget=_budget_from_env())
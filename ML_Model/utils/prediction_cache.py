@@ -0,0 +1,291 @@
+"""
+Tiered prediction cache
+========================
+Caches per-patient results keyed on the canonical input vector plus the
+version of the model set that produced them.
+
+  - Tier 1: in-process LRU with a TTL.
+  - Tier 2 (optional): a SQLite file shared by every worker process on
+    the host (``disk_path``), consulted on a tier-1 miss.
+  - Concurrent identical requests are coalesced: the first computes,
+    the rest wait for its result (or take over if it is cancelled).
+  - The model-set version (utils.model_registry fingerprint) is part of
+    every key, and tier 1 is dropped as soon as it changes, so a retrained
+    artifact is never answered from stale entries.
+
+Inputs are rounded to ``decimals`` places before keying, so 120, 120.0
+and 120.0000000001 share one entry.
+
+Usage:
+    cache = PredictionCache(lambda: registry.fingerprint(), ttl=300)
+    result = cache.get_or_compute(row, lambda: score(row))
+    result = await cache.aget_or_compute(row, lambda: batcher.submit(row))
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.features import RAW_COLUMNS
+
+
+class _Abandoned(Exception):
+    """The request computing a coalesced key was cancelled; waiters retry."""
+
+
+class PredictionCache:
+
+    def __init__(self, version_fn, max_entries=10_000, ttl=300.0,
+                 disk_path=None, decimals=6, columns=RAW_COLUMNS):
+        self.version_fn = version_fn
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.decimals = decimals
+        self.columns = list(columns)
+        self.disk_path = disk_path
+
+        self._entries = OrderedDict()       # key -> (expires, value), LRU first
+        self._inflight = {}                 # key -> concurrent.futures.Future
+        self._lock = threading.Lock()
+        self._version = None
+        self._local = threading.local()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            with self._db() as db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS predictions ("
+                    " key TEXT PRIMARY KEY, version TEXT, expires REAL, value TEXT)"
+                )
+
+    # ── keys ──
+    def key(self, row):
+        values = ",".join(f"{round(float(row[c]), self.decimals)!r}" for c in self.columns)
+        return f"{self._current_version()}|{values}"
+
+    def _current_version(self):
+        version = self.version_fn()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    if self._version is not None:
+                        self.invalidations += 1
+                    self._entries.clear()
+                    self._inflight.clear()
+                    self._version = version
+                    self._disk_prune(version)
+        return version
+
+    # ── tier 1 ──
+    def _memory_get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _memory_put(self, key, value, expires):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # ── tier 2 ──
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.disk_path, timeout=5.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _disk_get(self, key, now):
+        if not self.disk_path:
+            return None
+        row = self._db().execute(
+            "SELECT expires, value FROM predictions WHERE key = ? AND expires >= ?",
+            (self._disk_key(key), now)
+        ).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def _disk_put(self, key, value, expires):
+        if not self.disk_path:
+            return
+        with self._db() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (self._disk_key(key), self._version, expires, json.dumps(value))
+            )
+
+    def _disk_prune(self, version):
+        if not self.disk_path:
+            return
+        with self._db() as db:
+            db.execute(
+                "DELETE FROM predictions WHERE version != ? OR expires < ?",
+                (version, time.time())
+            )
+
+    @staticmethod
+    def _disk_key(key):
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    # ── lookup ──
+    def _lookup(self, key):
+        """(hit value, None) or (None, (future, owner))."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory_get(key, now)
+            if entry is not None:
+                self.hits += 1
+                return entry[1], None
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, (future, False)
+            future = concurrent.futures.Future()
+            self._inflight[key] = future
+
+        try:
+            entry = self._disk_get(key, now)
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        if entry is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self._memory_put(key, entry[1], entry[0])
+            self._finish(key, future, entry[1])
+            return entry[1], None
+
+        with self._lock:
+            self.misses += 1
+        return None, (future, True)
+
+    def _store(self, key, value):
+        if self.ttl <= 0:
+            return
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._memory_put(key, value, expires)
+        self._disk_put(key, value, expires)
+
+    def _finish(self, key, future, value=None, error=None):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if error is not None:
+            if not isinstance(error, Exception):    # cancelled / interrupted owner
+                error = _Abandoned()
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def get_or_compute(self, row, compute):
+        """Cached result for ``row`` (a mapping with ``columns``), else ``compute()``."""
+        while True:
+            key = self.key(row)
+            value, pending = self._lookup(key)
+            if pending is None:
+                return value
+            future, owner = pending
+            if owner:
+                break
+            try:
+                return future.result()
+            except _Abandoned:
+                continue
+        try:
+            value = compute()
+            self._store(key, value)
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    async def aget_or_compute(self, row, compute):
+        """Async get_or_compute; ``compute()`` returns an awaitable."""
+        while True:
+            key = self.key(row)
+            value, pending = self._lookup(key)
+            if pending is None:
+                return value
+            future, owner = pending
+            if owner:
+                break
+            try:
+                return await asyncio.wrap_future(future)
+            except _Abandoned:
+                continue
+        try:
+            value = await compute()
+            self._store(key, value)
+        except BaseException as exc:
+            self._finish(key, future, error=exc)
+            raise
+        self._finish(key, future, value)
+        return value
+
+    # ── housekeeping ──
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+        if self.disk_path:
+            with self._db() as db:
+                db.execute("DELETE FROM predictions")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version":       self._version,
+                "entries":       len(self._entries),
+                "max_entries":   self.max_entries,
+                "ttl_seconds":   self.ttl,
+                "disk_path":     self.disk_path,
+                "hits":          self.hits,
+                "disk_hits":     self.disk_hits,
+                "misses":        self.misses,
+                "coalesced":     self.coalesced,
+                "evictions":     self.evictions,
+                "expirations":   self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def cache_from_env(version_fn):
+    """
+    PredictionCache configured from PREDICTION_CACHE_SIZE (entries, 0 = off),
+    PREDICTION_CACHE_TTL_S, PREDICTION_CACHE_PATH (shared SQLite tier) and
+    PREDICTION_CACHE_DECIMALS. Returns None when disabled.
+    """
+    size = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+    if size <= 0:
+        return None
+    return PredictionCache(
+        version_fn,
+        max_entries=size,
+        ttl=float(os.environ.get("PREDICTION_CACHE_TTL_S", "300")),
+        disk_path=os.environ.get("PREDICTION_CACHE_PATH") or None,
+        decimals=int(os.environ.get("PREDICTION_CACHE_DECIMALS", "6")),
+    )
@@ -1,28 +1,18 @@
+from utils.features import (
+    RAW_COLUMNS, HEART_COLUMNS, STROKE_COLUMNS,
+    heart_features, api_stroke_features
+)
+
+# Formulas live in utils/features.py; these add them to a DataFrame in place
+
 def preprocess_heart(df):
     # Derived medical features
-    df["PulsePressure"] = df["BP"] - 80
-    df["ActivityScore"] = df["Steps"] / 1000
-    df["SleepDeficit"] = 8 - df["Sleep"]
-
-    df["CardioStressIndex"] = (
-        0.02 * df["BP"] +
-        0.02 * df["HeartRate"] +
-        0.01 * df["Glucose"] -
-        0.04 * df["Sleep"]
-    )
+    df[HEART_COLUMNS[len(RAW_COLUMNS):]] = heart_features(df)[:, len(RAW_COLUMNS):]
 
     return df
 
 def preprocessing_stroke(df):
 
-    df["PulsePressure"] = df["BP"] - 80
-    df["ActivityScore"] = df["Steps"] / 1000
-    df["OxygenDeficit"] = 98 - df["SpO2"]
+    df[STROKE_COLUMNS[len(RAW_COLUMNS):]] = api_stroke_features(df)[:, len(RAW_COLUMNS):]
 
-    df["StrokeRiskIndex"] = (
-        0.04 * df["BP"] +
-        0.03 * df["Glucose"] -
-        0.2 * df["SpO2"]
-    )
-
-    return df
\ No newline at end of file
+    return df
@@ -1,12 +1,7 @@
+from utils.features import RAW_COLUMNS, DIABETES_COLUMNS, diabetes_features
+
 def preprocess_diabetes(df):
 
-    df["GlucoseStress"] = df["Glucose"] / 100
-    df["ActivityScore"] = df["Steps"] / 1000
-    df["SleepDeficit"] = 8 - df["Sleep"]
-    df["MetabolicIndex"] = (
-        0.05 * df["Glucose"] +
-        0.02 * df["BP"] -
-        0.03 * df["Sleep"]
-    )
+    df[DIABETES_COLUMNS[len(RAW_COLUMNS):]] = diabetes_features(df)[:, len(RAW_COLUMNS):]
 
-    return df
\ No newline at end of file
+    return df
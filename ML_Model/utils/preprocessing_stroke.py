@@ -1,14 +1,7 @@
-import pandas as pd
+from utils.features import RAW_COLUMNS, STROKE_COLUMNS, stroke_features
 
 def preprocess_stroke(df):
 
-    df["PulsePressure"] = df["BP"] - df["BP"] * 0.5
-    df["ActivityScore"] = df["Steps"] / 10000
-    df["OxygenDeficit"] = 100 - df["SpO2"]
-    df["StrokeRiskIndex"] = (
-        0.4 * df["BP"] +
-        0.3 * df["HeartRate"] +
-        0.3 * df["Glucose"]
-    ) / 200
+    df[STROKE_COLUMNS[len(RAW_COLUMNS):]] = stroke_features(df)[:, len(RAW_COLUMNS):]
 
-    return df
\ No newline at end of file
+    return df
@@ -0,0 +1,324 @@
+"""
+Raw biosignal features for the ECG / EEG / EMG models
+======================================================
+Turns sample arrays as Hardware_Backend stores them (rawData.ecg / eeg /
+emg, flushed in 100-sample chunks) into the two-feature inputs of the
+signal models and scores them.
+
+  ECG  raw ADC samples (0-1023) → R-peaks (ECG/hrv.py, vectorised
+       Pan-Tompkins over all recordings) → heart_rate, hrv_sdnn
+       (also hrv_rmssd and pnn50 in the response)
+  EEG  with eeg_fs set: Welch PSD per chunk (EEG/spectral.py) → beta
+       (13-30 Hz) / alpha (8-13 Hz) power ratio. Without it the samples are the
+       backend's focus index x 100 (one per second), and the ratio is
+       mean(focus).
+  EMG  backend level x 10 → RMS per chunk (EMG/envelope.py) → model units
+       with emg_model_units(), the rule of computeEmgRms in
+       lib/ncm-engine.ts
+
+All recordings in a request are cut into 100-sample chunks and stacked
+into one matrix, so Welch and RMS run as single batched calls;
+per-recording results are reduced with np.bincount.
+
+Every chunk first goes through the signal-quality gate
+(utils/signal_quality.py); rejected chunks never reach the extractors
+(ECG is analysed as the runs of clean chunks between them). A sensor
+whose chunks are all rejected is left out: its probability is None, its
+state "Poor Signal Quality", and the NCM index is re-weighted over the
+remaining sensors ("Insufficient Signal Quality" when none remain).
+
+When ECG has too few beats, heart_rate samples (bpm) stand in, as in
+web/frontend/my-app/lib/ncm-engine.ts. The response fields match what
+that client reads from /predict-raw.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from ECG.hrv import hrv_panel, pad_recordings
+from EEG.spectral import SpectralEngine
+from EMG.envelope import pad_sessions, windowed_rms
+from utils.model_registry import registry
+from utils.signal_quality import assess
+
+CHUNK = 100                 # samples per Hardware_Backend flush
+ECG_FS = 100.0              # Hz, default ECG sampling rate
+EMG_RMS_SCALE = 25.0        # backend EMG units per model RMS unit
+EMG_RAW_ABOVE = 5.0         # RMS above this is in backend units, at or below already model units
+EMG_RMS_RANGE = (0.05, 2.0)  # model-unit RMS is clipped to this range
+ALPHA_BAND = (8.0, 13.0)
+BETA_BAND = (13.0, 30.0)
+
+# Second model input when the request does not carry it
+DEFAULT_SLEEP_HOURS = 7.0
+DEFAULT_STEPS = 6000.0
+
+# Fallbacks when a signal is missing (same as lib/ncm-engine.ts)
+DEFAULT_HEART_RATE = 72.0
+DEFAULT_HRV_SDNN = 50.0
+DEFAULT_STRESS_RATIO = 1.0
+DEFAULT_EMG_RMS = 0.3
+
+# README: NCM index = ECG 40% + EEG 35% + EMG 25%
+NCM_WEIGHTS = (0.40, 0.35, 0.25)
+
+
+# ── Chunking ──────────────────────────────────────────────────────────────────
+def _chunk_matrix(recordings):
+    """
+    Stack every recording's 100-sample chunks into one (n_chunks, CHUNK)
+    matrix (last partial chunk NaN-padded) and return it with the
+    recording index of each row.
+    """
+    blocks, owner = [], []
+    for i, x in enumerate(recordings):
+        x = np.asarray(x, dtype=np.float64)
+        n = -(-len(x) // CHUNK)
+        if n == 0:
+            continue
+        padded = np.full(n * CHUNK, np.nan)
+        padded[:len(x)] = x
+        blocks.append(padded.reshape(n, CHUNK))
+        owner.append(np.full(n, i))
+    if not blocks:
+        return np.empty((0, CHUNK)), np.empty(0, dtype=int)
+    return np.vstack(blocks), np.concatenate(owner)
+
+
+def _per_recording(values, owner, n, weights=None):
+    """Weighted mean of per-chunk values for each recording (NaN where none)."""
+    w = np.ones_like(values) if weights is None else weights
+    num = np.bincount(owner, weights=values * w, minlength=n)
+    den = np.bincount(owner, weights=w, minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def _gate(recordings, sensor, fs=None):
+    """
+    Chunk matrix, owner and accepted mask of the recordings' chunks, plus
+    per-recording quality counts {"windows", "rejected"}.
+    """
+    X, owner = _chunk_matrix(recordings)
+    n = len(recordings)
+    ok = assess(X, sensor, fs)["ok"] if len(X) else np.ones(0, dtype=bool)
+    quality = {
+        "windows":  np.bincount(owner, minlength=n),
+        "rejected": np.bincount(owner[~ok], minlength=n),
+    }
+    return X, owner, ok, quality
+
+
+# ── ECG ───────────────────────────────────────────────────────────────────────
+def _looks_like_bpm(x):
+    return len(x) > 0 and np.all((x >= 30) & (x <= 220))
+
+
+def ecg_features(ecg_recordings, heart_rate_recordings, fs=ECG_FS):
+    """(heart_rate, hrv_sdnn, hrv_rmssd, pnn50, quality) per recording."""
+    ecg = [np.asarray(r, dtype=np.float64) for r in ecg_recordings]
+
+    # CSV uploads store bpm under "ecg": never gate or run peak detection on those
+    as_bpm = np.array([_looks_like_bpm(x) for x in ecg], dtype=bool)
+    X, owner, ok, quality = _gate([np.empty(0) if b else x for x, b in zip(ecg, as_bpm)], "ecg", fs)
+
+    # Each run of consecutive accepted chunks is one row; R-R intervals
+    # never bridge a rejected chunk, statistics are pooled per recording
+    rows = np.flatnonzero(ok)
+    start = np.ones(len(rows), dtype=bool)
+    start[1:] = (np.diff(rows) > 1) | (owner[rows[1:]] != owner[rows[:-1]])
+    bounds = np.append(np.flatnonzero(start), len(rows))
+    runs, lengths = pad_recordings([X[rows[a:b]].ravel() for a, b in zip(bounds[:-1], bounds[1:])])
+    panel = hrv_panel(runs, fs, lengths, groups=owner[rows[start]], n_groups=len(ecg))
+
+    detected = ~np.isnan(panel["sdnn"])
+    hr = np.where(detected, panel["heart_rate"], DEFAULT_HEART_RATE)
+    sdnn = np.where(detected, panel["sdnn"], DEFAULT_HRV_SDNN)
+
+    for i in np.flatnonzero(~detected):
+        # Not enough beats: derive RR from bpm samples instead
+        bpm = np.asarray(heart_rate_recordings[i], dtype=np.float64)
+        if len(bpm) == 0 and as_bpm[i]:
+            bpm = ecg[i]
+        if len(bpm) == 0:
+            continue
+        hr[i] = bpm.mean()
+        if len(bpm) >= 2:
+            sdnn[i] = np.std(60000 / np.maximum(bpm, 30), ddof=1)
+
+    return hr, sdnn, panel["rmssd"], panel["pnn50"], quality
+
+
+# ── EEG ───────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=8)
+def _eeg_engine(fs):
+    # One Welch segment per chunk, as the backend flushes
+    return SpectralEngine(fs, window_s=CHUNK / fs, nperseg=CHUNK, noverlap=0,
+                          bands={"alpha": ALPHA_BAND, "beta": BETA_BAND})
+
+
+def eeg_stress_ratio(eeg_recordings, fs=None):
+    """(beta/alpha power ratio, quality) per recording (focus index without ``fs``)."""
+    n = len(eeg_recordings)
+    X, owner, ok, quality = _gate(eeg_recordings, "eeg", fs)
+
+    if fs is None:
+        X, owner = X[ok], owner[ok]
+        ratio = _per_recording(np.nanmean(X, axis=1) / 100, owner, n,
+                               weights=np.sum(~np.isnan(X), axis=1).astype(float))
+    else:
+        # Welch runs on full chunks only
+        keep = ok & ~np.isnan(X).any(axis=1)
+        X, owner = X[keep], owner[keep]
+        ratio = np.full(n, np.nan)
+        if len(X):
+            powers = _eeg_engine(float(fs)).segment_band_powers(X)[:, 0, :]
+            alpha, beta = powers[:, 0], powers[:, 1]
+            a = np.bincount(owner, weights=alpha, minlength=n)
+            b = np.bincount(owner, weights=beta, minlength=n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ratio = np.where(a > 0, b / a, np.nan)
+
+    return np.where(np.isnan(ratio), DEFAULT_STRESS_RATIO, ratio), quality
+
+
+# ── EMG ───────────────────────────────────────────────────────────────────────
+def emg_model_units(rms):
+    """
+    RMS in the EMG model's units, exactly as computeEmgRms in
+    lib/ncm-engine.ts: values above EMG_RAW_ABOVE are backend units and
+    are divided by EMG_RMS_SCALE, smaller ones are taken as model units;
+    the result is clipped to EMG_RMS_RANGE. NaN stays NaN.
+    """
+    rms = np.asarray(rms, dtype=np.float64)
+    return np.clip(np.where(rms > EMG_RAW_ABOVE, rms / EMG_RMS_SCALE, rms), *EMG_RMS_RANGE)
+
+
+def emg_rms(emg_recordings):
+    """(mean per-chunk RMS in model units, quality) per recording."""
+    _, owner, ok, quality = _gate(emg_recordings, "emg")
+    X, lengths = pad_sessions([np.asarray(r, dtype=np.float64) for r in emg_recordings])
+    rms, counts = windowed_rms(X, CHUNK, lengths)
+
+    # RMS windows are the same chunks: rejected ones carry no weight
+    within = np.arange(len(owner)) - np.searchsorted(owner, owner)
+    counts[owner[~ok], within[~ok]] = 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(rms * counts, axis=1) / counts.sum(axis=1)
+    return np.where(np.isnan(mean), DEFAULT_EMG_RMS, emg_model_units(mean)), quality
+
+
+# ── Scoring ───────────────────────────────────────────────────────────────────
+def _signal_model(name):
+    table = registry.lookup(name)
+    return table if table is not None else registry.compiled(name)
+
+
+def _state(p, high, low):
+    return np.where(np.isnan(p), "Poor Signal Quality", np.where(p > 0.5, high, low))
+
+
+def _predict(name, X, rows, column):
+    """One probability column for the ``rows`` that have usable input (NaN elsewhere)."""
+    p = np.full(len(X), np.nan)
+    if rows.any():
+        p[rows] = _signal_model(name).predict_proba(X[rows])[:, column]
+    return p
+
+
+def _round(x, digits):
+    return None if np.isnan(x) else round(float(x), digits)
+
+
+def score_features(heart_rate, hrv_sdnn, stress_ratio, emg_rms, sleep, steps, usable=None):
+    """
+    Model probabilities and NCM summary from per-recording feature arrays
+    (also used by utils/streaming_features.py). One dict per row.
+    ``usable`` (ecg, eeg, emg masks) leaves sensors out of a row.
+    """
+    heart_rate, hrv_sdnn, stress_ratio, rms, sleep, steps = (
+        np.atleast_1d(np.asarray(a, dtype=np.float64))
+        for a in (heart_rate, hrv_sdnn, stress_ratio, emg_rms, sleep, steps)
+    )
+    n = len(heart_rate)
+    use_ecg, use_eeg, use_emg = (np.ones((3, n), dtype=bool) if usable is None
+                                 else np.broadcast_to(np.asarray(usable, dtype=bool), (3, n)))
+
+    cardiac_prob = _predict("ECG", np.column_stack([heart_rate, hrv_sdnn]), use_ecg, 1)
+    stress_prob = 1 - _predict("EEG", np.column_stack([stress_ratio, sleep]), use_eeg, 0)
+    fatigue_prob = _predict("EMG", np.column_stack([rms, steps]), use_emg, 1)
+
+    # Weights re-normalised over the sensors each row has
+    probs = np.column_stack([cardiac_prob, stress_prob, fatigue_prob])
+    weights = np.where(np.isnan(probs), 0.0, NCM_WEIGHTS)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ncm_index = np.nansum(probs * weights, axis=1) / weights.sum(axis=1) * 100
+
+    systemic_flag = np.select(
+        [(stress_prob > 0.7) & (fatigue_prob > 0.7), (cardiac_prob > 0.6) & (stress_prob > 0.6)],
+        ["Chronic Stress + Fatigue Risk", "Autonomic Overload Risk"],
+        default="Stable"
+    )
+    risk_category = np.select(
+        [np.isnan(ncm_index), ncm_index < 25, ncm_index < 50, ncm_index < 75],
+        ["Insufficient Signal Quality", "Low", "Moderate", "High"],
+        default="Critical"
+    )
+    cardiac_state = _state(cardiac_prob, "High Cardiac Risk", "Normal Cardiac")
+    stress_state = _state(stress_prob, "High Stress", "Relaxed")
+    muscle_state = _state(fatigue_prob, "Muscle Fatigue", "Normal Muscle")
+
+    return [
+        {
+            "heart_rate":    round(float(heart_rate[i]), 2) if use_ecg[i] else None,
+            "hrv_sdnn":      round(float(hrv_sdnn[i]), 2) if use_ecg[i] else None,
+            "stress_ratio":  round(float(stress_ratio[i]), 4) if use_eeg[i] else None,
+            "emg_rms":       round(float(rms[i]), 4) if use_emg[i] else None,
+            "cardiac_prob":  _round(cardiac_prob[i], 4),
+            "cardiac_state": str(cardiac_state[i]),
+            "stress_prob":   _round(stress_prob[i], 4),
+            "stress_state":  str(stress_state[i]),
+            "fatigue_prob":  _round(fatigue_prob[i], 4),
+            "muscle_state":  str(muscle_state[i]),
+            "ncm_index":     _round(ncm_index[i], 2),
+            "systemic_flag": str(systemic_flag[i]),
+            "risk_category": str(risk_category[i]),
+        }
+        for i in range(n)
+    ]
+
+
+def score_recordings(recordings, ecg_fs=ECG_FS, eeg_fs=None):
+    """
+    Features, model probabilities and NCM summary for a list of
+    recordings (dicts with heart_rate / ecg / eeg / emg arrays and
+    optional sleep / steps). One dict per recording.
+    """
+    n = len(recordings)
+    if n == 0:
+        return []
+
+    get = lambda key: [r.get(key) if r.get(key) is not None else [] for r in recordings]
+    heart_rate, hrv_sdnn, rmssd, pnn50, ecg_q = ecg_features(get("ecg"), get("heart_rate"), ecg_fs)
+    stress_ratio, eeg_q = eeg_stress_ratio(get("eeg"), eeg_fs)
+    rms, emg_q = emg_rms(get("emg"))
+    quality = {"ecg": ecg_q, "eeg": eeg_q, "emg": emg_q}
+
+    # A sensor with data but no accepted chunk is left out; one without
+    # data keeps the defaults, as before
+    usable = [(q["windows"] == 0) | (q["rejected"] < q["windows"]) for q in quality.values()]
+
+    sleep = np.array([r.get("sleep") if r.get("sleep") is not None else DEFAULT_SLEEP_HOURS
+                      for r in recordings], dtype=np.float64)
+    steps = np.array([r.get("steps") if r.get("steps") is not None else DEFAULT_STEPS
+                      for r in recordings], dtype=np.float64)
+
+    results = score_features(heart_rate, hrv_sdnn, stress_ratio, rms, sleep, steps, usable)
+    for i, r in enumerate(results):
+        r["hrv_rmssd"] = _round(rmssd[i], 2)
+        r["pnn50"] = _round(pnn50[i], 2)
+        r["signal_quality"] = {
+            sensor: {"windows": int(q["windows"][i]), "rejected": int(q["rejected"][i])}
+            for sensor, q in quality.items()
+        }
+    return results
@@ -0,0 +1,125 @@
+"""
+Diagnosis priority rules as ordered decision tables
+====================================================
+Each rule is (name, target class, conditions); a condition is
+(feature, operator, threshold) and all of a rule's conditions must hold.
+Rules are checked top to bottom and the first match wins, exactly like
+the if/elif chains they replace. Rows no rule matches keep the meta
+model's class.
+
+DecisionTable.evaluate() turns every rule into a NumPy mask over the
+whole batch, so one call scores N patients and also returns, per row,
+the index of the rule that fired (NO_RULE when none did).
+
+Features are looked up by name in a dict of arrays (``context``):
+base probabilities (heart_prob, diabetes_prob, stroke_prob, ecg_prob,
+eeg_prob, eeg_epilepsy_prob, emg_prob), meta features (static_risk,
+cardio_combined, ...) and raw vitals (BP, Glucose, SpO2, ...).
+
+Usage:
+    from utils.rules import PIPELINE_RULES
+    final_class, fired = PIPELINE_RULES.evaluate(context, meta_class)
+    PIPELINE_RULES.names[fired[0]]
+"""
+import operator
+
+import numpy as np
+
+NO_RULE = -1
+
+_OPERATORS = {
+    ">":  operator.gt,
+    ">=": operator.ge,
+    "<":  operator.lt,
+    "<=": operator.le,
+}
+
+
+class DecisionTable:
+
+    def __init__(self, rules):
+        for name, target, conditions in rules:
+            for feature, op, threshold in conditions:
+                if op not in _OPERATORS:
+                    raise ValueError(f"Rule {name!r}: unknown operator {op!r}")
+        self.rules = list(rules)
+        self.names = [name for name, _, _ in self.rules]
+        self.targets = np.array([target for _, target, _ in self.rules])
+        self.features = sorted({f for _, _, conds in self.rules for f, _, _ in conds})
+
+    def masks(self, context):
+        """(n_rules, n_rows) boolean matrix: does rule i hold for row j."""
+        missing = [f for f in self.features if f not in context]
+        if missing:
+            raise KeyError(f"Rule features missing from context: {missing}")
+        columns = {f: np.asarray(context[f]) for f in self.features}
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+
+        out = np.empty((len(self.rules), n_rows), dtype=bool)
+        for i, (_, _, conditions) in enumerate(self.rules):
+            mask = np.ones(n_rows, dtype=bool)
+            for feature, op, threshold in conditions:
+                mask &= _OPERATORS[op](columns[feature], threshold)
+            out[i] = mask
+        return out
+
+    def evaluate(self, context, default):
+        """
+        (final_class, fired): the first matching rule's class per row
+        (``default`` where none match) and that rule's index / NO_RULE.
+        """
+        masks = self.masks(context)
+        matched = masks.any(axis=0)
+        fired = np.where(matched, np.argmax(masks, axis=0), NO_RULE)
+        final = np.where(matched, self.targets[np.maximum(fired, 0)], default)
+        return final, fired
+
+    def describe(self, fired):
+        """Rule name for each fired index (None where no rule fired)."""
+        return [self.names[i] if i != NO_RULE else None for i in np.asarray(fired).ravel()]
+
+
+# ── meta/predict_full_pipeline.py (eeg_prob = EEG neuro probability) ─────────
+PIPELINE_RULES = DecisionTable([
+    # LEVEL 1 — Life threatening
+    # Stroke requires BOTH high probability AND vascular indicators (not just
+    # glucose); high glucose alone = diabetes, not stroke
+    ("stroke_low_o2",      1, [("stroke_prob", ">", 0.85), ("BP", ">", 150), ("SpO2", "<", 97)]),
+    ("stroke_very_high_bp", 1, [("stroke_prob", ">", 0.90), ("BP", ">", 165)]),
+    ("chd",                0, [("heart_prob", ">", 0.88), ("ecg_prob", ">", 0.75)]),
+
+    # LEVEL 2 — Metabolic
+    # Diabetes wins if glucose is the dominant elevated feature
+    ("diabetes",           2, [("diabetes_prob", ">", 0.85), ("Glucose", ">", 180), ("BP", "<", 160)]),
+    ("metabolic_syndrome", 5, [("metabolic_combined", ">", 0.80), ("Glucose", ">", 140)]),
+    ("hypertension",       3, [("BP", ">", 175), ("stroke_prob", ">", 0.60)]),
+
+    # LEVEL 3 — Signal dominant
+    ("arrhythmia",         4, [("ecg_prob", ">", 0.92), ("stroke_prob", "<", 0.75),
+                               ("heart_prob", "<", 0.75)]),
+    ("epilepsy",           7, [("eeg_epilepsy_prob", ">", 0.85), ("emg_prob", ">", 0.65),
+                               ("stroke_prob", "<", 0.75)]),
+    ("neuro_disorder",     6, [("neuro_combined", ">", 0.80), ("stroke_prob", "<", 0.75)]),
+
+    # LEVEL 4 — Healthy
+    ("healthy",            8, [("static_risk", "<", 0.25),
+                               ("heart_prob", "<", 0.35), ("diabetes_prob", "<", 0.35),
+                               ("stroke_prob", "<", 0.50), ("ecg_prob", "<", 0.35),
+                               ("eeg_prob", "<", 0.35), ("emg_prob", "<", 0.35)]),
+
+    # LEVEL 5 — Meta fallback (no rule)
+])
+
+
+# ── main.py ───────────────────────────────────────────────────────────────────
+API_RULES = DecisionTable([
+    ("stroke",     1, [("stroke_prob", ">", 0.90), ("BP", ">", 170)]),
+    ("diabetes",   2, [("diabetes_prob", ">", 0.90), ("Glucose", ">", 200)]),
+    ("chd",        0, [("heart_prob", ">", 0.85), ("ecg_prob", ">", 0.85)]),
+    ("arrhythmia", 4, [("ecg_prob", ">", 0.92), ("heart_prob", "<", 0.70)]),
+    ("epilepsy",   7, [("eeg_prob", ">", 0.90), ("emg_prob", ">", 0.75)]),
+    ("healthy",    8, [("static_risk", "<", 0.20),
+                       ("heart_prob", "<", 0.40), ("diabetes_prob", "<", 0.40),
+                       ("stroke_prob", "<", 0.40), ("ecg_prob", "<", 0.40),
+                       ("eeg_prob", "<", 0.40), ("emg_prob", "<", 0.40)]),
+])
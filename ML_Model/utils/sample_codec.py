@@ -0,0 +1,285 @@
+"""
+Compact codec for raw ECG / EEG / EMG sample arrays
+====================================================
+Sensor samples change slowly from one to the next (ECG is a 10-bit ADC
+value, sample_data/*.csv values have two decimals), so they are stored
+as bit-packed deltas instead of float32 / float64 or JSON text:
+
+  1. quantise   values → int64: the fewest decimals (0-6) that give the
+                values back exactly, or a fixed ``decimals`` (rounding,
+                e.g. timestamps to the microsecond); values no decimal
+                scale reproduces (NaN, arbitrary floats) keep their raw
+                IEEE bits
+  2. blocks     BLOCK (128) samples each, the last one padded
+  3. delta      per block: first value, then the 127 differences minus
+                their minimum (frame of reference), so every packed
+                number is >= 0 — signed and monotone deltas need no
+                zigzag step
+  4. bit-pack   each block's deltas at the block's own bit width; blocks
+                of the same width are stored together and packed in one
+                go (whole bytes as they are, the leftover bits of every
+                8 values merged into bytes), so encode / decode are a few
+                array passes over the whole input
+
+The block index (first value, minimum delta, bit width) sits in front of
+the payload, so any block — and any sample range — decodes on its own
+(PackedArray). Encoding and decoding run at hundreds of MB/s.
+
+Layout (little-endian):
+    header   magic "NCMP", version, decimals (-1 = raw bits), dtype,
+             block, n_samples, n_blocks
+    index    first int64[n_blocks], dmin int64[n_blocks], width uint8[n_blocks]
+    payload  block b: BLOCK/8 * width[b] bytes, blocks grouped by width
+
+Usage:
+    from utils.sample_codec import encode, decode, load_samples
+    blob = encode(values)               # bytes
+    values = decode(blob)
+    PackedArray(blob)[1000:2000]        # decodes only the blocks it needs
+    load_samples("sample_data/ecg.csv") # .csv or packed .ncp file
+"""
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"NCMP"
+VERSION = 1
+BLOCK = 128
+MAX_DECIMALS = 6
+RAW_BITS = -1
+HEADER = struct.Struct("<4sBb2sHQI")
+SUFFIX = ".ncp"
+
+_DTYPES = {"f4": np.float32, "f8": np.float64, "i2": np.int16, "i4": np.int32, "i8": np.int64}
+_BITS = {np.dtype(np.float32): np.int32, np.dtype(np.float64): np.int64}
+
+
+# ── Quantisation ──────────────────────────────────────────────────────────────
+def _quantise(values, decimals):
+    """(int64 codes, decimals) for ``values``; see the module docstring."""
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64), 0
+    if decimals is not None:
+        return np.round(values.astype(np.float64) * 10.0 ** decimals).astype(np.int64), decimals
+
+    v = values.astype(np.float64)
+    if np.isfinite(v).all():
+        for d in range(MAX_DECIMALS + 1):
+            q = np.round(v * 10.0 ** d)
+            if np.abs(q).max(initial=0) >= 2 ** 53:
+                break
+            if np.array_equal((q / 10.0 ** d).astype(values.dtype), values):
+                return q.astype(np.int64), d
+    return values.view(_BITS[values.dtype]).astype(np.int64), RAW_BITS
+
+
+def _restore(q, decimals, dtype):
+    if decimals == RAW_BITS:
+        return q.astype(_BITS[np.dtype(dtype)]).view(dtype)
+    if np.dtype(dtype).kind in "iu":
+        return q.astype(dtype)
+    return (q / 10.0 ** decimals).astype(dtype)
+
+
+# ── Bit packing ───────────────────────────────────────────────────────────────
+def _bit_width(x):
+    """Bits needed for each uint64 in ``x`` (0 for 0)."""
+    return ((x[:, None] >> np.arange(64, dtype=np.uint64)) != 0).sum(axis=1).astype(np.uint8)
+
+
+def _offsets(width, block):
+    """Payload offset of every block: blocks are stored grouped by width."""
+    order = np.argsort(width, kind="stable")
+    sizes = width[order].astype(np.int64) * (block // 8)
+    offsets = np.empty(len(width) + 1, dtype=np.int64)
+    offsets[order] = np.cumsum(sizes) - sizes
+    offsets[-1] = sizes.sum()
+    return offsets
+
+
+def _pack_width(V, w):
+    """
+    (k, block) uint64 values of w bits → (k, block/8 * w) bytes: the
+    whole low bytes as they are, the remaining w % 8 bits of every 8
+    consecutive values combined into w % 8 bytes.
+    """
+    k, block = V.shape
+    whole, r = divmod(w, 8)
+    parts = [V.view(np.uint8).reshape(k, block, 8)[:, :, :whole].reshape(k, -1)]
+    if r:
+        high = (V >> np.uint64(8 * whole)).reshape(k, block // 8, 8)
+        acc = high[:, :, 0].copy()
+        for i in range(1, 8):
+            acc |= high[:, :, i] << np.uint64(i * r)
+        parts.append(acc.view(np.uint8).reshape(k, block // 8, 8)[:, :, :r].reshape(k, -1))
+    return np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0]
+
+
+def _unpack_width(packed, w, block):
+    """Inverse of _pack_width: (k, block/8 * w) bytes → (k, block) uint64."""
+    k = len(packed)
+    whole, r = divmod(w, 8)
+    raw = np.zeros((k, block, 8), dtype=np.uint8)
+    raw[:, :, :whole] = packed[:, :block * whole].reshape(k, block, whole)
+    V = raw.view(np.uint64).reshape(k, block)
+    if r:
+        acc = np.zeros((k, block // 8, 8), dtype=np.uint8)
+        acc[:, :, :r] = packed[:, block * whole:].reshape(k, block // 8, r)
+        acc = acc.view(np.uint64).reshape(k, block // 8, 1)
+        shifts = np.arange(8, dtype=np.uint64) * np.uint64(r)
+        high = (acc >> shifts) & np.uint64((1 << r) - 1)
+        V |= high.reshape(k, block) << np.uint64(8 * whole)
+    return V
+
+
+def _pack(U, width, block):
+    """Payload of every block (rows of U) at its bit width, grouped by width."""
+    groups = []
+    for w in np.unique(width[width > 0]).tolist():
+        rows = np.flatnonzero(width == w)
+        groups.append(_pack_width(U if len(rows) == len(U) else U[rows], w).ravel())
+    return np.concatenate(groups) if groups else np.empty(0, dtype=np.uint8)
+
+
+def _unpack(payload, offsets, width, block):
+    """(n_blocks, block) uint64 deltas of the given blocks."""
+    U = np.zeros((len(width), block), dtype=np.uint64)
+    for w in np.unique(width[width > 0]).tolist():
+        rows = np.flatnonzero(width == w)
+        size = block // 8 * w
+        starts = offsets[rows]
+        if np.all(np.diff(starts) == size):          # one contiguous run
+            packed = payload[starts[0]:starts[0] + len(rows) * size]
+        else:
+            packed = payload[(starts[:, None] + np.arange(size)).ravel()]
+        V = _unpack_width(packed.reshape(len(rows), size), w, block)
+        if len(rows) == len(U):
+            U = V
+        else:
+            U[rows] = V
+    return U
+
+
+# ── Codec ─────────────────────────────────────────────────────────────────────
+def encode(values, decimals=None, block=BLOCK):
+    """Pack a 1-D array into bytes (lossless unless ``decimals`` is given)."""
+    values = np.ascontiguousarray(values)
+    if values.dtype.str[1:] not in _DTYPES:
+        values = values.astype(np.float64)
+    if block % 8 or block < 8:
+        raise ValueError("block must be a positive multiple of 8")
+    q, decimals = _quantise(values.ravel(), decimals)
+
+    n = len(q)
+    n_blocks = -(-n // block)
+    padded = np.empty(n_blocks * block, dtype=np.int64)
+    padded[:n] = q
+    padded[n:] = q[-1] if n else 0
+    Q = padded.reshape(n_blocks, block)
+
+    # Deltas wrap modulo 2**64, so even raw float bits come back exactly
+    D = np.zeros((n_blocks, block), dtype=np.int64)
+    D[:, :-1] = np.diff(Q, axis=1)
+    dmin = D[:, :-1].min(axis=1) if block > 1 and n_blocks else np.zeros(n_blocks, dtype=np.int64)
+    U = (D - dmin[:, None]).view(np.uint64)
+    U[:, -1] = 0
+    width = _bit_width(U.max(axis=1)) if n_blocks else np.zeros(0, dtype=np.uint8)
+
+    header = HEADER.pack(MAGIC, VERSION, decimals, values.dtype.str[1:].encode(), block, n, n_blocks)
+    return b"".join([header, Q[:, 0].astype("<i8").tobytes(), dmin.astype("<i8").tobytes(),
+                     width.tobytes(), _pack(U, width, block).tobytes()])
+
+
+class PackedArray:
+    """Random access into an encoded buffer (bytes, bytearray or memmap)."""
+
+    def __init__(self, buf):
+        buf = np.frombuffer(buf, dtype=np.uint8)
+        magic, version, decimals, dtype, block, n, n_blocks = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a packed sample buffer")
+        self.decimals = decimals
+        self.dtype = np.dtype(_DTYPES[dtype.decode()])
+        self.block = block
+        self.n = n
+        self.n_blocks = n_blocks
+
+        pos = HEADER.size
+        self.first = buf[pos:pos + 8 * n_blocks].view("<i8")
+        pos += 8 * n_blocks
+        self.dmin = buf[pos:pos + 8 * n_blocks].view("<i8")
+        pos += 8 * n_blocks
+        self.width = buf[pos:pos + n_blocks]
+        pos += n_blocks
+        self.offsets = _offsets(self.width, block)
+        self.payload = buf[pos:pos + self.offsets[-1]]
+
+    def __len__(self):
+        return self.n
+
+    def first_values(self):
+        """First value of every block (a coarse index, e.g. block start times)."""
+        return _restore(self.first.astype(np.int64), self.decimals, self.dtype)
+
+    def blocks(self, lo, hi):
+        """Decoded samples of blocks [lo, hi)."""
+        lo, hi = max(lo, 0), min(hi, self.n_blocks)
+        if hi <= lo:
+            return np.empty(0, dtype=self.dtype)
+        width = self.width[lo:hi]
+        U = _unpack(self.payload, self.offsets[lo:hi], width, self.block)
+        D = U.view(np.int64) + self.dmin[lo:hi, None]
+        Q = np.empty_like(D)
+        Q[:, 0] = self.first[lo:hi]
+        Q[:, 1:] = D[:, :-1]
+        q = np.cumsum(Q, axis=1).ravel()[:min(hi * self.block, self.n) - lo * self.block]
+        return _restore(q, self.decimals, self.dtype)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("PackedArray supports slices only")
+        start, stop, step = key.indices(self.n)
+        if stop <= start:
+            return np.empty(0, dtype=self.dtype)
+        lo = start // self.block
+        values = self.blocks(lo, -(-stop // self.block))
+        return values[start - lo * self.block:stop - lo * self.block:step]
+
+    def decode(self):
+        return self.blocks(0, self.n_blocks)
+
+
+def decode(buf):
+    """Inverse of encode()."""
+    return PackedArray(buf).decode()
+
+
+# ── sample_data files ─────────────────────────────────────────────────────────
+def load_samples(path):
+    """Values of a one-value-per-line CSV (sample_data/) or a packed .ncp file."""
+    if path.endswith(SUFFIX):
+        return decode(np.fromfile(path, dtype=np.uint8))
+    if os.path.getsize(path) == 0:
+        return np.empty(0)
+    return np.loadtxt(path, dtype=np.float64, ndmin=1)
+
+
+def save_samples(path, values, decimals=None):
+    """Write values as a packed .ncp file; returns its size in bytes."""
+    blob = encode(np.asarray(values), decimals)
+    with open(path, "wb") as fh:
+        fh.write(blob)
+    return len(blob)
+
+
+if __name__ == "__main__":
+    # python utils/sample_codec.py sample_data/*.csv  → packs each file next to it
+    for src in sys.argv[1:]:
+        values = load_samples(src)
+        dst = os.path.splitext(src)[0] + SUFFIX
+        size = save_samples(dst, values)
+        assert np.array_equal(load_samples(dst), values)
+        print(f"{src}: {len(values):,} values, {os.path.getsize(src):,} → {size:,} bytes "
+              f"({os.path.getsize(src) / max(size, 1):.1f}x)")
@@ -0,0 +1,410 @@
+"""
+Append-only, memory-mapped sensor sample store
+===============================================
+Replaces Hardware_Backend's document-per-flush layout (every flush copies
+all nine rawData arrays into a new document) with one append-only stream
+per (user, sensor) — each a single path component (check_name()):
+
+    <root>/<user>/<sensor>/0000000000.seg
+                           0000000001.seg ...
+
+Each segment holds fixed-width records (t: float64 epoch seconds,
+v: float32 value). Appends go to the newest segment with a single write;
+a new segment starts when the current one reaches ``segment_records`` or
+when a batch starts before the data already in it (out-of-order input).
+
+Reads memory-map the segments and binary-search the time column, so a
+time-range read touches only the pages it returns. When the range lies in
+one segment the result is a view into the mapping (no copy); ranges that
+span segments are concatenated, and overlapping (out-of-order) segments
+are merged in time order.
+
+compact() drops records older than a retention cutoff by deleting the
+segments that lie wholly before it and trimming the one that straddles
+it. Only a stream with undersized or overlapping segments is rewritten
+into full-size, time-sorted ones — under new sequence numbers, swapped
+in for readers by the stream's ``superseded`` marker ("S P": ignore
+seq <= S, and seq > P while P >= 0), so a reader in another process sees
+the old or the new set, never both. Run it from the process that appends
+(ingest/serial_ingest.py --compact-every does).
+
+Sealed segments (every one but the newest, which takes appends) are
+packed by compact() into ``.segp`` files with utils/sample_codec.py:
+delta + bit-packed columns, timestamps kept to TIME_DECIMALS (0.1 ms),
+values exactly. Reads decode only the codec blocks the time range
+touches; packed data is returned as a copy rather than a view.
+
+Usage:
+    store = SegmentStore("data/sensors")
+    store.append("patient-7", "ecg", timestamps, values)
+    t, v = store.read("patient-7", "ecg", start=t0, end=t0 + 60)
+    window = store.window("patient-7", t0, t0 + 60)      # {"ecg": ..., "eeg": ...}
+    store.compact("patient-7", "ecg", retention_seconds=30 * 86400)
+"""
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+import struct
+
+import numpy as np
+
+from utils.sample_codec import PackedArray, encode
+
+RECORD = np.dtype([("t", "<f8"), ("v", "<f4")])
+SEGMENT_RECORDS = 1 << 20           # ~12 MB per segment
+SUFFIX = ".seg"
+PACKED_SUFFIX = ".segp"
+PACKED_HEADER = struct.Struct("<4sQddQ")        # magic, count, t_first, t_last, t bytes
+PACKED_MAGIC = b"NCMS"
+TIME_DECIMALS = 4
+MARKER = "superseded"
+
+Segment = namedtuple("Segment", "path seq count t_first t_last")
+NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def check_name(kind, name):
+    """``name`` as a single path component of the store; ValueError otherwise."""
+    name = str(name)
+    if not NAME.match(name) or name in (".", ".."):
+        raise ValueError(f"invalid {kind} {name!r}: use letters, digits, '_', '-' and '.'")
+    return name
+
+
+class SegmentStore:
+
+    def __init__(self, root, segment_records=SEGMENT_RECORDS, pack_sealed=True):
+        self.root = root
+        self.segment_records = segment_records
+        self.pack_sealed = pack_sealed
+        self._lock = threading.RLock()
+        self._meta = {}                 # path -> (size, Segment)
+        self._recovered = set()         # streams whose interrupted swaps are cleaned up
+
+    # ── layout ──
+    def stream_dir(self, user, sensor):
+        return os.path.join(self.root, check_name("user", user), check_name("sensor", sensor))
+
+    def users(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if os.path.isdir(os.path.join(self.root, d)))
+
+    def sensors(self, user):
+        folder = os.path.join(self.root, check_name("user", user))
+        if not os.path.isdir(folder):
+            return []
+        return sorted(d for d in os.listdir(folder)
+                      if os.path.isdir(os.path.join(folder, d)))
+
+    def segments(self, user, sensor):
+        """Non-empty, current segments of a stream, in sequence order."""
+        folder = self.stream_dir(user, sensor)
+        if not os.path.isdir(folder):
+            return []
+        # A listing is consistent when the marker did not move while it was taken
+        for _ in range(5):
+            marker = self._marker(folder)
+            names = os.listdir(folder)
+            if self._marker(folder) == marker:
+                break
+        superseded, pending = marker
+        packed = {name[:-len(PACKED_SUFFIX)] for name in names if name.endswith(PACKED_SUFFIX)}
+        out = []
+        for name in sorted(names):
+            # A packed copy wins over the raw segment it is replacing
+            if not (name.endswith(PACKED_SUFFIX) or (name.endswith(SUFFIX)
+                                                     and name[:-len(SUFFIX)] not in packed)):
+                continue
+            seq = int(os.path.splitext(name)[0])
+            if seq <= superseded or 0 <= pending < seq:
+                continue
+            segment = self._segment(os.path.join(folder, name))
+            if segment.count:
+                out.append(segment)
+        return out
+
+    # ── swap marker ──
+    @staticmethod
+    def _marker(folder):
+        """(superseded, pending) of a stream folder; (-1, -1) when none."""
+        try:
+            with open(os.path.join(folder, MARKER)) as fh:
+                superseded, pending = (int(x) for x in fh.read().split())
+        except (FileNotFoundError, ValueError):
+            return -1, -1
+        return superseded, pending
+
+    @staticmethod
+    def _set_marker(folder, superseded, pending):
+        path = os.path.join(folder, MARKER)
+        with open(path + ".tmp", "w") as fh:
+            fh.write(f"{superseded} {pending}\n")
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _recover(self, user, sensor):
+        """Finish or roll back a swap a crashed compaction left behind (writer side)."""
+        folder = self.stream_dir(user, sensor)
+        if (user, sensor) in self._recovered or not os.path.isdir(folder):
+            return
+        superseded, pending = self._marker(folder)
+        for name in os.listdir(folder):
+            stem = name.split(".")[0]
+            if not stem.isdigit():
+                continue
+            seq = int(stem)
+            if seq <= superseded or 0 <= pending < seq:
+                os.remove(os.path.join(folder, name))
+                self._meta.pop(os.path.join(folder, name), None)
+        if pending >= 0:
+            self._set_marker(folder, superseded, -1)
+        self._recovered.add((user, sensor))
+
+    def _segment(self, path):
+        size = os.path.getsize(path)
+        cached = self._meta.get(path)
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        name, suffix = os.path.splitext(os.path.basename(path))
+        seq = int(name)
+        if suffix == PACKED_SUFFIX:
+            with open(path, "rb") as fh:
+                _, count, t_first, t_last, _ = PACKED_HEADER.unpack(fh.read(PACKED_HEADER.size))
+            segment = Segment(path, seq, count, t_first, t_last)
+            self._meta[path] = (size, segment)
+            return segment
+        count = size // RECORD.itemsize
+        if count:
+            records = self._map(path, count)
+            segment = Segment(path, seq, count, float(records["t"][0]), float(records["t"][-1]))
+        else:
+            segment = Segment(path, seq, 0, np.inf, -np.inf)
+        self._meta[path] = (size, segment)
+        return segment
+
+    @staticmethod
+    def _map(path, count):
+        return np.memmap(path, dtype=RECORD, mode="r", shape=(count,))
+
+    def _segment_path(self, user, sensor, seq, suffix=SUFFIX):
+        return os.path.join(self.stream_dir(user, sensor), f"{seq:010d}{suffix}")
+
+    @staticmethod
+    def _is_packed(segment):
+        return segment.path.endswith(PACKED_SUFFIX)
+
+    @staticmethod
+    def _packed_columns(path):
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+        t_bytes = PACKED_HEADER.unpack_from(buf)[4]
+        start = PACKED_HEADER.size
+        return PackedArray(buf[start:start + t_bytes]), PackedArray(buf[start + t_bytes:])
+
+    @staticmethod
+    def _write(path, records, packed):
+        """Write records as a raw or packed segment, atomically."""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            if packed:
+                t = encode(records["t"], decimals=TIME_DECIMALS)
+                header = PACKED_HEADER.pack(PACKED_MAGIC, len(records), float(records["t"][0]),
+                                            float(records["t"][-1]), len(t))
+                fh.write(header + t + encode(records["v"]))
+            else:
+                fh.write(records.tobytes())
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+
+    # ── writes ──
+    def append(self, user, sensor, timestamps, values):
+        """Append samples (equal-length arrays); returns the number written."""
+        records = np.empty(len(values), dtype=RECORD)
+        records["t"] = timestamps
+        records["v"] = values
+        if len(records) == 0:
+            return 0
+        if np.any(np.diff(records["t"]) < 0):
+            records = records[np.argsort(records["t"], kind="stable")]
+
+        with self._lock:
+            os.makedirs(self.stream_dir(user, sensor), exist_ok=True)
+            self._recover(user, sensor)
+            segments = self.segments(user, sensor)
+            last = segments[-1] if segments else None
+            written = 0
+            while written < len(records):
+                if (last is None or last.count >= self.segment_records or self._is_packed(last)
+                        or records["t"][written] < last.t_last):
+                    seq = last.seq + 1 if last is not None else 0
+                    path = self._segment_path(user, sensor, seq)
+                    last = Segment(path, seq, 0, np.inf, -np.inf)
+                n = min(self.segment_records - last.count, len(records) - written)
+                part = records[written:written + n]
+                with open(last.path, "ab") as fh:
+                    fh.write(part.tobytes())
+                last = self._segment(last.path)
+                written += n
+        return written
+
+    # ── reads ──
+    def views(self, user, sensor, start=None, end=None):
+        """
+        Record arrays with start <= t < end, one per overlapping segment,
+        in segment order: zero-copy views (memory-mapped) of raw segments,
+        decoded copies of packed ones.
+        """
+        for _ in range(3):
+            try:
+                return self._views(user, sensor, start, end)
+            except FileNotFoundError:
+                continue                # a compaction swapped the segments; list again
+        return self._views(user, sensor, start, end)
+
+    def _views(self, user, sensor, start, end):
+        lo_t = -np.inf if start is None else start
+        hi_t = np.inf if end is None else end
+        out = []
+        for segment in self.segments(user, sensor):
+            if segment.t_last < lo_t or segment.t_first >= hi_t:
+                continue
+            if self._is_packed(segment):
+                records = self._unpack(segment, lo_t, hi_t)
+            else:
+                records = self._map(segment.path, segment.count)
+            t = records["t"]
+            lo = 0 if start is None else int(np.searchsorted(t, start, side="left"))
+            hi = len(records) if end is None else int(np.searchsorted(t, end, side="left"))
+            if hi > lo:
+                out.append(records[lo:hi])
+        return out
+
+    def _unpack(self, segment, lo_t, hi_t):
+        """Records of the codec blocks of a packed segment that overlap [lo_t, hi_t)."""
+        t_col, v_col = self._packed_columns(segment.path)
+        firsts = t_col.first_values()
+        lo = max(int(np.searchsorted(firsts, lo_t, side="right")) - 1, 0)
+        hi = int(np.searchsorted(firsts, hi_t, side="left"))
+        records = np.empty(max(min(hi * t_col.block, len(t_col)) - lo * t_col.block, 0), dtype=RECORD)
+        records["t"] = t_col.blocks(lo, hi)
+        records["v"] = v_col.blocks(lo, hi)
+        return records
+
+    def read(self, user, sensor, start=None, end=None):
+        """(timestamps, values) with start <= t < end, in time order."""
+        views = self.views(user, sensor, start, end)
+        if not views:
+            return np.empty(0), np.empty(0, dtype=np.float32)
+        if len(views) == 1:
+            records = views[0]
+        else:
+            records = np.concatenate(views)
+            if any(a["t"][-1] > b["t"][0] for a, b in zip(views, views[1:])):
+                records = records[np.argsort(records["t"], kind="stable")]
+        return records["t"], records["v"]
+
+    def window(self, user, start=None, end=None, sensors=None):
+        """{sensor: values} for one user over [start, end)."""
+        sensors = self.sensors(user) if sensors is None else sensors
+        return {s: self.read(user, s, start, end)[1] for s in sensors}
+
+    def last_timestamp(self, user, sensors=None):
+        """Latest sample time across a user's sensors (None when empty)."""
+        sensors = self.sensors(user) if sensors is None else sensors
+        ends = [seg.t_last for s in sensors for seg in self.segments(user, s)]
+        return max(ends) if ends else None
+
+    # ── compaction ──
+    def compact(self, user, sensor, retention_seconds=None, now=None):
+        """
+        Drop records older than ``retention_seconds``, rewrite the stream
+        as full, time-sorted, non-overlapping segments if it is not, and
+        pack the sealed ones. Returns (records_before, records_after).
+        Readers holding old mappings keep valid data.
+        """
+        with self._lock:
+            self._recover(user, sensor)
+            segments = self.segments(user, sensor)
+            before = sum(s.count for s in segments)
+            if retention_seconds is not None and segments:
+                cutoff = (time.time() if now is None else now) - retention_seconds
+                segments = self._expire(user, sensor, segments, cutoff)
+
+            # The oldest segment may be short after a retention trim
+            if (any(s.count < self.segment_records for s in segments[1:-1])
+                    or any(a.t_last > b.t_first for a, b in zip(segments, segments[1:]))):
+                self._rewrite(user, sensor, segments)
+            else:
+                self._pack(user, sensor, segments)
+            return before, sum(s.count for s in self.segments(user, sensor))
+
+    def _expire(self, user, sensor, segments, cutoff):
+        """Delete segments wholly before ``cutoff``, trim the one straddling it."""
+        keep = []
+        for segment in segments:
+            if segment.t_last < cutoff:
+                os.remove(segment.path)
+                self._meta.pop(segment.path, None)
+            elif segment.t_first < cutoff:
+                if self._is_packed(segment):
+                    records = self._unpack(segment, cutoff, np.inf)
+                else:
+                    records = np.array(self._map(segment.path, segment.count))
+                records = records[records["t"] >= cutoff]
+                self._write(segment.path, records, self._is_packed(segment))
+                self._meta.pop(segment.path, None)
+                keep.append(self._segment(segment.path))
+            else:
+                keep.append(segment)
+        return keep
+
+    def _rewrite(self, user, sensor, segments):
+        """Replace ``segments`` with full, time-sorted ones under new numbers."""
+        folder = self.stream_dir(user, sensor)
+        superseded, _ = self._marker(folder)
+        last = segments[-1].seq if segments else superseded
+        views = self.views(user, sensor)
+        records = np.concatenate(views) if views else np.empty(0, dtype=RECORD)
+        records = records[np.argsort(records["t"], kind="stable")]
+
+        # Readers ignore what is written above ``last`` until the marker moves
+        self._set_marker(folder, superseded, last)
+        seq = last + 1
+        for i in range(0, len(records), self.segment_records):
+            part = records[i:i + self.segment_records]
+            sealed = self.pack_sealed and len(part) == self.segment_records
+            self._write(self._segment_path(user, sensor, seq, PACKED_SUFFIX if sealed else SUFFIX),
+                        part, sealed)
+            seq += 1
+        self._set_marker(folder, last, -1)
+        for segment in segments:
+            os.remove(segment.path)
+            self._meta.pop(segment.path, None)
+
+    def _pack(self, user, sensor, segments):
+        """Replace full raw segments with packed copies under the same number."""
+        if not self.pack_sealed:
+            return
+        for segment in segments:
+            if self._is_packed(segment) or segment.count < self.segment_records:
+                continue
+            records = self._map(segment.path, segment.count)
+            self._write(self._segment_path(user, sensor, segment.seq, PACKED_SUFFIX), records, True)
+            os.remove(segment.path)
+            self._meta.pop(segment.path, None)
+
+    def compact_all(self, retention_seconds=None, now=None):
+        """compact() every stream; returns total (records_before, records_after)."""
+        before = after = 0
+        for user in self.users():
+            for sensor in self.sensors(user):
+                b, a = self.compact(user, sensor, retention_seconds, now)
+                before += b
+                after += a
+        return before, after
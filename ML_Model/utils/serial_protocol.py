@@ -0,0 +1,149 @@
+"""
+Hardware serial line protocol
+==============================
+Python twin of the line handling in Hardware_Backend/server.js:
+
+    EMG Level: <v>                    → emg        v x 10
+    ECG Signal: <raw> | BPM: <bpm>    → ecg        raw (0-1023 ADC); bpm kept as last_bpm
+    Theta: <v> / Alpha: <v> / Beta : <v>
+    Focus Index: <v>                  → eeg        focus x 100 (closes the 1-s window)
+    {"type":"eeg","value":<v>}        → eeg        v x 100 (legacy JSON)
+
+Numbers follow the backend's ``([\\d.]+)`` captures: optional spaces, then
+a run of digits and dots read with parseFloat semantics. Anything else
+(decorative lines, malformed values) is ignored.
+
+Unlike the backend, the Theta / Alpha / Beta values of each window are
+kept as well (eeg_theta / eeg_alpha / eeg_beta, emitted with the focus
+sample) instead of being dropped.
+
+Matching uses str.startswith / str.find rather than regexes; the line
+prefix decides the branch in one comparison for the common cases.
+"""
+import json
+
+SENSORS = ("ecg", "eeg", "emg", "eeg_theta", "eeg_alpha", "eeg_beta")
+
+EMG_SCALE = 10.0
+EEG_SCALE = 100.0
+
+_NUMBER_CHARS = frozenset("0123456789.")
+
+
+def read_number(line, start):
+    """
+    (value, end) for the ``[\\d.]+`` number at or after ``start`` (leading
+    spaces skipped), or (None, start) when there is none.
+    """
+    n = len(line)
+    i = start
+    while i < n and line[i] in " \t":
+        i += 1
+    j = i
+    while j < n and line[j] in _NUMBER_CHARS:
+        j += 1
+    if j == i:
+        return None, start
+    token = line[i:j]
+    dot = token.find(".")
+    if dot != -1:
+        second = token.find(".", dot + 1)
+        if second != -1:
+            token = token[:second]          # parseFloat("1.2.3") == 1.2
+    if token == ".":
+        return None, start
+    return float(token), j
+
+
+def _after(line, marker):
+    """Index just past ``marker`` in ``line``, or -1."""
+    k = line.find(marker)
+    return -1 if k == -1 else k + len(marker)
+
+
+class LineParser:
+    """
+    Stateful parser for one device stream (the EEG window spans several
+    lines). ``parse(line)`` returns a list of (sensor, value) samples,
+    empty for lines that carry none.
+    """
+
+    def __init__(self):
+        self.window = {}
+        self.last_bpm = None
+        self.ignored = 0
+
+    def parse(self, line):
+        if line.startswith("EMG Level:") or "EMG Level:" in line:
+            value, _ = read_number(line, _after(line, "EMG Level:"))
+            return self._out(value is not None and [("emg", value * EMG_SCALE)])
+
+        if "ECG Signal:" in line:
+            raw, end = read_number(line, _after(line, "ECG Signal:"))
+            if raw is None:
+                return self._out(None)
+            i = end
+            while i < len(line) and line[i] in " \t":
+                i += 1
+            if not line.startswith("|", i):
+                return self._out(None)
+            i += 1
+            while i < len(line) and line[i] in " \t":
+                i += 1
+            if not line.startswith("BPM:", i):
+                return self._out(None)
+            bpm, _ = read_number(line, i + 4)
+            if bpm is None:
+                return self._out(None)
+            if bpm > 0:
+                self.last_bpm = bpm
+            return [("ecg", raw)]
+
+        if "Theta:" in line:
+            return self._band(line, "theta", _after(line, "Theta:"))
+        if "Alpha:" in line:
+            return self._band(line, "alpha", _after(line, "Alpha:"))
+        if line.startswith("Beta") or "Beta :" in line or "Beta:" in line:
+            k = line.find("Beta")
+            i = k + 4
+            while i < len(line) and line[i] in " \t":
+                i += 1
+            if k == -1 or not line.startswith(":", i):
+                return self._out(None)
+            return self._band(line, "beta", i + 1)
+
+        if "Focus Index:" in line:
+            focus, _ = read_number(line, _after(line, "Focus Index:"))
+            if focus is None:
+                return self._out(None)
+            window, self.window = self.window, {}
+            samples = [("eeg", focus * EEG_SCALE)]
+            for band in ("theta", "alpha", "beta"):
+                if band in window:
+                    samples.append(("eeg_" + band, window[band]))
+            return samples
+
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+                value = float(data["value"]) if data.get("type") == "eeg" else None
+            except (ValueError, TypeError, KeyError, AttributeError):
+                value = None
+            return self._out(value is not None and value == value
+                             and [("eeg", value * EEG_SCALE)])
+
+        return self._out(None)
+
+    def _band(self, line, band, start):
+        value, _ = read_number(line, start)
+        if value is not None:
+            self.window[band] = value
+        else:
+            self.ignored += 1
+        return []
+
+    def _out(self, samples):
+        if not samples:
+            self.ignored += 1
+            return []
+        return samples
@@ -0,0 +1,170 @@
+"""
+Signal-quality gate for raw ECG / EEG / EMG windows
+====================================================
+Flags artifact windows in bulk, a (n_windows, window) matrix at a time
+(NaN padding allowed), before any feature extraction or model call:
+
+  CLIPPED    share of samples on the ADC rails (ECG: 0 / 1023)
+  FLAT       longest run of identical consecutive samples, as a share of
+             the window (stuck sensor / electrode off)
+  KURTOSIS   excess kurtosis above the sensor's limit (spikes, lead pops)
+  POWERLINE  share of spectral power within ±1 Hz of 50 / 60 Hz (only
+             when the sampling rate resolves it)
+  EMPTY      no samples at all
+
+assess() returns the per-window metrics, a bitmask of reasons and the
+``ok`` mask; limits are per sensor (SENSOR_LIMITS) and any check can be
+disabled with None. Runs at a sensor's ``rest_level`` are not flat lines
+(the EMG level reads a steady 0 at rest), and EMG has no kurtosis check:
+short contractions over a resting baseline are heavy-tailed by nature.
+
+Every assess() call is tallied in ``quality_stats`` (per sensor: windows
+seen, rejected, count per reason), served by main.py's /stats.
+
+Usage:
+    from utils.signal_quality import assess
+    q = assess(windows, "ecg", fs=250)
+    windows[q["ok"]]
+"""
+import threading
+
+import numpy as np
+
+CLIPPED, FLAT, KURTOSIS, POWERLINE, EMPTY = 1, 2, 4, 8, 16
+REASONS = {CLIPPED: "clipped", FLAT: "flat_line", KURTOSIS: "kurtosis",
+           POWERLINE: "powerline", EMPTY: "empty"}
+
+SENSOR_LIMITS = {
+    "ecg": {"rails": (0.0, 1023.0), "max_clip": 0.05, "max_flat": 0.5, "rest_level": None,
+            "max_kurtosis": 50.0, "max_powerline": 0.5},
+    "eeg": {"rails": None, "max_clip": None, "max_flat": 0.5, "rest_level": None,
+            "max_kurtosis": 20.0, "max_powerline": 0.5},
+    "emg": {"rails": None, "max_clip": None, "max_flat": 0.5, "rest_level": 0.0,
+            "max_kurtosis": None, "max_powerline": 0.5},
+}
+POWERLINE_HZ = (50.0, 60.0)
+
+
+# ── Metrics ───────────────────────────────────────────────────────────────────
+def _longest_flat_run(X, valid, rest_level=None):
+    """Longest run of equal consecutive valid samples per row (in samples)."""
+    n, m = X.shape
+    if m < 2:
+        return np.where(valid.any(axis=1), 1, 0)
+    same = (X[:, 1:] == X[:, :-1]) & valid[:, 1:] & valid[:, :-1]
+    if rest_level is not None:
+        same &= X[:, 1:] != rest_level
+    # Run length of True values ending at each position: count minus the
+    # count at the last False (running maximum of reset points)
+    c = np.cumsum(same, axis=1)
+    reset = np.maximum.accumulate(np.where(same, 0, c), axis=1)
+    run = (c - reset).max(axis=1)
+    return np.where(valid.any(axis=1), run + 1, 0)
+
+
+def _kurtosis(X, valid, counts):
+    """Excess kurtosis per row (0 where fewer than 4 samples or no variance)."""
+    Z = np.where(valid, X, 0.0)
+    k = np.maximum(counts, 1)
+    mean = Z.sum(axis=1) / k
+    D = np.where(valid, X - mean[:, None], 0.0)
+    m2 = (D ** 2).sum(axis=1) / k
+    m4 = (D ** 4).sum(axis=1) / k
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kurt = m4 / (m2 * m2) - 3.0
+    return np.where((counts >= 4) & (m2 > 0), kurt, 0.0)
+
+
+def _powerline_ratio(X, valid, counts, fs):
+    """Share of non-DC power within ±1 Hz of the mains frequencies."""
+    Z = np.where(valid, X, 0.0)
+    mean = Z.sum(axis=1) / np.maximum(counts, 1)
+    Z = np.where(valid, X - mean[:, None], 0.0)
+    P = np.abs(np.fft.rfft(Z, axis=1)) ** 2
+    f = np.fft.rfftfreq(X.shape[1], 1.0 / fs)
+    mains = np.zeros(len(f), dtype=bool)
+    for hz in POWERLINE_HZ:
+        mains |= np.abs(f - hz) <= 1.0
+    total = P[:, 1:].sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, P[:, mains].sum(axis=1) / total, 0.0)
+
+
+# ── Gate ──────────────────────────────────────────────────────────────────────
+def assess(windows, sensor, fs=None, limits=None, record=True):
+    """
+    Quality metrics and verdict for each row of ``windows``:
+    {"ok", "reasons", "clip_ratio", "flat_ratio", "kurtosis", "powerline_ratio"}.
+    """
+    X = np.atleast_2d(np.asarray(windows, dtype=np.float64))
+    limits = {**SENSOR_LIMITS.get(sensor, SENSOR_LIMITS["eeg"]), **(limits or {})}
+    n, m = X.shape
+    valid = ~np.isnan(X)
+    counts = valid.sum(axis=1)
+    reasons = np.where(counts == 0, EMPTY, 0)
+
+    clip = np.zeros(n)
+    if limits["rails"] is not None and limits["max_clip"] is not None:
+        lo, hi = limits["rails"]
+        on_rail = valid & ((X <= lo) | (X >= hi))
+        clip = on_rail.sum(axis=1) / np.maximum(counts, 1)
+        reasons |= np.where(clip > limits["max_clip"], CLIPPED, 0)
+
+    flat = np.zeros(n)
+    if limits["max_flat"] is not None and m:
+        flat = _longest_flat_run(X, valid, limits["rest_level"]) / np.maximum(counts, 1)
+        reasons |= np.where((flat > limits["max_flat"]) & (counts >= 2), FLAT, 0)
+
+    kurt = np.zeros(n)
+    if limits["max_kurtosis"] is not None and m:
+        kurt = _kurtosis(X, valid, counts)
+        reasons |= np.where(kurt > limits["max_kurtosis"], KURTOSIS, 0)
+
+    mains = np.zeros(n)
+    if limits["max_powerline"] is not None and fs and fs / 2 > max(POWERLINE_HZ) + 1 and m:
+        mains = _powerline_ratio(X, valid, counts, fs)
+        reasons |= np.where(mains > limits["max_powerline"], POWERLINE, 0)
+
+    ok = reasons == 0
+    if record:
+        quality_stats.record(sensor, reasons)
+    return {"ok": ok, "reasons": reasons, "clip_ratio": clip, "flat_ratio": flat,
+            "kurtosis": kurt, "powerline_ratio": mains}
+
+
+def describe(reasons):
+    """Reason names for one window's bitmask."""
+    return [name for bit, name in REASONS.items() if int(reasons) & bit]
+
+
+# ── Statistics ────────────────────────────────────────────────────────────────
+class QualityStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sensors = {}
+
+    def record(self, sensor, reasons):
+        reasons = np.asarray(reasons)
+        with self._lock:
+            s = self._sensors.setdefault(
+                sensor, {"windows": 0, "rejected": 0, **{name: 0 for name in REASONS.values()}})
+            s["windows"] += int(reasons.size)
+            s["rejected"] += int(np.count_nonzero(reasons))
+            for bit, name in REASONS.items():
+                s[name] += int(np.count_nonzero(reasons & bit))
+
+    def stats(self):
+        with self._lock:
+            return {
+                sensor: {
+                    "windows": s["windows"],
+                    "rejected": s["rejected"],
+                    "rejected_ratio": round(s["rejected"] / s["windows"], 4) if s["windows"] else 0.0,
+                    "reasons": {name: s[name] for name in REASONS.values()},
+                }
+                for sensor, s in self._sensors.items()
+            }
+
+
+quality_stats = QualityStats()
@@ -0,0 +1,350 @@
+"""
+Incremental signal features for continuous monitoring
+======================================================
+Stateful counterparts of utils/raw_signals.py: each extractor updates in
+O(1) per sample (or per chunk, vectorised) instead of reprocessing the
+whole recording, so the ECG / EEG / EMG models can be re-scored on every
+hop.
+
+  OnlineRPeaks     raw ECG → R-peaks (detrended, adaptive threshold,
+                   250 ms refractory) → running HR / SDNN / RMSSD over
+                   the last ``beats`` R-R intervals
+  BandRatio        the device's per-second Theta / Alpha / Beta values →
+                   beta / alpha power ratio over the last ``windows``
+  SlidingRMS       EMG → sliding RMS over ``window`` samples via a
+                   cumulative sum of squares per chunk
+
+Every extractor has state_dict() / from_state() (plain JSON types), and
+StreamingFeatures bundles one user's extractors with save() / load() to
+a checkpoint file.
+
+Usage:
+    feats = StreamingFeatures.load("checkpoints/patient-7.json")
+    feats.update("ecg", ecg_chunk)
+    feats.update("eeg_alpha", alpha_values)
+    feats.features()        # heart_rate, hrv_sdnn, hrv_rmssd, stress_ratio, emg_rms
+    feats.score()           # same fields as /predict-raw
+    feats.save("checkpoints/patient-7.json")
+"""
+import json
+import os
+
+import numpy as np
+
+from utils.raw_signals import (
+    CHUNK,
+    ECG_FS,
+    DEFAULT_HEART_RATE,
+    DEFAULT_HRV_SDNN,
+    DEFAULT_STRESS_RATIO,
+    DEFAULT_EMG_RMS,
+    DEFAULT_SLEEP_HOURS,
+    DEFAULT_STEPS,
+    emg_model_units,
+    score_features,
+)
+
+HRV_BEATS = 60              # R-R intervals in the running HRV window (~1 min)
+EEG_WINDOWS = 30            # 1-s device windows in the running band ratio
+RR_RANGE_MS = (300.0, 2000.0)
+
+
+# ── Sliding sum ───────────────────────────────────────────────────────────────
+class SlidingSum:
+    """
+    Sum and sum of squares of the last ``size`` values, O(1) per push.
+    Totals are recomputed from the ring every ``size`` pushes so that
+    floating-point drift cannot accumulate.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = np.zeros(size)
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, x):
+        old = self.values[self.pos] if self.count == self.size else 0.0
+        self.values[self.pos] = x
+        self.pos = (self.pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.total += x - old
+        self.total_sq += x * x - old * old
+        if self.pos == 0:
+            self.total = float(self.values.sum())
+            self.total_sq = float(np.dot(self.values, self.values))
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def std(self):
+        """Sample standard deviation (ddof=1)."""
+        if self.count < 2:
+            return np.nan
+        var = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return float(np.sqrt(max(var, 0.0)))
+
+    def state_dict(self):
+        return {"size": self.size, "values": self.values.tolist(),
+                "pos": self.pos, "count": self.count}
+
+    @classmethod
+    def from_state(cls, state):
+        self = cls(state["size"])
+        self.values = np.asarray(state["values"], dtype=np.float64)
+        self.pos, self.count = state["pos"], state["count"]
+        valid = self.values if self.count == self.size else self.values[:self.count]
+        self.total = float(valid.sum())
+        self.total_sq = float(np.dot(valid, valid))
+        return self
+
+
+# ── ECG ───────────────────────────────────────────────────────────────────────
+class OnlineRPeaks:
+    """
+    Streaming R-peak detector with running HRV.
+
+    The signal is detrended with an exponential moving baseline (~0.5 s),
+    and an envelope of |signal| that decays with a 2 s half-life sets
+    the threshold (``threshold`` x envelope). A peak is a local maximum
+    above it, at least 250 ms after the previous one. R-R intervals
+    outside 300-2000 ms are discarded.
+    """
+
+    def __init__(self, fs=ECG_FS, beats=HRV_BEATS, threshold=0.5):
+        self.fs = fs
+        self.threshold = threshold
+        self.rr = SlidingSum(beats)
+        self.rr_diff = SlidingSum(max(beats - 1, 1))
+        self._alpha = 1.0 / max(0.5 * fs, 1.0)
+        self._decay = 0.5 ** (1.0 / (2.0 * fs))
+        self._refractory = int(0.25 * fs)
+        self.n = 0                      # samples seen
+        self.baseline = None
+        self.envelope = 0.0
+        self.prev = (0.0, 0.0)          # detrended samples n-2, n-1
+        self.last_peak = None           # sample index
+        self.last_rr = None
+        self.peaks = 0
+
+    def update(self, samples):
+        """Feed raw ECG samples (scalar or array); returns the number of new beats."""
+        beats = 0
+        for x in np.atleast_1d(np.asarray(samples, dtype=np.float64)):
+            if self.baseline is None:
+                self.baseline = x
+            self.baseline += (x - self.baseline) * self._alpha
+            y = x - self.baseline
+            self.envelope = max(abs(y), self.envelope * self._decay)
+
+            p2, p1 = self.prev
+            i = self.n - 1                                   # candidate index (p1)
+            if (p1 > self.threshold * self.envelope and p1 >= p2 and p1 > y
+                    and (self.last_peak is None or i - self.last_peak >= self._refractory)):
+                if self.last_peak is not None:
+                    self._beat((i - self.last_peak) / self.fs * 1000.0)
+                    beats += 1
+                self.last_peak = i
+                self.peaks += 1
+
+            self.prev = (p1, y)
+            self.n += 1
+        return beats
+
+    def _beat(self, rr):
+        if not (RR_RANGE_MS[0] <= rr <= RR_RANGE_MS[1]):
+            self.last_rr = None
+            return
+        if self.last_rr is not None:
+            self.rr_diff.push((rr - self.last_rr) ** 2)
+        self.rr.push(rr)
+        self.last_rr = rr
+
+    def heart_rate(self):
+        return 60000.0 / self.rr.mean() if self.rr.count >= 2 else np.nan
+
+    def sdnn(self):
+        return self.rr.std()
+
+    def rmssd(self):
+        return float(np.sqrt(self.rr_diff.mean())) if self.rr_diff.count else np.nan
+
+    def state_dict(self):
+        return {
+            "fs": self.fs, "threshold": self.threshold,
+            "rr": self.rr.state_dict(), "rr_diff": self.rr_diff.state_dict(),
+            "n": self.n, "baseline": self.baseline, "envelope": self.envelope,
+            "prev": list(self.prev), "last_peak": self.last_peak,
+            "last_rr": self.last_rr, "peaks": self.peaks,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        self = cls(fs=state["fs"], beats=state["rr"]["size"], threshold=state["threshold"])
+        self.rr = SlidingSum.from_state(state["rr"])
+        self.rr_diff = SlidingSum.from_state(state["rr_diff"])
+        for key in ("n", "baseline", "envelope", "last_peak", "last_rr", "peaks"):
+            setattr(self, key, state[key])
+        self.prev = tuple(state["prev"])
+        return self
+
+
+# ── EEG ───────────────────────────────────────────────────────────────────────
+class BandRatio:
+    """
+    Beta / alpha ratio over the last ``windows`` device windows. Band
+    values may arrive in separate chunks; each band keeps its own sliding
+    sum. With no band values, falls back to the focus index (eeg / 100)
+    like raw_signals.eeg_stress_ratio.
+    """
+
+    def __init__(self, windows=EEG_WINDOWS):
+        self.alpha = SlidingSum(windows)
+        self.beta = SlidingSum(windows)
+        self.theta = SlidingSum(windows)
+        self.focus = SlidingSum(windows)
+
+    def update(self, band, values):
+        target = getattr(self, band)
+        for x in np.atleast_1d(np.asarray(values, dtype=np.float64)):
+            target.push(x)
+
+    def ratio(self):
+        if self.alpha.count and self.beta.count and self.alpha.total > 0:
+            return (self.beta.total / self.beta.count) / (self.alpha.total / self.alpha.count)
+        if self.focus.count:
+            return self.focus.mean() / 100
+        return np.nan
+
+    def state_dict(self):
+        return {band: getattr(self, band).state_dict()
+                for band in ("alpha", "beta", "theta", "focus")}
+
+    @classmethod
+    def from_state(cls, state):
+        self = cls(state["alpha"]["size"])
+        for band, sub in state.items():
+            setattr(self, band, SlidingSum.from_state(sub))
+        return self
+
+
+# ── EMG ───────────────────────────────────────────────────────────────────────
+class SlidingRMS:
+    """
+    RMS over the last ``window`` samples. update() takes a chunk and
+    returns the RMS at every new sample, from one cumulative sum over
+    the previous window's squares followed by the chunk's.
+    """
+
+    def __init__(self, window=CHUNK):
+        self.window = window
+        self.tail = np.zeros(window)            # last ``window`` squares, oldest first
+        self.count = 0
+        self.last = np.nan
+
+    def update(self, samples):
+        x = np.atleast_1d(np.asarray(samples, dtype=np.float64))
+        n = len(x)
+        if n == 0:
+            return np.empty(0)
+        w = self.window
+        combined = np.concatenate([self.tail, x * x])
+        cs = np.concatenate([[0.0], np.cumsum(combined)])
+        sums = cs[w + 1:w + n + 1] - cs[1:n + 1]
+        filled = np.minimum(self.count + np.arange(1, n + 1), w)
+        rms = np.sqrt(np.maximum(sums, 0.0) / filled)
+
+        self.tail = combined[-w:]
+        self.count = min(self.count + n, w)
+        self.last = float(rms[-1])
+        return rms
+
+    def state_dict(self):
+        return {"window": self.window, "tail": self.tail.tolist(),
+                "count": self.count, "last": self.last}
+
+    @classmethod
+    def from_state(cls, state):
+        self = cls(state["window"])
+        self.tail = np.asarray(state["tail"], dtype=np.float64)
+        self.count, self.last = state["count"], state["last"]
+        return self
+
+
+# ── Per-user bundle ───────────────────────────────────────────────────────────
+class StreamingFeatures:
+    """One user's extractors, fed by sensor name as stored by the ingest service."""
+
+    def __init__(self, ecg_fs=ECG_FS):
+        self.ecg = OnlineRPeaks(fs=ecg_fs)
+        self.eeg = BandRatio()
+        self.emg = SlidingRMS()
+        self.bpm = SlidingSum(HRV_BEATS)
+
+    def update(self, sensor, values):
+        if sensor == "ecg":
+            self.ecg.update(values)
+        elif sensor == "heart_rate":
+            for x in np.atleast_1d(values):
+                self.bpm.push(float(x))
+        elif sensor == "emg":
+            self.emg.update(values)
+        elif sensor == "eeg":
+            self.eeg.update("focus", values)
+        elif sensor.startswith("eeg_"):
+            self.eeg.update(sensor[4:], values)
+
+    def features(self):
+        """Current model inputs, with the /predict-raw defaults where unknown."""
+        hr, sdnn = self.ecg.heart_rate(), self.ecg.sdnn()
+        if np.isnan(hr) and self.bpm.count:
+            # Too few beats: derive from bpm samples, as raw_signals does
+            hr = self.bpm.mean()
+            rr = 60000 / np.maximum(self.bpm.values[:self.bpm.count], 30)
+            sdnn = float(np.std(rr, ddof=1)) if self.bpm.count >= 2 else np.nan
+        stress = self.eeg.ratio()
+        rms = float(emg_model_units(self.emg.last))
+        pick = lambda v, default: default if v is None or np.isnan(v) else float(v)
+        return {
+            "heart_rate":   pick(hr, DEFAULT_HEART_RATE),
+            "hrv_sdnn":     pick(sdnn, DEFAULT_HRV_SDNN),
+            "hrv_rmssd":    pick(self.ecg.rmssd(), np.nan),
+            "stress_ratio": pick(stress, DEFAULT_STRESS_RATIO),
+            "emg_rms":      pick(rms, DEFAULT_EMG_RMS),
+        }
+
+    def score(self, sleep=DEFAULT_SLEEP_HOURS, steps=DEFAULT_STEPS):
+        f = self.features()
+        return score_features(f["heart_rate"], f["hrv_sdnn"], f["stress_ratio"],
+                              f["emg_rms"], sleep, steps)[0]
+
+    # ── checkpoints ──
+    def state_dict(self):
+        return {"ecg": self.ecg.state_dict(), "eeg": self.eeg.state_dict(),
+                "emg": self.emg.state_dict(), "bpm": self.bpm.state_dict()}
+
+    @classmethod
+    def from_state(cls, state):
+        self = cls.__new__(cls)
+        self.ecg = OnlineRPeaks.from_state(state["ecg"])
+        self.eeg = BandRatio.from_state(state["eeg"])
+        self.emg = SlidingRMS.from_state(state["emg"])
+        self.bpm = SlidingSum.from_state(state["bpm"])
+        return self
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(self.state_dict(), fh)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, ecg_fs=ECG_FS):
+        """Restore from ``path``, or start fresh when it does not exist."""
+        if not os.path.exists(path):
+            return cls(ecg_fs=ecg_fs)
+        with open(path) as fh:
+            return cls.from_state(json.load(fh))
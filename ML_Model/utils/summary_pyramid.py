@@ -0,0 +1,237 @@
+"""
+Multi-resolution summary pyramid for long sensor histories
+===========================================================
+Per (user, sensor), count / sum / min / max of the samples in fixed time
+cells at several resolutions: level 0 cells are BASE_SECONDS (1 s) wide
+and every level up is FACTOR (4) times wider, up to ~2 years per cell.
+
+    <root>/<user>/<sensor>/pyramid/L00.cells   L01.cells ...
+
+Each level is a file of fixed-width records sorted by cell number (only
+cells that hold samples exist). update() aggregates a new chunk once per
+level and rewrites only the records from its first cell on, so in-order
+data touches the last record or two of each file; files only grow.
+
+Queries never read raw samples:
+
+  summary(start, end)   count / mean / min / max over a range from
+                        O(levels x FACTOR) cells: unaligned edges from
+                        fine levels, the aligned middle from the coarsest
+                        levels that fit (a segment-tree decomposition)
+  series(start, end,    one row per cell of the finest level with at most
+         points)        ``points`` cells in the range — for charts and
+                        trends over months
+
+Ranges resolve to level-0 cells (a cell counts when it starts inside the
+range). Pyramids live in the sensor store's tree, but outlive its raw
+retention. ingest/serial_ingest.py and main.py's POST /history keep them
+updated, GET /history serves them; rebuild() backfills from a SegmentStore.
+
+Usage:
+    pyramid = SummaryPyramid("data/sensors")
+    pyramid.update("patient-7", "heart_rate", timestamps, values)
+    pyramid.summary("patient-7", "heart_rate", t0, t1)   # {"count", "mean", "min", "max", "cells"}
+    pyramid.series("patient-7", "heart_rate", t0, t1, points=500)
+"""
+import os
+import threading
+
+import numpy as np
+
+from utils.segment_store import check_name
+
+CELL = np.dtype([("cell", "<i8"), ("count", "<i8"), ("sum", "<f8"), ("min", "<f4"), ("max", "<f4")])
+BASE_SECONDS = 1.0
+FACTOR = 4
+LEVELS = 14
+FOLDER = "pyramid"
+
+
+def _reduce(cells):
+    """Merge records with equal cell numbers (input sorted by cell)."""
+    if len(cells) < 2:
+        return cells
+    starts = np.flatnonzero(np.r_[True, cells["cell"][1:] != cells["cell"][:-1]])
+    if len(starts) == len(cells):
+        return cells
+    out = np.empty(len(starts), dtype=CELL)
+    out["cell"] = cells["cell"][starts]
+    out["count"] = np.add.reduceat(cells["count"], starts)
+    out["sum"] = np.add.reduceat(cells["sum"], starts)
+    out["min"] = np.minimum.reduceat(cells["min"], starts)
+    out["max"] = np.maximum.reduceat(cells["max"], starts)
+    return out
+
+
+def _coarsen(cells, factor):
+    up = cells.copy()
+    up["cell"] //= factor
+    return _reduce(up)
+
+
+class SummaryPyramid:
+
+    def __init__(self, root, base_seconds=BASE_SECONDS, factor=FACTOR, levels=LEVELS):
+        self.root = root
+        self.base_seconds = float(base_seconds)
+        self.factor = int(factor)
+        self.levels = int(levels)
+        self._lock = threading.Lock()
+
+    def width(self, level):
+        """Cell width of a level, in seconds."""
+        return self.base_seconds * self.factor ** level
+
+    def _path(self, user, sensor, level):
+        return os.path.join(self.root, check_name("user", user), check_name("sensor", sensor),
+                            FOLDER, f"L{level:02d}.cells")
+
+    def cells(self, user, sensor, level):
+        """Memory-mapped records of one level (empty when missing)."""
+        path = self._path(user, sensor, level)
+        count = os.path.getsize(path) // CELL.itemsize if os.path.exists(path) else 0
+        if count == 0:
+            return np.empty(0, dtype=CELL)
+        return np.memmap(path, dtype=CELL, mode="r", shape=(count,))
+
+    # ── writes ──
+    def update(self, user, sensor, timestamps, values):
+        """Fold a chunk of samples into every level; returns the samples used."""
+        t = np.asarray(timestamps, dtype=np.float64)
+        v = np.asarray(values, dtype=np.float64)
+        ok = ~np.isnan(v) & ~np.isnan(t)
+        t, v = t[ok], v[ok]
+        if len(v) == 0:
+            return 0
+
+        new = np.empty(len(v), dtype=CELL)
+        new["cell"] = np.floor(t / self.base_seconds).astype(np.int64)
+        new["count"] = 1
+        new["sum"] = v
+        new["min"] = v
+        new["max"] = v
+        new = _reduce(new[np.argsort(new["cell"], kind="stable")])
+
+        with self._lock:
+            os.makedirs(os.path.dirname(self._path(user, sensor, 0)), exist_ok=True)
+            for level in range(self.levels):
+                if level:
+                    new = _coarsen(new, self.factor)
+                self._merge(self._path(user, sensor, level), new)
+        return len(v)
+
+    @staticmethod
+    def _merge(path, new):
+        """Rewrite the level file from the first record ``new`` touches."""
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        with open(path, mode) as fh:
+            count = os.fstat(fh.fileno()).st_size // CELL.itemsize
+            first = 0
+            tail = np.empty(0, dtype=CELL)
+            if count:
+                existing = np.memmap(fh, dtype=CELL, mode="r", shape=(count,))
+                first = int(np.searchsorted(existing["cell"], new["cell"][0]))
+                tail = np.array(existing[first:])
+                del existing
+            merged = np.concatenate([tail, new])
+            merged = _reduce(merged[np.argsort(merged["cell"], kind="stable")])
+            fh.seek(first * CELL.itemsize)
+            fh.write(merged.tobytes())
+
+    def rebuild(self, store, user, sensor, chunk_seconds=86400.0):
+        """Backfill a pyramid from a SegmentStore stream, a day at a time."""
+        with self._lock:
+            for level in range(self.levels):
+                path = self._path(user, sensor, level)
+                if os.path.exists(path):
+                    os.remove(path)
+        segments = store.segments(user, sensor)
+        if not segments:
+            return 0
+        total = 0
+        start = min(s.t_first for s in segments)
+        end = max(s.t_last for s in segments)
+        while start <= end:
+            t, v = store.read(user, sensor, start, start + chunk_seconds)
+            total += self.update(user, sensor, t, v)
+            start += chunk_seconds
+        return total
+
+    # ── reads ──
+    def _cell_range(self, cells, lo, hi):
+        """Records with lo <= cell < hi (a contiguous slice)."""
+        key = cells["cell"]
+        return cells[np.searchsorted(key, lo):np.searchsorted(key, hi)]
+
+    def _bounds(self, user, sensor, start, end):
+        """Level-0 cell range [lo, hi) for a time range (None = all data)."""
+        base = self.cells(user, sensor, 0)
+        if len(base) == 0:
+            return None
+        lo = int(base["cell"][0]) if start is None else int(np.ceil(start / self.base_seconds))
+        hi = int(base["cell"][-1]) + 1 if end is None else int(np.ceil(end / self.base_seconds))
+        return lo, hi
+
+    def summary(self, user, sensor, start=None, end=None):
+        """
+        {"count", "mean", "min", "max", "cells"} over [start, end) (epoch
+        seconds), None when the range holds no samples. "cells" is the
+        number of summary records read.
+        """
+        bounds = self._bounds(user, sensor, start, end)
+        if bounds is None:
+            return None
+        lo, hi = bounds
+        parts = []
+        for level in range(self.levels):
+            if lo >= hi:
+                break
+            cells = self.cells(user, sensor, level)
+            if level == self.levels - 1:
+                parts.append(self._cell_range(cells, lo, hi))
+                break
+            # Unaligned edges at this level, the aligned middle one level up
+            up_lo, up_hi = -(-lo // self.factor), hi // self.factor
+            if up_lo >= up_hi:
+                parts.append(self._cell_range(cells, lo, hi))
+                break
+            parts.append(self._cell_range(cells, lo, up_lo * self.factor))
+            parts.append(self._cell_range(cells, up_hi * self.factor, hi))
+            lo, hi = up_lo, up_hi
+
+        used = np.concatenate(parts) if parts else np.empty(0, dtype=CELL)
+        count = int(used["count"].sum())
+        if count == 0:
+            return None
+        return {
+            "count": count,
+            "mean":  float(used["sum"].sum() / count),
+            "min":   float(used["min"].min()),
+            "max":   float(used["max"].max()),
+            "cells": int(len(used)),
+        }
+
+    def series(self, user, sensor, start=None, end=None, points=500):
+        """
+        Per-cell {"t", "count", "mean", "min", "max"} arrays for the cells
+        overlapping [start, end), from the finest level with at most
+        ``points`` cells in the range, plus that level's "width" (s).
+        """
+        bounds = self._bounds(user, sensor, start, end)
+        if bounds is None:
+            return None
+        lo, hi = bounds
+        level = 0
+        while level < self.levels - 1 and (hi - lo) / self.factor ** level > points:
+            level += 1
+        scale = self.factor ** level
+        cells = self._cell_range(self.cells(user, sensor, level), lo // scale, -(-hi // scale))
+        width = self.width(level)
+        return {
+            "width": width,
+            "t":     cells["cell"] * width,
+            "count": np.asarray(cells["count"]),
+            "mean":  cells["sum"] / np.maximum(cells["count"], 1),
+            "min":   np.asarray(cells["min"]),
+            "max":   np.asarray(cells["max"]),
+        }
@@ -0,0 +1,137 @@
+"""
+Chunked, parallel, reproducible synthetic dataset generation
+============================================================
+The generators in data/synthetic/ and the per-model generate.py scripts
+describe one chunk of rows — ``make_chunk(rng, n) -> DataFrame`` — and
+hand it to generate() / main():
+
+  - The rows are cut into fixed chunks of ``chunk_rows``. Chunk i draws
+    from its own np.random.Generator seeded with the i-th child of
+    SeedSequence(seed).spawn(), so chunks are statistically independent
+    and any chunk can be made on its own.
+  - Chunks are generated and CSV-encoded in a process pool and written
+    in chunk order as they complete; at most 2 x workers chunks are in
+    flight, so memory stays bounded for any row count (100M+).
+  - The output depends only on (seed, rows, chunk_rows): the file is
+    byte-identical for any number of workers, including 1 (no pool).
+  - An output path ending in .cols writes the typed columnar format of
+    utils/dataset_io.py instead of CSV (no text encoding at all).
+
+Class-structured generators use class_labels(), which gives every chunk
+the class mix of ``fractions`` exactly (largest remainder), shuffled.
+
+Usage (every generator script):
+    python generate_heart_data.py                                # the 10k default
+    python generate_heart_data.py --rows 100000000 --workers 8 --output heart_100m.csv
+    python generate_heart_data.py --rows 100000000 --output heart_100m.cols
+
+    from utils.synthetic import generate
+    generate(make_chunk, n_rows=1_000_000, path="out.csv", seed=42, workers=4)
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.dataset_io import SUFFIX, ColumnWriter
+
+CHUNK_ROWS = 100_000
+SEED = 42
+
+
+def chunk_plan(n_rows, chunk_rows=CHUNK_ROWS, seed=SEED):
+    """[(rows, SeedSequence)] of every chunk, in file order."""
+    n_chunks = -(-n_rows // chunk_rows) if n_rows > 0 else 0
+    children = np.random.SeedSequence(seed).spawn(n_chunks)
+    sizes = [min(chunk_rows, n_rows - i * chunk_rows) for i in range(n_chunks)]
+    return list(zip(sizes, children))
+
+
+def class_labels(rng, n, fractions):
+    """``n`` shuffled class labels (0..k-1) split by ``fractions`` exactly."""
+    fractions = np.asarray(fractions, dtype=np.float64)
+    exact = n * fractions / fractions.sum()
+    counts = np.floor(exact).astype(np.int64)
+    # Hand the leftover rows to the largest remainders (ties: lower class)
+    counts[np.argsort(-(exact - counts), kind="stable")[:n - counts.sum()]] += 1
+    return rng.permutation(np.repeat(np.arange(len(fractions)), counts))
+
+
+def make_frame(make_chunk, rows, seed_seq):
+    return make_chunk(np.random.default_rng(seed_seq), rows)
+
+
+def _encode(make_chunk, rows, seed_seq, header):
+    return make_frame(make_chunk, rows, seed_seq).to_csv(index=False, header=header).encode()
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.out = open(self.tmp, "wb")
+
+    def append(self, data):
+        self.out.write(data)
+
+    def close(self):
+        self.out.close()
+        os.replace(self.tmp, self.path)
+
+
+def generate(make_chunk, n_rows, path, seed=SEED, chunk_rows=CHUNK_ROWS, workers=None):
+    """Write ``n_rows`` rows of ``make_chunk`` to ``path`` (CSV or .cols); returns the row count."""
+    plan = chunk_plan(n_rows, chunk_rows, seed)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(plan) or 1))
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    columnar = path.endswith(SUFFIX)
+    out = ColumnWriter(path) if columnar else _CsvWriter(path)
+    task = make_frame if columnar else _encode
+
+    def args(i, rows, seq):
+        return (make_chunk, rows, seq) if columnar else (make_chunk, rows, seq, i == 0)
+
+    if workers == 1:
+        for i, (rows, seq) in enumerate(plan):
+            out.append(task(*args(i, rows, seq)))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            for i, (rows, seq) in enumerate(plan):
+                pending.append(pool.submit(task, *args(i, rows, seq)))
+                if len(pending) >= 2 * workers:
+                    out.append(pending.popleft().result())
+            while pending:
+                out.append(pending.popleft().result())
+    out.close()
+    return sum(rows for rows, _ in plan)
+
+
+def _size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def main(make_chunk, default_rows, default_output, description, argv=None):
+    """Command line of a generator script (see the module docstring)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--rows", type=int, default=default_rows)
+    parser.add_argument("--output", default=default_output)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all CPUs)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help="rows per chunk (part of what the output depends on)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = generate(make_chunk, args.rows, args.output, args.seed, args.chunk_rows, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{rows:,} rows → {args.output} ({_size(args.output) / 1e6:,.1f} MB) "
+          f"in {elapsed:.1f}s")
+    return args
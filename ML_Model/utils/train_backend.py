@@ -0,0 +1,152 @@
+"""
+Training backends for the calibrated signal / stroke models
+===========================================================
+ECG, EEG, EMG and stroke all train a boosted-tree classifier wrapped in
+CalibratedClassifierCV(cv=5). fit_calibrated() builds that wrapper with
+one of two backends:
+
+  gbm   sklearn GradientBoostingClassifier (200 trees, depth 3, lr 0.05,
+        subsample 0.8) — the models the repo has always shipped. The five
+        calibration folds fit in parallel processes.
+  xgb   XGBoost ``hist`` (binned features, multithreaded). The number of
+        trees comes from one early-stopped fit on a stratified hold-out
+        of the training rows; the five folds then fit that many trees.
+
+  auto  gbm up to AUTO_ROWS training rows, xgb above (the default)
+
+Either way the result is a plain CalibratedClassifierCV, so artifacts keep
+the {"model", "scaler"} contract and utils/compiled_model.py compiles
+them. Exact lookup tables (utils/lookup_table.py) need gbm folds.
+
+The backend is chosen by ``backend=`` or the TRAIN_BACKEND env var;
+threads / fold processes by ``n_jobs=`` or TRAIN_THREADS (default: the
+CPUs this process may run on — train_all.py's per-step budget).
+
+Usage:
+    from utils.train_backend import fit_calibrated
+    calibrated = fit_calibrated(X_train, y_train, method="isotonic")
+
+    python utils/train_backend.py                 # fit time vs dataset size
+    python utils/train_backend.py --sizes 5000 1000000 --backends xgb
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.model_selection import train_test_split
+
+BACKENDS = ("gbm", "xgb")
+AUTO_ROWS = 50_000
+
+GBM_PARAMS = dict(n_estimators=200, max_depth=3, learning_rate=0.05, subsample=0.8)
+XGB_PARAMS = dict(max_depth=3, learning_rate=0.1, subsample=0.8, tree_method="hist", max_bin=256)
+XGB_MAX_ROUNDS = 1000
+XGB_EARLY_STOPPING = 20
+XGB_VALIDATION = 0.1
+
+
+def resolve_backend(backend=None, n_rows=0):
+    backend = (backend or os.environ.get("TRAIN_BACKEND") or "auto").lower()
+    if backend == "auto":
+        return "xgb" if n_rows > AUTO_ROWS else "gbm"
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown training backend {backend!r} (choose from auto, {', '.join(BACKENDS)})")
+    return backend
+
+
+def default_jobs():
+    if os.environ.get("TRAIN_THREADS"):
+        return int(os.environ["TRAIN_THREADS"])
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _xgb_rounds(X, y, n_jobs, random_state):
+    """Trees to fit: the best iteration of an early-stopped hold-out fit."""
+    from xgboost import XGBClassifier
+
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X, y, test_size=XGB_VALIDATION, random_state=random_state, stratify=y
+    )
+    probe = XGBClassifier(n_estimators=XGB_MAX_ROUNDS, early_stopping_rounds=XGB_EARLY_STOPPING,
+                          n_jobs=n_jobs, random_state=random_state, **XGB_PARAMS)
+    probe.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    return int(probe.best_iteration) + 1
+
+
+def fit_calibrated(X, y, method="isotonic", backend=None, n_jobs=None, cv=5,
+                   random_state=42, verbose=True):
+    """Fitted CalibratedClassifierCV(boosted trees) on (X, y)."""
+    backend = resolve_backend(backend, len(X))
+    n_jobs = n_jobs or default_jobs()
+    start = time.perf_counter()
+
+    if backend == "xgb":
+        from xgboost import XGBClassifier
+
+        rounds = _xgb_rounds(X, y, n_jobs, random_state)
+        base = XGBClassifier(n_estimators=rounds, n_jobs=n_jobs, random_state=random_state,
+                             **XGB_PARAMS)
+        calibrated = CalibratedClassifierCV(base, method=method, cv=cv)
+    else:
+        rounds = GBM_PARAMS["n_estimators"]
+        base = GradientBoostingClassifier(random_state=random_state, **GBM_PARAMS)
+        calibrated = CalibratedClassifierCV(base, method=method, cv=cv, n_jobs=min(n_jobs, cv))
+
+    calibrated.fit(X, y)
+    if verbose:
+        print(f"Trained {backend} ({rounds} trees x {cv} folds, {n_jobs} jobs) on "
+              f"{len(X):,} rows in {time.perf_counter() - start:.1f}s")
+    return calibrated
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+def _synthetic(n, n_features, seed=0):
+    """Two overlapping Gaussian classes, roughly the signal datasets' shape."""
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, 2, n)
+    X = rng.normal(size=(n, n_features)) + 1.2 * y[:, None] * np.linspace(1.0, 0.3, n_features)
+    return X, y
+
+
+def benchmark(sizes, backends=BACKENDS, n_features=2, n_jobs=None):
+    """One row per (size, backend): fit seconds and held-out accuracy."""
+    rows = []
+    for n in sizes:
+        X, y = _synthetic(int(n * 1.25), n_features)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, train_size=int(n), random_state=0, stratify=y
+        )
+        for backend in backends:
+            start = time.perf_counter()
+            model = fit_calibrated(X_train, y_train, backend=backend, n_jobs=n_jobs, verbose=False)
+            seconds = time.perf_counter() - start
+            rows.append({
+                "rows":     int(n),
+                "backend":  backend,
+                "seconds":  round(seconds, 2),
+                "rows_s":   round(n / seconds),
+                "accuracy": round(float((model.predict(X_test) == y_test).mean()), 4),
+            })
+            print(f"  {n:>10,} rows  {backend:<4} {seconds:8.1f}s")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit time of each training backend vs dataset size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5_000, 50_000, 500_000])
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--features", type=int, default=2)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    rows = benchmark(args.sizes, args.backends, args.features, args.jobs)
+    print(f"\n| rows | backend | fit (s) | rows/s | accuracy |   ({args.features} features, "
+          f"{args.jobs or default_jobs()} jobs)")
+    print("|---:|---|---:|---:|---:|")
+    for r in rows:
+        print(f"| {r['rows']:,} | {r['backend']} | {r['seconds']:.1f} | {r['rows_s']:,} | {r['accuracy']:.4f} |")